@@ -1,8 +1,637 @@
-from functools import reduce
+from bisect import bisect_left
+from collections import Counter
+from functools import lru_cache
+from itertools import accumulate, chain, compress, islice, repeat
+import atexit
+import math
+import mmap
+import operator
+import os
+import pickle
+import struct
+import sys
+
+
+#Typecodes used for compact storage, chosen from the (validated) type of the values
+_TYPECODES = {int: "q", float: "d", bool: "?"}
+_TYPES = {typecode: dtype for dtype, typecode in _TYPECODES.items()}
+
+#The type of the values in a typed buffer by format character (see Array.frombuffer). 
+#One byte formats are read as raw bytes, and unsigned ints can not be read as signed.
+_BYTE_FORMATS = frozenset("Bbc")
+_FORMAT_TYPES = {**dict.fromkeys("hilqn", int), **dict.fromkeys("efd", float), "?": bool}
+
+#Size of the tiles in the blocked matrix multiplication
+_MATMUL_BLOCK = 64
+
+#Binary file format (see Array.save): magic, byte order, typecode and number of dimensions, 
+#then the shape as 64-bit ints, padded to a multiple of 64 bytes. The raw values follows.
+_FILE_MAGIC = b"\x93ARRAY"
+_FILE_HEADER = "<6sccB"
+_FILE_ALIGNMENT = 64
+
+
+#Options for delegating operations on large arrays to numpy, see set_numpy
+_numpy_options = {"threshold": 10**4}
+
+#The numpy ufuncs for the element-wise operations
+_NUMPY_UFUNCS = {operator.add: "add", operator.sub: "subtract", operator.mul: "multiply", 
+                 operator.eq: "equal", operator.lt: "less", operator.le: "less_equal", 
+                 operator.gt: "greater", operator.ge: "greater_equal"}
+_NUMPY_ARITHMETIC = frozenset({operator.add, operator.sub, operator.mul})
+
+#Options for printing arrays, see set_printoptions
+_print_options = {"threshold": 1000, "edgeitems": 3}
+
+#Options for the parallel execution, see set_parallel. 
+#multiprocessing is imported where it is used: it imports socket, which imports 
+#the module array, and that is this module when it is run from this directory.
+_parallel_options = {"processes": 0, "threshold": 10**6}
+_parallel_pool = None
+
+
+def set_parallel(processes=None, threshold=10**6):
+    """
+    Turns on (or off) parallel execution of element-wise operations and reductions on large arrays.
+
+    Arrays with at least `threshold` values are split into one chunk per process. 
+    The values are put in shared memory, so they are not pickled, and the chunks are 
+    computed by a pool of processes which is started once and reused. 
+    Smaller arrays are computed serially, so they do not pay the startup cost.
+
+    Args:
+        processes (int): number of processes, 0 turns parallel execution off (default: number of CPUs).
+        threshold (int): the smallest size of arrays to compute in parallel.
+    """
+    global _parallel_pool
+    if processes is None:
+        processes = os.cpu_count() or 1
+    
+    if _parallel_pool is not None and processes != _parallel_options["processes"]:
+        _parallel_pool.shutdown()
+        _parallel_pool = None
+    
+    _parallel_options["processes"] = processes
+    _parallel_options["threshold"] = threshold
+
+
+def _pool():
+    """Returns the process pool for parallel execution, started the first time it is used."""
+    from concurrent.futures import ProcessPoolExecutor
+    
+    global _parallel_pool
+    if _parallel_pool is None:
+        _parallel_pool = ProcessPoolExecutor(max_workers=_parallel_options["processes"])
+        atexit.register(_parallel_pool.shutdown)
+    return _parallel_pool
+
+
+def _to_shared_memory(array):
+    """
+    Copies the values of an array to a new block of shared memory, packed with the typecode of the array.
+
+    Args:
+        array (Array): the array.
+
+    Returns:
+        SharedMemory: the shared memory (the caller must unlink it).
+
+    Raises:
+        struct.error: If the values does not fit in the typecode (e.g. too large ints).
+    """
+    from multiprocessing import shared_memory
+    
+    typecode = array._typecode()
+    shared = shared_memory.SharedMemory(create=True, size=max(1, array._size * struct.calcsize(typecode)))
+    values = array._flat()
+    try:
+        if isinstance(values, memoryview):
+            shared.buf[:values.nbytes] = values.cast("B")
+        else:
+            struct.pack_into(str(len(values)) + typecode, shared.buf, 0, *values)
+    except struct.error:
+        shared.close()
+        shared.unlink()
+        raise
+    return shared
+
+
+def _attach(name):
+    """Attaches to shared memory made by the parent process (which unlinks it)."""
+    from multiprocessing import shared_memory
+    
+    return shared_memory.SharedMemory(name=name)
+
+
+def _parallel_chunk(task):
+    """
+    Computes one chunk of an element-wise operation in a worker process.
+
+    Args:
+        task (tuple): (function, (name, typecode) of the first operand, (name, typecode) of the 
+                      second operand or the number, (name, typecode) of the result, start, stop).
+
+    Returns:
+        bool: False if the results are not all of the type of the result typecode, 
+              or does not fit in it (e.g. too large ints), so nothing was written.
+    """
+    function, (name, typecode), other, (out_name, out_typecode), start, stop = task
+    
+    shared = [_attach(name), _attach(out_name)]
+    values = memoryview(shared[0].buf).cast(typecode)[start:stop]
+    other_values = None
+    try:
+        if type(other) == tuple:
+            shared.append(_attach(other[0]))
+            other_values = memoryview(shared[2].buf).cast(other[1])[start:stop]
+            new_values = tuple(map(function, values, other_values))
+        else:
+            new_values = tuple(map(function, values, repeat(other, stop - start)))
+        
+        if new_values and set(map(type, new_values)) != {_TYPES[out_typecode]}:
+            return False
+        try:
+            struct.pack_into(str(stop - start) + out_typecode, shared[1].buf, 
+                             start * struct.calcsize(out_typecode), *new_values)
+        except struct.error:
+            return False
+        return True
+    finally:
+        #Views of the shared memory must be released before it is closed
+        values.release()
+        if other_values is not None:
+            other_values.release()
+        for block in shared:
+            block.close()
+
+
+def _parallel_reduce_chunk(task):
+    """
+    Reduces one chunk of an array in a worker process.
+
+    Args:
+        task (tuple): (reducer, name, typecode, start, stop).
+
+    Returns:
+        value: the reduced chunk.
+    """
+    reducer, name, typecode, start, stop = task
+    shared = _attach(name)
+    values = memoryview(shared.buf).cast(typecode)[start:stop]
+    try:
+        return reducer(values)
+    finally:
+        values.release()
+        shared.close()
+
+
+def _chunks(size):
+    """Returns the (start, stop) of one chunk per process, covering size values."""
+    step = -(-size // _parallel_options["processes"])
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+def set_printoptions(threshold=None, edgeitems=None):
+    """
+    Sets how arrays are printed (by str), as numpy.set_printoptions.
+
+    Arrays with more values than threshold are summarised: only the first and last 
+    edgeitems entries of each dimension are printed, with "..." in between.
+
+    Args:
+        threshold (int): optional, the largest size of arrays which are printed in full (default 1000).
+        edgeitems (int): optional, the number of entries printed at each end of a summarised dimension (default 3).
+    """
+    if threshold is not None:
+        _print_options["threshold"] = threshold
+    if edgeitems is not None:
+        _print_options["edgeitems"] = edgeitems
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """
+    Returns the numpy module, or None if numpy is not installed.
+
+    numpy is optional, and only imported the first time an accelerated path is used.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def set_numpy(threshold=10**4):
+    """
+    Sets when operations on arrays are delegated to numpy (if numpy is installed).
+
+    Element-wise operations and reductions on arrays with at least `threshold` values
+    are computed by numpy on a view of the values (without copying compact arrays). 
+    Only operations where numpy gives the same results as python are delegated: int 
+    arithmetic and sums which could overflow 64 bits, and float sums and means (numpy 
+    sums pairwise, which rounds differently) are computed in python. The results are 
+    compact if any of the operands are. Matrix products (see Array.dot) are not exact 
+    in this sense, numpy computes them for all compact arrays.
+
+    Args:
+        threshold (int): the smallest size of arrays to delegate to numpy, None turns delegation off.
+    """
+    _numpy_options["threshold"] = threshold
+
+
+def _to_numpy(value):
+    """
+    Returns value with Arrays (also in lists, tuples and dicts) replaced by numpy arrays.
+
+    Args:
+        value: any value.
+
+    Returns:
+        The value with numpy arrays.
+    """
+    if type(value) == Array:
+        return _numpy().asarray(value)
+    if type(value) in (list, tuple):
+        return type(value)(_to_numpy(item) for item in value)
+    if type(value) == dict:
+        return {key: _to_numpy(item) for key, item in value.items()}
+    return value
+
+
+def _abs_max(values):
+    """Returns the largest absolute value of an int numpy array or a python int, as a python int (0 if empty)."""
+    if type(values) == int:
+        return abs(values)
+    return max(int(values.max()), -int(values.min())) if values.size else 0
+
+
+def _numpy_is_exact(x, y, function):
+    """
+    Returns True if numpy computes function(x, y) element-wise exactly as python does.
+
+    Python ints never overflow, and are compared exactly with floats, while numpy
+    uses 64-bit ints and converts ints to floats to compare them. Bools are expected
+    to be converted to ints for arithmetic (True + True == 2 in python).
+
+    Args:
+        x (numpy.ndarray): The first operand.
+        y (numpy.ndarray, float, int): The second operand.
+        function (callable): One of the functions in _NUMPY_UFUNCS.
+
+    Returns:
+        bool: True if the results are the same.
+    """
+    def kind(value):
+        return {int: "i", float: "f"}.get(type(value)) or value.dtype.kind
+    
+    if type(y) == int and y.bit_length() >= 64:
+        return False
+    
+    kinds = kind(x) + kind(y)
+    if function in _NUMPY_ARITHMETIC:
+        if kinds != "ii":
+            return True
+        if function is operator.mul:
+            return _abs_max(x) * _abs_max(y) < 2**63
+        return _abs_max(x) + _abs_max(y) < 2**63
+    
+    #Ints compared with floats must be exact as floats
+    if kinds == "if":
+        return _abs_max(x) <= 2**53
+    if kinds == "fi":
+        return _abs_max(y) <= 2**53
+    return True
+
+
+def _from_numpy(value):
+    """
+    Returns value with numpy arrays (also in lists and tuples) replaced by Arrays, and numpy scalars by python values.
+
+    Args:
+        value: any value.
+
+    Returns:
+        The value with Arrays.
+
+    Raises:
+        ValueError: If a numpy array is not of a valid type (bool, int or float).
+    """
+    np = _numpy()
+    if isinstance(value, np.ndarray):
+        return Array._from_numpy(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if type(value) in (list, tuple):
+        return type(value)(_from_numpy(item) for item in value)
+    return value
+
+
+def _contiguous_strides(shape):
+    """
+    Returns the row-major strides (in elements) for an array with the given shape.
+
+    Args:
+        shape (tuple): shape of the array.
+
+    Returns:
+        tuple: the number of elements to step in the flat storage for each dimension.
+    """
+    strides = []
+    step = 1
+    for n in reversed(shape):
+        strides.append(step)
+        step *= n
+    return tuple(reversed(strides))
+
+
+def _broadcast_shapes(shape1, shape2):
+    """
+    Returns the shape two arrays are broadcast to in element-wise operations.
+
+    Args:
+        shape1 (tuple): shape of the first array.
+        shape2 (tuple): shape of the second array.
+
+    Returns:
+        tuple: the broadcast shape.
+
+    Raises:
+        ValueError: If the shapes can not be broadcast together.
+    """
+    ndim = max(len(shape1), len(shape2))
+    shape1 = (1,) * (ndim - len(shape1)) + tuple(shape1)
+    shape2 = (1,) * (ndim - len(shape2)) + tuple(shape2)
+    
+    shape = []
+    for n1, n2 in zip(shape1, shape2):
+        if n1 != n2 and n1 != 1 and n2 != 1:
+            raise ValueError("Shapes does not match, " + str(shape1) + " and " + str(shape2) + 
+                             " can not be broadcast together.")
+        shape.append(n2 if n1 == 1 else n1)
+    return tuple(shape)
+
+
+def _iter_strided(storage, offset, shape, strides):
+    """
+    Returns an iterator over the elements of a strided view of flat storage, in row-major order.
+
+    Args:
+        storage (sequence): the flat storage.
+        offset (int): offset of the first element in the storage.
+        shape (tuple): shape of the view.
+        strides (tuple): strides of the view, a stride of 0 repeats the same elements.
+
+    Returns:
+        iterator: the elements of the view.
+    """
+    n, stride = shape[0], strides[0]
+    if n == 0:
+        return iter(())
+    if len(shape) == 1:
+        if stride == 0:
+            return repeat(storage[offset], n)
+        if stride > 0:
+            return iter(storage[offset:offset + n * stride:stride])
+        return map(storage.__getitem__, range(offset, offset + n * stride, stride))
+    
+    return chain.from_iterable(_iter_strided(storage, offset + i * stride, shape[1:], strides[1:]) 
+                               for i in range(n))
+
+
+def _check_types(values):
+    """
+    Checks that the values are of one valid type (int, float or bool), in bulk.
+
+    Args:
+        values (sequence): the values to check.
+
+    Returns:
+        type: the type of the values (None if there are no values).
+
+    Raises:
+        ValueError: If the values are not all of the same type, or the type is not valid.
+    """
+    types = set(map(type, values))
+    if not types <= {int, float, bool}:
+        raise ValueError("Array contains unvalid type of value")
+    if len(types) > 1:
+        raise ValueError("Values are not all of the same type")
+    return types.pop() if types else None
+
+
+def _matmul(a, b, m, p, n, block=_MATMUL_BLOCK):
+    """
+    Multiplies the row-major matrices a (m x p) and b (p x n), tile by tile.
+
+    b is transposed once, so both the rows of a and the columns of b are contiguous,
+    and every value of the product is one dot product done with sum and map (in C).
+    The rows and columns are blocked in tiles, so the tile of columns in use is reused 
+    for every row in the tile of rows while it is still in cache.
+
+    Args:
+        a (sequence): the values of the first matrix.
+        b (sequence): the values of the second matrix.
+        m, p, n (int): the dimensions of the matrices.
+        block (int): the size of the tiles.
+
+    Returns:
+        list: the values of the product (m x n), in row-major order.
+    """
+    rows = [a[i * p:(i + 1) * p] for i in range(m)]
+    columns = list(zip(*[b[k * n:(k + 1) * n] for k in range(p)])) if p else [()] * n
+    
+    result = [0] * (m * n)
+    for i0 in range(0, m, block):
+        for j0 in range(0, n, block):
+            column_tile = columns[j0:j0 + block]
+            for i in range(i0, min(i0 + block, m)):
+                row = rows[i]
+                result[i * n + j0:i * n + j0 + len(column_tile)] = [
+                    sum(map(operator.mul, row, column)) for column in column_tile]
+    return result
+
+
+def _pack(values, typecode):
+    """
+    Packs values into a typed, writable memoryview (8 bytes per int/float, 1 byte per bool).
+
+    The standard library module `array` is shadowed by this module, so the compact
+    storage is a bytearray viewed through `memoryview.cast` instead.
+
+    Args:
+        values (sequence): the values to pack.
+        typecode (str): struct typecode of the values, one of 'q', 'd' or '?'.
+
+    Returns:
+        memoryview: the packed values.
+
+    Raises:
+        ValueError: If the values does not fit in the typecode (e.g. too large ints).
+    """
+    buffer = bytearray(len(values) * struct.calcsize(typecode))
+    try:
+        struct.pack_into(str(len(values)) + typecode, buffer, 0, *values)
+    except struct.error as error:
+        raise ValueError("Values can not be stored compactly (" + str(error) + ").")
+    return memoryview(buffer).cast(typecode)
+
+
+def _nonzero(value):
+    """Returns True if a value is stored in sparse storage: it is not zero, or it is -0.0 (so the sign is kept)."""
+    return value != 0 or (type(value) == float and math.copysign(1.0, value) < 0)
+
+
+class _SparseStorage:
+    """
+    Flat storage of the nonzero values of an array: the sorted flat (row-major) indices 
+    and the values at them, i.e. the COO format of the flattened array. The CSR row 
+    pointers of a 2D array are found by bisecting the indices, see `row_pointers`.
+    
+    Indexing the storage gives the dense values, so every Array operation works on sparse 
+    arrays by reading the zeros too. The operations with a sparse path only read the nonzeros.
+    """
+
+    def __init__(self, size, indices, values, dtype):
+        """
+        Initialize the storage.
+        
+        Args:
+            size (int): The number of values, zeros included.
+            indices (tuple): The sorted flat indices of the nonzero values.
+            values (tuple): The nonzero values.
+            dtype (type): The type of the values (int, float or bool).
+        """
+        self.size = size
+        self.indices = indices
+        self.values = values
+        self.zero = dtype()
+    
+    
+    @classmethod
+    def from_pairs(cls, size, pairs, dtype):
+        """
+        Returns the storage of (index, value) pairs sorted by index, zeros (but not -0.0) are dropped.
+        
+        Args:
+            size (int): The number of values, zeros included.
+            pairs (iterable): The pairs.
+            dtype (type): The type of the values.
+        
+        Returns:
+            _SparseStorage: The storage.
+        """
+        pairs = [pair for pair in pairs if _nonzero(pair[1])]
+        return cls(size, tuple(index for index, _ in pairs), tuple(value for _, value in pairs), dtype)
+    
+    
+    @classmethod
+    def from_dense(cls, values, dtype):
+        """
+        Returns the storage of dense values.
+        
+        Args:
+            values (iterable): The values, in row-major order.
+            dtype (type): The type of the values.
+        
+        Returns:
+            _SparseStorage: The storage.
+        """
+        values = tuple(values)
+        indices = tuple(compress(range(len(values)), values if dtype != float else map(_nonzero, values)))
+        return cls(len(values), indices, tuple(map(values.__getitem__, indices)), dtype)
+    
+    
+    def __len__(self):
+        """Returns the number of values, zeros included."""
+        return self.size
+    
+    
+    def __iter__(self):
+        """Iterates over the dense values."""
+        values = [self.zero] * self.size
+        for index, value in zip(self.indices, self.values):
+            values[index] = value
+        return iter(values)
+    
+    
+    def __getitem__(self, item):
+        """
+        Returns the (dense) value at a flat index, or a tuple of the values in a slice.
+        
+        Args:
+            item (int, slice): The index or slice.
+        
+        Returns:
+            The value, or a tuple of values.
+        
+        Raises:
+            IndexError: If the index is out of range.
+        """
+        if type(item) == slice:
+            start, stop, step = item.indices(self.size)
+            if step < 0:
+                return tuple(map(self.__getitem__, range(start, stop, step)))
+            
+            values = [self.zero] * len(range(start, stop, step))
+            for position in range(bisect_left(self.indices, start), bisect_left(self.indices, stop)):
+                index = self.indices[position]
+                if (index - start) % step == 0:
+                    values[(index - start) // step] = self.values[position]
+            return tuple(values)
+        
+        if item < 0:
+            item += self.size
+        if not 0 <= item < self.size:
+            raise IndexError("Index " + str(item) + " is out of range.")
+        position = bisect_left(self.indices, item)
+        if position < len(self.indices) and self.indices[position] == item:
+            return self.values[position]
+        return self.zero
+    
+    
+    def row_pointers(self, rows, columns):
+        """
+        Returns the CSR row pointers for the storage of a (rows, columns) array.
+        
+        Args:
+            rows (int): The number of rows.
+            columns (int): The number of columns.
+        
+        Returns:
+            list: The nonzeros of row i are at positions row_pointers[i] to row_pointers[i + 1].
+        """
+        return [bisect_left(self.indices, row * columns) for row in range(rows + 1)]
+    
+    
+    def union(self, other):
+        """
+        Returns the union of the nonzero indices of two storages of the same size, 
+        with the values of each storage at them (zero where it has none).
+        
+        Args:
+            other (_SparseStorage): The other storage.
+        
+        Returns:
+            tuple: The indices (sorted), the values of this storage, and the values of other.
+        """
+        indices = sorted(set(self.indices).union(other.indices))
+        values = dict(zip(self.indices, self.values))
+        other_values = dict(zip(other.indices, other.values))
+        return (indices, list(map(values.get, indices, repeat(self.zero))), 
+                list(map(other_values.get, indices, repeat(other.zero))))
+
 
 class Array:
 
-    def __init__(self, shape, *values):
+    #The attributes of an array, no per-instance dict is needed
+    __slots__ = ("_shape", "_array", "_size", "_strides", "_offset", "_base")
+    
+    #Sets with vaild types of values 
+    _valid_types = frozenset({int, float, bool})
+    _valid_numerical_types = frozenset({int, float})
+
+    def __init__(self, shape, *values, compact=False):
         """
         
         Initialize an array of 1-dimensionality. Elements can only be of type:
@@ -15,324 +644,2910 @@ class Array:
         Args:
             shape (tuple): shape of the array as a tuple. A 1D array with n elements will have shape = (n,).
             *values: The values in the array. These should all be the same data type. Either numeric or boolean.
+            compact (bool): If True, the values are stored packed in a typed buffer 
+                            (typecode 'q', 'd' or '?') instead of a tuple of Python objects. 
+
+        Raises:
+            ValueError: If the values are not all of the same type.
+            ValueError: If the number of values does not fit with the shape.
+        """
+        #Check if number of items fits the given shape (works for nD arrays)
+        if len(shape) == 0:
+            raise ValueError("The shape must have at least one dimension.")
+        sum_of_items = math.prod(shape)
+        if sum_of_items != len(values):
+            raise ValueError("Number of values (" + str(len(values)) + 
+                             ") does not fit with the shape (" + str(shape) + ").")
+                  
+        # Check if the values are of valid type (all at once)
+        my_type = _check_types(values)
+        
+        # Optional: If not all values are of same type, all are converted to floats.
+        
+        if compact:
+            values = _pack(values, _TYPECODES[my_type] if my_type else "d")
+        
+        self._init(shape, values)
+    
+    
+    def _init(self, shape, values):
+        """
+        Sets the attributes of a new array, without checking the values.
+        
+        Args:
+            shape (tuple): shape of the array.
+            values (tuple, memoryview): the values in the array, in row-major order.
+        
+        """
+        #Define the shape and the array as a flat array
+        self._shape = shape
+        self._array = values
+        self._size = len(values)
+        
+        #Strides and offset into the flat array, lets indexing go straight to an element
+        self._strides = _contiguous_strides(shape)
+        self._offset = 0
+        
+        #The owner of the storage, if it is not this array: the array this array is a view 
+        #of, or the buffer or mapped file given to frombuffer or open_memmap
+        self._base = None
+    
+    
+    @classmethod
+    def _from_values(cls, shape, values):
+        """
+        Returns a new array of values which are known to be valid, without checking them.
+        
+        Args:
+            shape (tuple): shape of the array.
+            values (tuple, memoryview): the values in the array, in row-major order.
+        
+        Returns:
+            Array: the new array.
+        
+        """
+        new_array = cls.__new__(cls)
+        new_array._init(shape, values)
+        return new_array
+    
+    
+    @classmethod
+    def zeros(cls, shape, dtype=float, compact=False):
+        """Returns a new array filled with zeros.
+
+        Args:
+            shape (tuple): shape of the array.
+            dtype (type): type of the values, int, float or bool (default float).
+            compact (bool): If True, the values are stored in a typed buffer.
+
+        Returns:
+            Array: The array of zeros.
+
+        """
+        size = math.prod(shape)
+        if compact:
+            #A new buffer is already filled with zeros
+            typecode = _TYPECODES[dtype]
+            return cls._from_values(shape, memoryview(bytearray(size * struct.calcsize(typecode))).cast(typecode))
+        return cls.full(shape, dtype(0))
+    
+    
+    @classmethod
+    def ones(cls, shape, dtype=float, compact=False):
+        """Returns a new array filled with ones.
+
+        Args:
+            shape (tuple): shape of the array.
+            dtype (type): type of the values, int, float or bool (default float).
+            compact (bool): If True, the values are stored in a typed buffer.
+
+        Returns:
+            Array: The array of ones.
+
+        """
+        return cls.full(shape, dtype(1), compact)
+    
+    
+    @classmethod
+    def full(cls, shape, value, compact=False):
+        """Returns a new array with every value set to value.
+
+        Args:
+            shape (tuple): shape of the array.
+            value (int, float, bool): the value.
+            compact (bool): If True, the values are stored in a typed buffer.
+
+        Returns:
+            Array: The new array.
+
+        Raises:
+            ValueError: If value is not of a valid type.
+
+        """
+        _check_types((value,))
+        values = (value,) * math.prod(shape)
+        if compact:
+            values = _pack(values, _TYPECODES[type(value)])
+        return cls._from_values(shape, values)
+    
+    
+    @classmethod
+    def arange(cls, start, stop=None, step=1, compact=False):
+        """Returns a new 1D array with evenly spaced values, like range (but also for floats).
+
+        Args:
+            start (int, float): the first value, or the stop value if stop is not given (then start is 0).
+            stop (int, float): optional, the values are smaller than stop (larger for a negative step).
+            step (int, float): optional, the spacing between the values (default 1).
+            compact (bool): If True, the values are stored in a typed buffer.
+
+        Returns:
+            Array: The new array.
+
+        Raises:
+            ValueError: If the arguments are not numbers, or step is 0.
+
+        """
+        if stop is None:
+            start, stop = 0, start
+        if not {type(start), type(stop), type(step)} <= {int, float}:
+            raise ValueError("Array contains unvalid type of value")
+        if step == 0:
+            raise ValueError("Step can not be 0")
+        
+        if {type(start), type(stop), type(step)} == {int}:
+            values = tuple(range(start, stop, step))
+        else:
+            n = max(0, math.ceil((stop - start) / step))
+            values = tuple(float(start + i * step) for i in range(n))
+        
+        if compact:
+            values = _pack(values, _TYPECODES[type(values[0])] if values else "d")
+        return cls._from_values((len(values),), values)
+    
+    
+    @classmethod
+    def from_iterable(cls, iterable, shape=None, compact=False):
+        """Returns a new array with the values from an iterable. The types are checked in bulk.
 
+        Args:
+            iterable (iterable): the values in row-major order.
+            shape (tuple): optional, shape of the array (default is 1D).
+            compact (bool): If True, the values are stored in a typed buffer.
+
+        Returns:
+            Array: The new array.
+
+        Raises:
+            ValueError: If the values are not all of the same valid type.
+            ValueError: If the number of values does not fit with the shape.
+
+        """
+        values = tuple(iterable)
+        if shape is None:
+            shape = (len(values),)
+        return cls(shape, *values, compact=compact)
+    
+    
+    @classmethod
+    def frombuffer(cls, buffer, shape=None, dtype=None):
+        """Returns a compact array using an existing buffer as storage. No values are copied or checked.
+
+        Args:
+            buffer (bytes-like): any object supporting the buffer protocol, e.g. bytes, bytearray, 
+                                 memoryview or a numpy array. Writes to the array changes the buffer
+                                 (if it is writable). Writes which does not fit in the buffer 
+                                 (e.g. floats to ints) raises ValueError.
+            shape (tuple): optional, shape of the array (default is 1D).
+            dtype (type): optional, type of the values, int, float or bool. Needed if the buffer 
+                          is raw bytes (format 'B', 'b' or 'c'), which are then read as this type. 
+                          A typed buffer must hold values of this type.
+
+        Returns:
+            Array: The new array.
+
+        Raises:
+            ValueError: If the type of the buffer is not known or valid, or is not dtype.
+            ValueError: If the buffer is not C-contiguous.
+            ValueError: If the number of values does not fit with the shape.
+
+        """
+        storage = memoryview(buffer)
+        
+        #Native and standard formats, e.g. 'l' for numpy int64 (8 bytes) on Linux
+        format = storage.format.lstrip("@=" + ("<" if sys.byteorder == "little" else ">!"))
+        if format in _BYTE_FORMATS:
+            if dtype is None:
+                raise ValueError("The buffer is raw bytes (format " + storage.format + "), dtype must be given.")
+            typecode = _TYPECODES[dtype]
+        else:
+            buffer_type = _FORMAT_TYPES.get(format)
+            if buffer_type is None or storage.itemsize != struct.calcsize(_TYPECODES[buffer_type]):
+                raise ValueError("Unknown type of the values in the buffer (format " + storage.format + 
+                                 ", itemsize " + str(storage.itemsize) + ").")
+            if dtype is not None and dtype != buffer_type:
+                raise ValueError("The values in the buffer (format " + storage.format + 
+                                 ") are not of type " + dtype.__name__ + ".")
+            typecode = _TYPECODES[buffer_type]
+        
+        if not storage.c_contiguous:
+            raise ValueError("The buffer must be C-contiguous.")
+        
+        #The size is checked before the cast, which gives a TypeError for a partial value
+        itemsize = struct.calcsize(typecode)
+        if shape is None:
+            shape = (storage.nbytes // itemsize,)
+        shape = tuple(shape)
+        if math.prod(shape) * itemsize != storage.nbytes:
+            raise ValueError("The size of the buffer (" + str(storage.nbytes) + " bytes) does not fit with the shape (" + 
+                             str(shape) + ") of values of " + str(itemsize) + " bytes.")
+        
+        if storage.format != typecode or storage.ndim != 1:
+            storage = storage.cast("B").cast(typecode)
+        
+        array = cls._from_values(shape, storage)
+        array._base = buffer
+        return array
+            
+        
+    @classmethod
+    def from_coo(cls, shape, coords, values):
+        """
+        Makes a sparse array from the coordinates (COO format) and values of its nonzeros.
+
+        Only the nonzero values are stored, see `to_sparse`. Values at the same 
+        coordinates are summed (or combined with `or` for booleans).
+
+        Args:
+            shape (tuple): The shape of the array.
+            coords (sequence): The index (a tuple with an int for every dimension) of every value.
+            values (sequence): The values, of one type.
+
+        Returns:
+            Array: The sparse array.
+
+        Raises:
+            ValueError: If the number of coordinates and values does not match, or the values are not valid.
+            IndexError: If a coordinate is out of range.
+
+        """
+        shape, coords, values = tuple(shape), tuple(coords), tuple(values)
+        if len(coords) != len(values):
+            raise ValueError("Number of coordinates (" + str(len(coords)) + 
+                             ") does not match the number of values (" + str(len(values)) + ").")
+        dtype = _check_types(values) or float
+        combine = operator.or_ if dtype == bool else operator.add
+        
+        strides = _contiguous_strides(shape)
+        entries = {}
+        for index, value in zip(coords, values):
+            if len(index) != len(shape) or not all(0 <= i < n for i, n in zip(index, shape)):
+                raise IndexError("Index " + str(index) + " is out of range.")
+            flat_index = sum(map(operator.mul, index, strides))
+            entries[flat_index] = combine(entries[flat_index], value) if flat_index in entries else value
+        
+        return cls._from_values(shape, _SparseStorage.from_pairs(math.prod(shape), sorted(entries.items()), dtype))
+    
+    
+    def __str__(self):
+                        
+        """Returns a nicely printable string representation of the array.
+
+        The array is printed as nested tuples. Arrays larger than the threshold 
+        of set_printoptions are summarised, e.g. (0, 1, 2, ..., 97, 98, 99), 
+        and then only the printed values are read.
+
+        Returns:
+            str: A string representation of the array.
+
+        """ 
+        summarise = self._size > _print_options["threshold"]
+        return self._format(self._offset, 0, summarise)
+    
+    
+    def __getitem__(self, item):
+        """
+        Returns value of item in array.
+        
+        Indexing with as many indices as the array has dimensions returns a value. 
+        Indexing with fewer indices, or with slices (e.g. a[1:10:2, :]), returns a view, 
+        which shares the flat storage with this array (no values are copied).
+        
+        Indexing with a boolean Array of the same shape (a mask, e.g. from is_equal or <) 
+        returns a new 1D array with the values where the mask is True.
+        
+         Args:
+            item (int, slice, tuple, Array): Index or slice (or one per dimension) of the values to return,
+                                             or a boolean mask.
+         Returns: 
+            value: Value of the given item, or an Array view if fewer indices than dimensions, 
+                   or slices, were given. An Array with the selected values for a mask.
+        
+         Raises:
+            IndexError: If an index is out of range, or there are too many indices.
+            IndexError: If a mask is not boolean or does not match the shape of the array.
+            
+        """ 
+        if type(item) == Array:
+            return self._masked(item)
+        
+        if not isinstance(item, tuple):
+            item = (item,)
+        
+        if len(item) > len(self._shape):
+            raise IndexError("Too many indices (" + str(len(item)) + 
+                             ") for array with shape " + str(self._shape) + ".")
+        
+        #Walk the strides to find the offset into the flat array, 
+        #slices keeps their dimension with a new size and stride
+        offset = self._offset
+        shape = []
+        strides = []
+        for index, n, stride in zip(item, self._shape, self._strides):
+            if isinstance(index, slice):
+                start, stop, step = index.indices(n)
+                offset += start * stride
+                shape.append(len(range(start, stop, step)))
+                strides.append(stride * step)
+                continue
+            
+            index = operator.index(index)
+            if index < 0:
+                index += n
+            if not 0 <= index < n:
+                raise IndexError("Index " + str(index) + " is out of range for dimension of size " + str(n) + ".")
+            offset += index * stride
+        
+        if len(item) == len(self._shape) and not shape:
+            return self._array[offset]
+        
+        return self._view(tuple(shape) + self._shape[len(item):], tuple(strides) + self._strides[len(item):], offset)
+    
+    
+    def __add__(self, other, out=None):
+        """Element-wise adds Array with another Array or number.
+
+        If the method does not support the operation with the supplied arguments
+        (specific data type or shape), it should return NotImplemented.
+        Arrays of different shapes are broadcast against each other, see `_elementwise`.
+
+        Args:
+            other (Array, float, int): The array or number to add element-wise to this array.
+            out (Array): optional, the array to write the result to (must have the shape of the result).
+
+        Returns:
+            Array: the sum as a new array (or `out`).
+
+        """
+        return self._elementwise(other, operator.add, out)
+    
+    def __radd__(self, other):
+        """Element-wise adds Array with another Array or number.
+
+        If the method does not support the operation with the supplied arguments
+        (specific data type or shape), it should return NotImplemented.
+
+        Args:
+            other (Array, float, int): The array or number to add element-wise to this array.
+
+        Returns:
+            Array: the sum as a new array.
+
+        """                
+        return self.__add__(other)
+    
+    
+    def __sub__(self, other, out=None):
+        """Element-wise subtracts an Array or number from this Array.
+
+        If the method does not support the operation with the supplied arguments
+        (specific data type or shape), it should return NotImplemented.
+        Arrays of different shapes are broadcast against each other, see `_elementwise`.
+
+        Args:
+            other (Array, float, int): The array or number to subtract element-wise from this array.
+            out (Array): optional, the array to write the result to (must have the shape of the result).
+
+        Returns:
+            Array: the difference as a new array (or `out`).
+
+        """
+        return self._elementwise(other, operator.sub, out)
+    
+    
+    def __rsub__(self, other):
+        """Element-wise subtracts this Array from a number or Array.
+
+        If the method does not support the operation with the supplied arguments
+        (specific data type or shape), it should return NotImplemented.
+
+        Args:
+            other (Array, float, int): The array or number being subtracted from.
+
+        Returns:
+            Array: the difference as a new array.
+
+        """
+        return self.__sub__(other)
+    
+    
+    def __mul__(self, other, out=None):
+        """Element-wise multiplies this Array with a number or array.
+
+        If the method does not support the operation with the supplied arguments
+        (specific data type or shape), it should return NotImplemented.
+        Arrays of different shapes are broadcast against each other, see `_elementwise`.
+
+        Args:
+            other (Array, float, int): The array or number to multiply element-wise to this array.
+            out (Array): optional, the array to write the result to (must have the shape of the result).
+
+        Returns:
+            Array: a new array (or `out`) with every element multiplied with `other`.
+
+        """
+        return self._elementwise(other, operator.mul, out)
+    
+    
+    def __rmul__(self, other):
+        """Element-wise multiplies this Array with a number or array.
+
+        If the method does not support the operation with the supplied arguments
+        (specific data type or shape), it should return NotImplemented.
+
+        Args:
+            other (Array, float, int): The array or number to multiply element-wise to this array.
+
+        Returns:
+            Array: a new array with every element multiplied with `other`.
+
+        """
+ 
+        # Hint: this solution/logic applies for all r-methods
+        return self.__mul__(other)
+    
+    
+    def __iadd__(self, other):
+        """In-place element-wise adds an Array or number to this Array, see `_elementwise`.
+
+        Args:
+            other (Array, float, int): The array or number to add element-wise to this array.
+
+        Returns:
+            Array: this array.
+
+        """
+        return self._elementwise(other, operator.add, self)
+    
+    
+    def __isub__(self, other):
+        """In-place element-wise subtracts an Array or number from this Array, see `_elementwise`.
+
+        Args:
+            other (Array, float, int): The array or number to subtract element-wise from this array.
+
+        Returns:
+            Array: this array.
+
+        """
+        return self._elementwise(other, operator.sub, self)
+    
+    
+    def __imul__(self, other):
+        """In-place element-wise multiplies this Array with an Array or number, see `_elementwise`.
+
+        Args:
+            other (Array, float, int): The array or number to multiply element-wise to this array.
+
+        Returns:
+            Array: this array.
+
+        """
+        return self._elementwise(other, operator.mul, self)
+    
+    
+    def __eq__(self, other):
+        """Compares an Array with another Array.
+
+        If the two array shapes do not match, it should return False.
+        If `other` is an unexpected type, return False.
+
+        Args:
+            other (Array): The array to compare with this array.
+
+        Returns:
+            bool: True if the two arrays are equal (identical). False otherwise.
+
+        """
+        
+        if type(other) == Array and self._sparse() is not None and other._sparse() is not None:
+            return (self._shape == other._shape and self._array.indices == other._array.indices and 
+                    self._array.values == other._array.values)
+        
+        if (type(other) == Array) and (self._shape == other._shape) and (tuple(self._flat()) == tuple(other._flat())): 
+            return True 
+        else:
+            return False 
+
+        
+
+    def __lt__(self, other):
+        """Element-wise compares if this Array is less than another Array or number.
+
+        Args:
+            other (Array, float, int): The array (broadcast as in `_elementwise`) or number to compare with.
+
+        Returns:
+            Array: An array of booleans, True where this array is less than `other`.
+
+        """
+        return self._elementwise(other, operator.lt)
+    
+    
+    def __le__(self, other):
+        """Element-wise compares if this Array is less than or equal to another Array or number.
+
+        Args:
+            other (Array, float, int): The array (broadcast as in `_elementwise`) or number to compare with.
+
+        Returns:
+            Array: An array of booleans, True where this array is less than or equal to `other`.
+
+        """
+        return self._elementwise(other, operator.le)
+    
+    
+    def __gt__(self, other):
+        """Element-wise compares if this Array is greater than another Array or number.
+
+        Args:
+            other (Array, float, int): The array (broadcast as in `_elementwise`) or number to compare with.
+
+        Returns:
+            Array: An array of booleans, True where this array is greater than `other`.
+
+        """
+        return self._elementwise(other, operator.gt)
+    
+    
+    def __ge__(self, other):
+        """Element-wise compares if this Array is greater than or equal to another Array or number.
+
+        Args:
+            other (Array, float, int): The array (broadcast as in `_elementwise`) or number to compare with.
+
+        Returns:
+            Array: An array of booleans, True where this array is greater than or equal to `other`.
+
+        """
+        return self._elementwise(other, operator.ge)
+    
+    
+    @staticmethod
+    def where(mask, x, y):
+        """Returns an array with the values of x where mask is True, and the values of y elsewhere.
+
+        mask, x and y are broadcast against each other (see `_elementwise`), and read in one pass.
+        If one of x and y is int and the other float, the result is float.
+
+        Args:
+            mask (Array): An array of booleans.
+            x (Array, float, int, bool): The values where mask is True.
+            y (Array, float, int, bool): The values where mask is False.
+
+        Returns:
+            Array: The new array.
+
+        Raises:
+            TypeError: If mask is not a boolean array, or x or y are not arrays or valid values.
+            ValueError: If the shapes can not be broadcast together, or x and y can not be of one type.
+
+        """
+        if type(mask) != Array or mask._typecode() != "?" and mask._size:
+            raise TypeError("The mask must be an array of booleans")
+        
+        operands = (mask, x, y)
+        types = []
+        shape = mask._shape
+        for operand in operands[1:]:
+            if type(operand) == Array:
+                types.append(type(operand._array[operand._offset]) if operand._size else float)
+                shape = _broadcast_shapes(shape, operand._shape)
+            elif type(operand) in {int, float, bool}:
+                types.append(type(operand))
+            else:
+                raise TypeError("Type is not supported")
+        
+        if types[0] != types[1] and set(types) != {int, float}:
+            raise ValueError("Values are not all of the same type")
+        
+        size = math.prod(shape)
+        iterables = []
+        for operand in operands:
+            if type(operand) != Array:
+                iterables.append(repeat(operand, size))
+            elif operand._shape == shape:
+                iterables.append(operand._flat())
+            else:
+                iterables.append(operand._broadcast(shape))
+        
+        if types[0] == types[1]:
+            new_values = tuple(map(lambda m, a, b: a if m else b, *iterables))
+        else:
+            new_values = tuple(map(lambda m, a, b: float(a if m else b), *iterables))
+        
+        if new_values and any(type(operand) == Array and operand.is_compact() for operand in operands):
+            new_values = _pack(new_values, _TYPECODES[type(new_values[0])])
+        return Array._from_values(shape, new_values)
+    
+    
+    def is_equal(self, other):
+        """Compares an Array element-wise with another Array or number.
+
+        If `other` is an array and the two array shapes do not match, this method should raise ValueError.
+        If `other` is not an array or a number, it should return TypeError.
+
+        Args:
+            other (Array, float, int): The array or number to compare with this array.
+
+        Returns:
+            Array: An array of booleans with True where the two arrays match and False where they do not.
+                   Or if `other` is a number, it returns True where the array is equal to the number and False
+                   where it is not.
+
+        Raises:
+            ValueError: if the shape of self and other are not equal.
+
+        """
+        if not (type(other) in self._valid_numerical_types or type(other) == Array):
+            raise TypeError("Type is not supported")
+            
+        if type(other) == Array and self._shape != other._shape:
+            raise ValueError("Shapes does not match, ", self._shape, other._shape, ".")
+        
+        return self._elementwise(other, operator.eq)
+    
+
+    def min_element(self):
+        """Returns the smallest value of the array.
+
+        Only needs to work for type int and float (not boolean).
+
+        Returns:
+            float: The value of the smallest element in the array.
+
+        """
+        if self._shape[0] == 0:
+            raise ValueError("() is an empty Array")
+        elif not (type(self._flat()[0]) in self._valid_numerical_types):
+            raise ValueError("Array does not contain numerical values")
+        else:
+            return float(min(self._flat()))
+
+    
+        
+    def sum(self, axis=None):
+        """Returns the sum of the values of the array, or the sums along an axis.
+
+        Args:
+            axis (int): optional, the axis to sum over. By default all values are summed.
+
+        Returns:
+            int, float or Array: The sum, or an array of sums (without the axis) if axis is given.
+
+        """
+        return self._reduce(axis, sum, "sum")
+    
+    
+    def mean(self, axis=None):
+        """Returns the mean of the values of the array, or the means along an axis.
+
+        Args:
+            axis (int): optional, the axis to average over. By default all values are averaged.
+
+        Returns:
+            float or Array: The mean, or an array of means (without the axis) if axis is given.
+
+        Raises:
+            ValueError: If the array (or the axis) is empty.
+
+        """
+        n = self._size if axis is None else self._shape[self._normalize_axis(axis)]
+        if n == 0:
+            raise ValueError("() is an empty Array")
+        if axis is None:
+            return self.sum() / n
+        return self._reduce(axis, lambda values: sum(values) / n, "mean")
+    
+    
+    def min(self, axis=None):
+        """Returns the smallest value of the array, or the smallest values along an axis.
+
+        Args:
+            axis (int): optional, the axis to find the smallest values along.
+
+        Returns:
+            value or Array: The smallest value, or an array of them (without the axis) if axis is given.
+
+        Raises:
+            ValueError: If the array (or the axis) is empty.
+
+        """
+        return self._reduce(axis, min, "min")
+    
+    
+    def max(self, axis=None):
+        """Returns the largest value of the array, or the largest values along an axis.
+
+        Args:
+            axis (int): optional, the axis to find the largest values along.
+
+        Returns:
+            value or Array: The largest value, or an array of them (without the axis) if axis is given.
+
+        Raises:
+            ValueError: If the array (or the axis) is empty.
+
+        """
+        return self._reduce(axis, max, "max")
+    
+    
+    def argmin(self, axis=None):
+        """Returns the index of the (first) smallest value of the array, or the indices along an axis.
+
+        Args:
+            axis (int): optional, the axis to find the smallest values along.
+
+        Returns:
+            int or Array: The index in the flattened array, or an array of indices 
+                          along the axis (without the axis) if axis is given.
+
+        Raises:
+            ValueError: If the array (or the axis) is empty.
+
+        """
+        return self._reduce(axis, lambda values: min(range(len(values)), key=values.__getitem__), "argmin")
+    
+    
+    def argmax(self, axis=None):
+        """Returns the index of the (first) largest value of the array, or the indices along an axis.
+
+        Args:
+            axis (int): optional, the axis to find the largest values along.
+
+        Returns:
+            int or Array: The index in the flattened array, or an array of indices 
+                          along the axis (without the axis) if axis is given.
+
+        Raises:
+            ValueError: If the array (or the axis) is empty.
+
+        """
+        return self._reduce(axis, lambda values: max(range(len(values)), key=values.__getitem__), "argmax")
+    
+    
+    def sort(self, axis=-1):
+        """Sorts the values of the array in place along an axis (the storage is reused when possible).
+
+        Args:
+            axis (int): optional, the axis to sort along, by default the last. 
+                        None sorts all the values (in row-major order).
+
+        Raises:
+            ValueError: If the array is a view which can not be written through, see `_assign`.
+
+        """
+        self._assign(self._along_axis(axis, sorted))
+    
+    
+    def sorted(self, axis=-1):
+        """Returns a sorted copy of the array.
+
+        Args:
+            axis (int): optional, the axis to sort along, by default the last. 
+                        None sorts all the values, into a 1D array.
+
+        Returns:
+            Array: The sorted array.
+
+        """
+        return self._from_lanes(axis, sorted)
+    
+    
+    def argsort(self, axis=-1):
+        """Returns the indices which sort the array along an axis (sorting is stable).
+
+        Args:
+            axis (int): optional, the axis to sort along, by default the last. 
+                        None sorts all the values, and returns indices into the flat array.
+
+        Returns:
+            Array: The indices (of type int).
+
+        """
+        return self._from_lanes(axis, lambda lane: sorted(range(len(lane)), key=lane.__getitem__))
+    
+    
+    def cumsum(self, axis=None):
+        """Returns the cumulative sums of the values along an axis.
+
+        Booleans are summed as ints.
+
+        Args:
+            axis (int): optional, the axis to sum along. By default the sums are over all 
+                        the values (in row-major order), as a 1D array.
+
+        Returns:
+            Array: The cumulative sums.
+
+        """
+        if self._typecode() == "?":
+            return self._from_lanes(axis, lambda lane: accumulate(map(int, lane)))
+        return self._from_lanes(axis, accumulate)
+    
+    
+    def cumprod(self, axis=None):
+        """Returns the cumulative products of the values along an axis.
+
+        Booleans are multiplied as ints.
+
+        Args:
+            axis (int): optional, the axis to multiply along. By default the products are over all 
+                        the values (in row-major order), as a 1D array.
+
+        Returns:
+            Array: The cumulative products.
+
+        """
+        if self._typecode() == "?":
+            return self._from_lanes(axis, lambda lane: accumulate(map(int, lane), operator.mul))
+        return self._from_lanes(axis, lambda lane: accumulate(lane, operator.mul))
+    
+    
+    def unique(self, return_counts=False):
+        """Returns the sorted unique values of the array.
+
+        Args:
+            return_counts (bool): optional, if True the number of times each value occurs is also returned.
+
+        Returns:
+            Array or tuple: A 1D array of the unique values, and a 1D array of the counts (ints) if return_counts.
+
+        """
+        if return_counts:
+            counts = Counter(self._flat())
+            values = tuple(sorted(counts))
+            counts = tuple(map(counts.__getitem__, values))
+        else:
+            values = tuple(sorted(set(self._flat())))
+        
+        unique = Array._from_values((len(values),), self._new_storage(values))
+        if return_counts:
+            return unique, Array._from_values((len(counts),), self._new_storage(counts))
+        return unique
+    
+    
+    def _from_lanes(self, axis, function):
+        """
+        Returns a new array with the results of function on the lanes along axis, see `_along_axis`.
+        
+        Args:
+            axis (int): The axis, or None for all the values (the result is 1D).
+            function (callable): Function of a list of values, returning as many values.
+        
+        Returns:
+            Array: The new array.
+        
+        """
+        shape = (self._size,) if axis is None else self._shape
+        return Array._from_values(shape, self._new_storage(tuple(self._along_axis(axis, function))))
+    
+    
+    def _along_axis(self, axis, function):
+        """
+        Applies function to every lane (1D line of values) along an axis, reading the values straight from the storage.
+        
+        Args:
+            axis (int): The axis, or None for one lane of all the values (in row-major order).
+            function (callable): Function of a list of values, returning as many values (an iterable).
+        
+        Returns:
+            list: The results, in row-major order of the array.
+        
+        Raises:
+            ValueError: If the array does not have the axis.
+        
+        """
+        if axis is None:
+            return list(function(list(self._flat())))
+        
+        axis = self._normalize_axis(axis)
+        n, stride = self._shape[axis], self._strides[axis]
+        result = [None] * self._size
+        if self._size == 0:
+            return result
+        
+        #The first value of every lane, in the storage and in the (contiguous) result
+        contiguous = _contiguous_strides(self._shape)
+        outer_shape = self._shape[:axis] + self._shape[axis + 1:]
+        if outer_shape:
+            starts = _iter_strided(range(len(self._array)), self._offset, outer_shape, 
+                                   self._strides[:axis] + self._strides[axis + 1:])
+            result_starts = _iter_strided(range(self._size), 0, outer_shape, contiguous[:axis] + contiguous[axis + 1:])
+        else:
+            starts, result_starts = (self._offset,), (0,)
+        
+        step = contiguous[axis]
+        for start, result_start in zip(starts, result_starts):
+            lane = list(_iter_strided(self._array, start, (n,), (stride,)))
+            result[result_start:result_start + n * step:step] = function(lane)
+        return result
+    
+    
+    def _reduce(self, axis, reducer, name=None):
+        """
+        Reduces the values of the array, or the values along an axis, with reducer. 
+        
+        The storage is walked once. For an axis, the values are read through the strides 
+        with the axis moved last, so the values of every result are read one after another.
+        
+        Args:
+            axis (int): The axis to reduce, or None to reduce all values.
+            reducer (callable): Function reducing a sequence of values to one value, e.g. sum.
+            name (str): optional, name of the numpy function doing the same reduction, 
+                        used for large arrays (see set_numpy).
+        
+        Returns:
+            value or Array: The reduced value, or the array of reduced values if axis is given.
+        
+        Raises:
+            ValueError: If the values to reduce are empty (and the reducer needs values).
+        
+        """
+        if self._sparse() is not None:
+            result = self._sparse_reduce(axis, reducer)
+            if result is not None:
+                return result
+        
+        if name is not None and self._with_numpy():
+            np = _numpy()
+            if axis is not None:
+                axis = self._normalize_axis(axis)
+            try:
+                values = np.asarray(self)
+            except ValueError:
+                values = None
+            
+            #Sums of ints must not overflow 64 bits, and means (summed as floats) must be exact. 
+            #numpy sums floats pairwise, which rounds differently from python, so they are not delegated
+            n = self._size if axis is None else self._shape[axis]
+            limit = {"sum": 2**63, "mean": 2**53}.get(name)
+            kind = values.dtype.kind if values is not None else None
+            if kind is not None and (limit is None or kind == "b" or (kind == "i" and n * _abs_max(values) < limit)):
+                return self._numpy_result(getattr(np, name)(values, axis=axis))
+        
+        if axis is None:
+            if self._size == 0 and reducer is not sum:
+                raise ValueError("() is an empty Array")
+            if reducer in (sum, min, max) and self._in_parallel():
+                result = self._parallel_reduce(reducer)
+                if result is not None:
+                    return result
+            return reducer(self._flat())
+        
+        axis = self._normalize_axis(axis)
+        n = self._shape[axis]
+        if n == 0 and reducer is not sum:
+            raise ValueError("Can not reduce an empty axis")
+        
+        shape = self._shape[:axis] + self._shape[axis + 1:]
+        if len(shape) == 0:
+            return reducer(self._flat())
+        
+        strides = self._strides[:axis] + self._strides[axis + 1:]
+        values = _iter_strided(self._array, self._offset, shape + (n,), strides + (self._strides[axis],))
+        
+        #Groups the values n by n, each group gives one reduced value
+        new_values = tuple(map(reducer, zip(*[values] * n))) if n else (0,) * math.prod(shape)
+        
+        return Array._from_values(shape, self._new_storage(new_values))
+    
+    
+    def _normalize_axis(self, axis):
+        """
+        Returns axis as a non-negative axis of the array.
+        
+        Args:
+            axis (int): The axis, negative axes counts from the last.
+        
+        Returns:
+            int: The axis.
+        
+        Raises:
+            ValueError: If the array does not have the axis.
+        
+        """
+        if not -len(self._shape) <= axis < len(self._shape):
+            raise ValueError("Axis " + str(axis) + " is out of bounds for array with shape " + 
+                             str(self._shape) + ".")
+        return axis % len(self._shape)
+    
+    
+    def dot(self, other):
+        """Returns the dot product of two 1D arrays, or the matrix product of 1D or 2D arrays.
+
+        A 1D array is treated as a row vector on the left and as a column vector on the right,
+        as in numpy. If numpy is installed and both arrays are compact, the product is computed
+        by numpy on the buffers of the arrays (without copying them), unless a product of ints 
+        could overflow 64 bits. numpy sums the products of floats in another order than python, 
+        so float results can differ in the last bits from those of arrays stored as tuples.
+
+        Args:
+            other (Array): The array to multiply with (on the right).
+
+        Returns:
+            int, float or Array: The dot product of two 1D arrays, otherwise the product as a new array.
+
+        Raises:
+            TypeError: If other is not an array.
+            ValueError: If the arrays are not numerical 1D or 2D arrays, or the dimensions does not match.
+
+        """
+        if type(other) != Array:
+            raise TypeError("Type is not supported")
+        if len(self._shape) > 2 or len(other._shape) > 2:
+            raise ValueError("Only 1D and 2D arrays can be multiplied")
+        if self._typecode() == "?" or other._typecode() == "?":
+            raise ValueError("Array does not contain numerical values")
+        
+        m, p = self._shape if len(self._shape) == 2 else (1, self._shape[0])
+        p_other, n = other._shape if len(other._shape) == 2 else (other._shape[0], 1)
+        if p != p_other:
+            raise ValueError("Shapes does not match, " + str(self._shape) + " and " + 
+                             str(other._shape) + " can not be multiplied.")
+        
+        #Shape of the result, 1D operands drops their dimension
+        shape = self._shape[:-1] + other._shape[1:]
+        
+        if len(shape) == 0:
+            if self._sparse() is not None:
+                flat = other._flat()
+                return sum(map(operator.mul, self._array.values, map(flat.__getitem__, self._array.indices)))
+            return sum(map(operator.mul, self._flat(), other._flat()))
+        
+        if self._sparse() is not None:
+            return Array._from_values(shape, tuple(self._sparse_dot(other, m, p, n)))
+        
+        np = _numpy()
+        if np is not None and self.is_compact() and other.is_compact():
+            a, b = np.asarray(self.data), np.asarray(other.data)
+            #Products of ints must not overflow 64 bits in numpy, see _numpy_is_exact
+            if a.dtype.kind != "i" or b.dtype.kind != "i" or p * _abs_max(a) * _abs_max(b) < 2**63:
+                return Array._from_numpy(a @ b)
+        
+        new_values = tuple(_matmul(self._flat(), other._flat(), m, p, n))
+        return Array._from_values(shape, self._new_storage(new_values, other))
+    
+    
+    def __matmul__(self, other):
+        """Matrix multiplies this Array with another Array, see `dot`.
+
+        Args:
+            other (Array): The array to multiply with (on the right).
+
+        Returns:
+            int, float or Array: The product, or NotImplemented if other is not an array.
+
+        """
+        if type(other) != Array:
+            return NotImplemented
+        return self.dot(other)
+    
+    
+    def lazy(self):
+        """Returns a lazy version of the array, for chained element-wise arithmetic.
+
+        Arithmetic (+, -, *) on the lazy array builds an expression instead of computing 
+        the values. The expression is evaluated in one fused pass, allocating only the 
+        result, when it is indexed, printed or compared (see LazyArray).
+
+        Returns:
+            LazyArray: The array as a lazy expression.
+
+        """
+        return LazyArray(("leaf", self), self._shape)
+    
+    
+    def chunked(self, chunk_size, directory=None):
+        """Returns the array split into blocks of chunk_size rows, for out-of-core computing.
+
+        Operations on the chunked array build a task graph which is run block by block, 
+        so only a few blocks are in memory at the same time (see ChunkedArray).
+
+        Args:
+            chunk_size (int): The number of rows (along the first axis) in a block.
+            directory (str): optional, a directory to save the blocks in. By default the blocks are kept in memory.
+
+        Returns:
+            ChunkedArray: The chunked array.
+
+        """
+        return ChunkedArray.from_array(self, chunk_size, directory)
+    
+    
+    def _elementwise(self, other, function, out=None):
+        """
+        Applies function element-wise to the values of this array and a number or Array.
+        
+        Arrays of different shapes are broadcast against each other as in numpy: 
+        the shapes are compared from the last dimension, and dimensions of size 1 
+        (or missing leading dimensions) are stretched to the size of the other array.
+        A broadcast operand is read through its strides, it is never expanded to the full size.
+        
+        Args:
+            other (Array, float, int): The other operand.
+            function (callable): Function of two values, e.g. operator.add.
+            out (Array): optional, an array to write the results to instead of a new array, see `_assign`.
+        
+        Returns:
+            Array: A new array (or `out`) with the results, or NotImplemented if other is not supported.
+        
+        Raises:
+            ValueError: If the shapes can not be broadcast together, or the result does not fit in `out`.
+        
+        """
+        if out is None and self._sparse() is not None:
+            result = self._sparse_elementwise(other, function)
+            if result is not None:
+                return result
+        if (out is None and function is operator.mul and type(other) == Array and 
+                other._sparse() is not None and other._shape == self._shape):
+            result = other._sparse_elementwise(self, function)
+            if result is not None:
+                return result
+        
+        if function in _NUMPY_UFUNCS and self._with_numpy(other):
+            result = self._numpy_elementwise(other, function, out)
+            if result is not None:
+                return result
+        
+        if out is None and self._in_parallel(other):
+            result = self._parallel_elementwise(other, function)
+            if result is not None:
+                return result
+        
+        if type(other) in self._valid_numerical_types:
+            shape = self._shape
+            new_values = tuple(map(function, self._flat(), repeat(other, self._size)))
+        
+        elif type(other) == Array:
+            if self._shape == other._shape:
+                shape = self._shape
+                new_values = tuple(map(function, self._flat(), other._flat()))
+            else:
+                shape = _broadcast_shapes(self._shape, other._shape)
+                new_values = tuple(map(function, self._broadcast(shape), other._broadcast(shape)))
+        else:
+            return NotImplemented
+        
+        if out is not None:
+            if out._shape != shape:
+                raise ValueError("Shapes does not match, the result " + str(shape) + 
+                                 " does not fit in out " + str(out._shape) + ".")
+            out._assign(new_values)
+            return out
+        
+        return Array._from_values(shape, self._new_storage(new_values, other))
+    
+    
+    def _masked(self, mask):
+        """
+        Returns the values where mask is True, as a new 1D array. See `__getitem__`.
+        
+        Args:
+            mask (Array): A boolean array with the shape of this array.
+        
+        Returns:
+            Array: The selected values.
+        
+        Raises:
+            IndexError: If mask is not boolean or does not match the shape of this array.
+        
+        """
+        if mask._shape != self._shape:
+            raise IndexError("The mask " + str(mask._shape) + " does not match the shape of the array " + 
+                             str(self._shape) + ".")
+        if mask._size and mask._typecode() != "?":
+            raise IndexError("Only boolean arrays can be used as masks")
+        
+        new_values = tuple(compress(self._flat(), mask._flat()))
+        return Array._from_values((len(new_values),), self._new_storage(new_values))
+    
+    
+    def _in_parallel(self, other=None):
+        """
+        Returns True if an operation on this array (and other) should run in parallel, see set_parallel.
+        
+        Args:
+            other (Array, float, int): The other operand, if any. Only numbers and arrays 
+                                       of the same shape are computed in parallel.
+        
+        Returns:
+            bool: True for parallel execution.
+        
+        """
+        if not _parallel_options["processes"] or self._size < _parallel_options["threshold"]:
+            return False
+        if other is None or type(other) in self._valid_numerical_types:
+            return True
+        return type(other) == Array and other._shape == self._shape
+    
+    
+    def _parallel_elementwise(self, other, function):
+        """
+        Applies function element-wise to this array and other, chunk by chunk in the process pool.
+        
+        Args:
+            other (Array, float, int): The other operand, a number or an array of the same shape.
+            function (callable): Function of two values (which can be pickled), e.g. operator.add.
+        
+        Returns:
+            Array: A new compact array with the results, or None if the values or the results 
+                   can not be packed (e.g. ints which does not fit in 64 bits, or results of 
+                   different types), then the operation must be computed serially.
+        
+        """
+        from multiprocessing import shared_memory
+        
+        #The type of the result is found from the first values, and checked for all values by the workers
+        first = self._array[self._offset]
+        out_type = type(function(first, other if type(other) != Array else other._flat()[0]))
+        if out_type not in _TYPECODES:
+            return None
+        out_typecode = _TYPECODES[out_type]
+        
+        shared = []
+        try:
+            shared.append(_to_shared_memory(self))
+            if type(other) == Array:
+                shared.append(_to_shared_memory(other))
+                other_task = (shared[-1].name, other._typecode())
+            else:
+                other_task = other
+            
+            out = shared_memory.SharedMemory(create=True, size=self._size * struct.calcsize(out_typecode))
+            shared.append(out)
+            
+            tasks = [(function, (shared[0].name, self._typecode()), other_task, (out.name, out_typecode), start, stop)
+                     for start, stop in _chunks(self._size)]
+            if not all(_pool().map(_parallel_chunk, tasks)):
+                return None
+            
+            new_values = memoryview(bytearray(out.buf[:self._size * struct.calcsize(out_typecode)])).cast(out_typecode)
+        except struct.error:
+            return None
+        finally:
+            for block in shared:
+                block.close()
+                block.unlink()
+        
+        return Array._from_values(self._shape, new_values)
+    
+    
+    def _parallel_reduce(self, reducer):
+        """
+        Reduces all the values of the array with reducer, chunk by chunk in the process pool.
+        
+        Args:
+            reducer (callable): sum, min or max.
+        
+        Returns:
+            value: The reduced value, or None if the values can not be packed (ints which 
+                   does not fit in 64 bits), then the values must be reduced serially.
+        
+        """
+        try:
+            shared = _to_shared_memory(self)
+        except struct.error:
+            return None
+        try:
+            tasks = [(reducer, shared.name, self._typecode(), start, stop) for start, stop in _chunks(self._size)]
+            return reducer(_pool().map(_parallel_reduce_chunk, tasks))
+        finally:
+            shared.close()
+            shared.unlink()
+    
+    
+    def _assign(self, values):
+        """
+        Writes values (in row-major order) to the array.
+        
+        The values are written into the existing storage when it is compact and the 
+        values fits its typecode, so no new storage is allocated. Otherwise (tuple storage,
+        or e.g. floats written to an int array) the array gets new storage, and stops 
+        sharing storage with any views of it. Sparse arrays stay sparse.
+        
+        Args:
+            values (sequence): The new values, as many as the size of the array.
+        
+        Raises:
+            ValueError: If the array is a view, or its storage is an external buffer or mapped file 
+                        (see `frombuffer`), and the values can not be written into the storage.
+            ValueError: If the values does not fit in the compact storage (e.g. too large ints), 
+                        the array is then unchanged.
+        
+        """
+        storage = self._array
+        if (self.is_compact() and not storage.readonly and 
+                (not values or _TYPECODES[type(values[0])] == storage.format)):
+            #The values are packed first, so values which does not fit leaves the array unchanged
+            values = _pack(values, storage.format)
+            if self._is_contiguous():
+                storage[self._offset:self._offset + len(values)] = values
+            else:
+                offsets = _iter_strided(range(len(storage)), self._offset, self._shape, self._strides)
+                for offset, value in zip(offsets, values):
+                    storage[offset] = value
+            return
+        
+        #New storage would leave the array this is a view of (or the buffer or file) unchanged
+        if self._base is not None:
+            raise ValueError("Can not write the values to the storage of this array, it is a view or an external "
+                             "buffer which is not writable with the type of the values. Use copy() first.")
+        
+        if self.is_compact() and values:
+            self._array = _pack(values, _TYPECODES[type(values[0])])
+        elif self.is_sparse():
+            self._array = _SparseStorage.from_dense(values, type(values[0]) if values else float)
+        else:
+            self._array = tuple(values)
+        self._strides = _contiguous_strides(self._shape)
+        self._offset = 0
+    
+    
+    def _broadcast(self, shape):
+        """
+        Returns an iterator over the values of the array broadcast to shape, in row-major order.
+        
+        Args:
+            shape (tuple): The shape to broadcast to, must be compatible with the shape of the array.
+        
+        Returns:
+            iterator: The broadcast values.
+        
+        """
+        new_dims = len(shape) - len(self._shape)
+        
+        #Stretched dimensions gets stride 0, so the same values are read again
+        strides = (0,) * new_dims + tuple(0 if n == 1 else stride for n, stride 
+                                          in zip(self._shape, self._strides))
+        
+        return _iter_strided(self._array, self._offset, shape, strides)
+    
+    
+    def __array__(self, dtype=None, copy=None):
+        """Returns the values as a numpy array (a view of the storage for compact, contiguous arrays).
+
+        Args:
+            dtype (numpy.dtype): optional, the type of the numpy array.
+            copy (bool): optional, if True the values are always copied.
+
+        Returns:
+            numpy.ndarray: The values.
+
+        """
+        np = _numpy()
+        values = np.asarray(self.data).reshape(self._shape)
+        if dtype is not None:
+            values = values.astype(dtype, copy=False)
+        return values.copy() if copy else values
+    
+    
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """Computes a numpy ufunc with Arrays as operands (e.g. numpy.add(a, b) or numpy array + a).
+
+        The Arrays are given to numpy as views of their storage, and numpy arrays 
+        in the result are returned as (compact) Arrays.
+
+        Returns:
+            Array, value or tuple: The result, or NotImplemented if an `out` Array 
+                                   is not compact, contiguous and writable.
+
+        """
+        out = kwargs.get("out", ())
+        for array in out:
+            if type(array) == Array and not array._is_writable_buffer():
+                return NotImplemented
+        if out:
+            kwargs["out"] = _to_numpy(out)
+        
+        result = getattr(ufunc, method)(*_to_numpy(inputs), **kwargs)
+        
+        if out:
+            return out[0] if len(out) == 1 else out
+        return _from_numpy(result)
+    
+    
+    def __array_function__(self, func, types, args, kwargs):
+        """Computes a numpy function (e.g. numpy.sum or numpy.where) with Arrays as arguments.
+
+        Returns:
+            The result, with numpy arrays returned as (compact) Arrays.
+
+        """
+        np = _numpy()
+        if not all(issubclass(t, (Array, np.ndarray)) for t in types):
+            return NotImplemented
+        return _from_numpy(func(*_to_numpy(args), **_to_numpy(kwargs)))
+    
+    
+    @classmethod
+    def _from_numpy(cls, values):
+        """
+        Returns a compact array with the values of a numpy array, using its buffer when possible.
+        
+        Args:
+            values (numpy.ndarray): The values, of a bool, int or float dtype.
+        
+        Returns:
+            Array: The new array (or a python value for 0-dimensional numpy arrays).
+        
+        Raises:
+            ValueError: If the values are not of a valid type.
+        
+        """
+        np = _numpy()
+        types = {"b": bool, "i": int, "u": int, "f": float}
+        if values.dtype.kind not in types:
+            raise ValueError("Array contains unvalid type of value")
+        dtype = types[values.dtype.kind]
+        
+        values = np.ascontiguousarray(values, dtype={bool: np.bool_, int: np.int64, float: np.float64}[dtype])
+        if values.ndim == 0:
+            return values.item()
+        if values.size == 0:
+            return cls._from_values(values.shape, _pack((), _TYPECODES[dtype]))
+        #The numpy array is only used by the new array, which owns it
+        array = cls.frombuffer(values, values.shape, dtype)
+        array._base = None
+        return array
+    
+    
+    def _with_numpy(self, other=None):
+        """
+        Returns True if an operation on this array (and other) should be delegated to numpy, see set_numpy.
+        
+        Args:
+            other (Array, float, int): The other operand, if any.
+        
+        Returns:
+            bool: True if numpy is installed and the array (or other) is large enough.
+        
+        """
+        threshold = _numpy_options["threshold"]
+        if threshold is None or _numpy() is None:
+            return False
+        if type(other) == Array:
+            return max(self._size, other._size) >= threshold
+        return self._size >= threshold and (other is None or type(other) in self._valid_numerical_types)
+    
+    
+    def _numpy_result(self, values, other=None):
+        """
+        Returns the result of a numpy operation on this array (and other), stored as by `_new_storage`.
+        
+        Args:
+            values (numpy.ndarray, numpy.generic): The result.
+            other (Array, float, int): The other operand, if any.
+        
+        Returns:
+            value or Array: A python value, or an array which is compact if any of the arrays are.
+        
+        """
+        if values.ndim and not (self.is_compact() or (type(other) == Array and other.is_compact())):
+            return Array._from_values(values.shape, tuple(values.ravel().tolist()))
+        return _from_numpy(values)
+    
+    
+    def _is_writable_buffer(self):
+        """Returns True if numpy can write to the values of the array through its buffer."""
+        return self.is_compact() and self._is_contiguous() and not self._array.readonly
+    
+    
+    def _numpy_elementwise(self, other, function, out=None):
+        """
+        Applies function element-wise to this array and other with the matching numpy ufunc.
+        
+        Args:
+            other (Array, float, int): The other operand (numpy broadcasts as `_elementwise`).
+            function (callable): One of the functions in _NUMPY_UFUNCS.
+            out (Array): optional, an array to write the results to. 
+        
+        Returns:
+            Array: A new array (or `out`) with the results, or None if numpy could not compute 
+                   it exactly as `_elementwise` (e.g. ints which does not fit in, or whose results 
+                   overflows, 64 bits, or a result which can not be written to `out`).
+        
+        Raises:
+            ValueError: If the shapes can not be broadcast together.
+        
+        """
+        np = _numpy()
+        ufunc = getattr(np, _NUMPY_UFUNCS[function])
+        try:
+            x = np.asarray(self)
+            y = np.asarray(other) if type(other) == Array else other
+        except ValueError:
+            return None
+        
+        if function in _NUMPY_ARITHMETIC:
+            x = x.astype(np.int64) if x.dtype == np.bool_ else x
+            y = y.astype(np.int64) if type(other) == Array and y.dtype == np.bool_ else y
+        if not _numpy_is_exact(x, y, function):
+            return None
+        
+        if out is None:
+            return self._numpy_result(ufunc(x, y), other)
+        
+        if not out._is_writable_buffer():
+            return None
+        if out._shape != np.broadcast_shapes(x.shape, np.shape(y)):
+            raise ValueError("Shapes does not match, the result does not fit in out " + str(out._shape) + ".")
+        try:
+            ufunc(x, y, out=np.asarray(out), casting="same_kind")
+        except TypeError:
+            return None
+        return out
+    
+    
+    def save(self, filename):
+        """Writes the array to a binary file, which can be opened with `open_memmap`.
+
+        The file has a small header (shape and type of the values) followed by 
+        the raw values, packed as in compact storage, see `to_bytes`.
+
+        Args:
+            filename (str): filename or path of the file.
+
+        Raises:
+            ValueError: If the values can not be packed (e.g. too large ints), the file is then not written.
+
+        """
+        #The values are packed before the file is opened, so a failure does not leave a truncated file
+        values = self.data.cast("B") if self._size else b""
+        with open(filename, "wb") as file:
+            file.write(self._header())
+            file.write(values)
+    
+    
+    def to_bytes(self):
+        """Returns the array as bytes, which can be read with `from_bytes`.
+
+        The bytes are the same as in a file written by `save`: a header with the shape 
+        and type of the values, followed by the values packed as in compact storage.
+
+        Returns:
+            bytes: The array.
+
+        """
+        return self._header() + (self.data.cast("B").tobytes() if self._size else b"")
+    
+    
+    @classmethod
+    def from_bytes(cls, buffer):
+        """Returns the array in bytes written by `to_bytes` (or the content of a file written by `save`).
+
+        The values are not copied, the compact array uses the buffer as storage.
+
+        Args:
+            buffer (bytes-like): The bytes, or any object supporting the buffer protocol.
+
+        Returns:
+            Array: The compact array.
+
+        Raises:
+            ValueError: If the buffer does not contain an array (for this machine).
+
+        """
+        storage = memoryview(buffer).cast("B")
+        typecode, shape, header_size = cls._read_header(storage, "The buffer")
+        return cls.frombuffer(storage[header_size:], shape, _TYPES[typecode])
+    
+    
+    def _header(self):
+        """
+        Returns the header of the binary format of the array, see `save`.
+        
+        Returns:
+            bytes: The magic bytes, byte order, typecode and number of dimensions, the shape, 
+                   and padding to _FILE_ALIGNMENT bytes.
+        
+        """
+        header = struct.pack(_FILE_HEADER, _FILE_MAGIC, b"<" if sys.byteorder == "little" else b">", 
+                             self._typecode().encode(), len(self._shape))
+        header += struct.pack("<" + str(len(self._shape)) + "q", *self._shape)
+        return header + bytes(-len(header) % _FILE_ALIGNMENT)
+    
+    
+    @staticmethod
+    def _read_header(buffer, name):
+        """
+        Reads the header of the binary format of an array, see `save`.
+        
+        Args:
+            buffer (bytes-like): The file or bytes, starting with the header.
+            name (str): Name of the file or buffer, for the error messages.
+        
+        Returns:
+            tuple: The typecode, the shape and the size of the header (where the values start).
+        
+        Raises:
+            ValueError: If the buffer is not an array (for this machine).
+        
+        """
+        size = struct.calcsize(_FILE_HEADER)
+        if len(buffer) < size:
+            raise ValueError(name + " is not an array file")
+        magic, byteorder, typecode, ndim = struct.unpack_from(_FILE_HEADER, buffer)
+        if magic != _FILE_MAGIC or typecode.decode() not in _TYPECODES.values():
+            raise ValueError(name + " is not an array file")
+        if byteorder != (b"<" if sys.byteorder == "little" else b">"):
+            raise ValueError(name + " was saved with another byte order")
+        
+        header_size = size + 8 * ndim
+        header_size += -header_size % _FILE_ALIGNMENT
+        if len(buffer) < header_size:
+            raise ValueError(name + " is not an array file, the header is truncated")
+        shape = struct.unpack_from("<" + str(ndim) + "q", buffer, size)
+        if min(shape, default=0) < 0:
+            raise ValueError(name + " is not an array file")
+        
+        return typecode.decode(), shape, header_size
+    
+    
+    def __reduce__(self):
+        """Returns how to pickle the array: as the compact bytes of `to_bytes`.
+
+        Arrays with tuple storage are unpickled with tuple storage again, and sparse arrays 
+        stay sparse. Ints too large to be packed are pickled as a tuple.
+
+        Returns:
+            tuple: The function making the array, and its arguments.
+
+        """
+        if self.is_sparse():
+            return (Array._from_values, (self._shape, self.copy()._array))
+        try:
+            data = self.to_bytes()
+        except ValueError:
+            return (Array._from_values, (self._shape, tuple(self._flat())))
+        return (Array._from_pickle, (data, self.is_compact()))
+    
+    
+    def __reduce_ex__(self, protocol):
+        """Returns how to pickle the array with a pickle protocol.
+
+        With protocol 5 the packed values are given to pickle as a buffer, so they 
+        can be sent out-of-band (with a `buffer_callback`) without being copied, and 
+        the unpickled array uses the received buffer as storage.
+
+        Args:
+            protocol (int): The pickle protocol.
+
+        Returns:
+            tuple: The function making the array, and its arguments.
+
+        """
+        if protocol < 5 or self.is_sparse():
+            return self.__reduce__()
+        try:
+            values = self.compact()._array
+        except ValueError:
+            return self.__reduce__()
+        
+        return (Array._from_pickle, (pickle.PickleBuffer(values), self.is_compact(), values.format, self._shape))
+    
+    
+    @classmethod
+    def _from_pickle(cls, buffer, compact, typecode=None, shape=None):
+        """
+        Returns an unpickled array, see `__reduce__` and `__reduce_ex__`.
+        
+        Args:
+            buffer (bytes-like): The bytes of `to_bytes`, or (with typecode and shape) the packed values.
+            compact (bool): False if the array had tuple storage.
+            typecode (str): optional, the typecode of the packed values.
+            shape (tuple): optional, the shape of the array.
+        
+        Returns:
+            Array: The array.
+        
+        """
+        if typecode is None:
+            array = cls.from_bytes(buffer)
+        else:
+            array = cls.frombuffer(buffer, shape, _TYPES[typecode])
+        
+        #The unpickled buffer is only used by the new array
+        array._base = None
+        return array if compact else array.to_dense()
+    
+    
+    @classmethod
+    def open_memmap(cls, filename, mode="r+"):
+        """Opens an array saved with `save`, memory-mapped from the file.
+
+        The values are not read into memory: pages of the file are loaded when they 
+        are accessed, so the array can be larger than the memory, and processes opening 
+        the same file share the pages. Indexing costs the same as for a compact array.
+
+        Args:
+            filename (str): filename or path of the file.
+            mode (str): "r+" (default) writes changes to the array back to the file, 
+                        "r" opens the array read-only, and "c" makes changes only in memory.
+
+        Returns:
+            Array: The compact array, with the mapped file as storage. Writes which can not 
+                   be written to the file (in mode "r", or e.g. floats to ints) raises ValueError.
+
+        Raises:
+            ValueError: If mode is not valid, or the file is not an array file (for this machine).
+
+        """
+        access = {"r": mmap.ACCESS_READ, "r+": mmap.ACCESS_WRITE, "c": mmap.ACCESS_COPY}
+        if mode not in access:
+            raise ValueError("Not valid mode, must be one of " + str(tuple(access)))
+        
+        #Copy-on-write never writes to the file, so it only needs to be readable
+        with open(filename, "r+b" if mode == "r+" else "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                raise ValueError(str(filename) + " is not an array file")
+            mapped = mmap.mmap(file.fileno(), 0, access=access[mode])
+        
+        typecode, shape, header_size = cls._read_header(mapped, str(filename))
+        
+        #The memoryview keeps the map open for as long as the array (or views of it) exists
+        storage = memoryview(mapped)[header_size:].cast(typecode)
+        if len(storage) != math.prod(shape):
+            raise ValueError("Number of values (" + str(len(storage)) + 
+                             ") does not fit with the shape (" + str(shape) + ").")
+        
+        array = cls._from_values(shape, storage)
+        array._base = mapped
+        return array
+    
+    
+    def flush(self):
+        """Writes changes to a memory-mapped array (see `open_memmap`) to its file now.
+
+        Without flush, the operating system writes the changes back by itself. 
+        For other arrays, flush does nothing.
+
+        """
+        if self.is_compact() and isinstance(self._array.obj, mmap.mmap):
+            self._array.obj.flush()
+    
+    
+    def is_sparse(self):
+        """Returns True if only the nonzero values are stored, see `to_sparse`.
+
+        Returns:
+            bool: True for sparse storage.
+
+        """
+        return type(self._array) == _SparseStorage
+    
+    
+    def to_sparse(self):
+        """Returns the array with sparse storage, which stores only the nonzero values.
+
+        Element-wise operations with numbers and arrays of the same shape, comparisons, 
+        sums, min, max and matrix products of sparse arrays only read the nonzeros. 
+        The result is sparse, unless the operation gives nonzeros for the zeros 
+        (e.g. adding a nonzero number), then it is dense. Other operations read the zeros too.
+
+        Returns:
+            Array: The sparse array (self if it already is sparse and owns all of its storage).
+
+        """
+        if self._sparse() is not None:
+            return self
+        dtype = _TYPES[self._typecode()]
+        return Array._from_values(self._shape, _SparseStorage.from_dense(self._flat(), dtype))
+    
+    
+    def to_dense(self):
+        """Returns the array with all the values stored (as a tuple).
+
+        Returns:
+            Array: The dense array (self if it already is dense and owns all of its storage).
+
+        """
+        values = self._flat()
+        if type(values) == tuple and values is self._array:
+            return self
+        return Array._from_values(self._shape, tuple(values))
+    
+    
+    def _sparse(self):
+        """Returns the sparse storage if the array is sparse and owns all of it (is not a view), else None."""
+        if self.is_sparse() and self._offset == 0 and len(self._array) == self._size and self._is_contiguous():
+            return self._array
+        return None
+    
+    
+    def _sparse_elementwise(self, other, function):
+        """
+        Applies function element-wise to this sparse array and a number or an Array of the same shape, 
+        reading only the nonzeros.
+        
+        The result is sparse if function of the zeros is zero, otherwise it is filled with that value. 
+        
+        Args:
+            other (Array, float, int): The other operand.
+            function (callable): Function of two values, e.g. operator.add.
+        
+        Returns:
+            Array: The new array, or None if there is no sparse path for the operands 
+                   (e.g. adding a dense array, or broadcasting).
+        
+        """
+        storage = self._sparse()
+        
+        if type(other) in self._valid_numerical_types:
+            fill = function(storage.zero, other)
+            indices, values = storage.indices, list(map(function, storage.values, repeat(other)))
+        elif type(other) != Array or other._shape != self._shape:
+            return None
+        elif other._sparse() is not None:
+            fill = function(storage.zero, other._array.zero)
+            indices, values, other_values = storage.union(other._array)
+            values = list(map(function, values, other_values))
+        elif function is operator.mul and (other._typecode() != "d" or all(map(math.isfinite, other._flat()))):
+            #Zero times a finite value is zero (but not times inf or nan), so only the values 
+            #of other at the nonzeros are read
+            flat = other._flat()
+            fill = storage.zero * _TYPES[other._typecode()]()
+            indices, values = storage.indices, list(map(function, storage.values, map(flat.__getitem__, storage.indices)))
+        else:
+            return None
+        
+        if fill != 0:
+            new_values = [fill] * self._size
+            for index, value in zip(indices, values):
+                new_values[index] = value
+            return Array._from_values(self._shape, tuple(new_values))
+        
+        return Array._from_values(self._shape, _SparseStorage.from_pairs(self._size, zip(indices, values), type(fill)))
+    
+    
+    def _sparse_reduce(self, axis, reducer):
+        """
+        Reduces this sparse array with sum, min or max, reading only the nonzeros.
+        
+        Args:
+            axis (int): The axis to reduce (only for sum), or None to reduce all values.
+            reducer (callable): sum, min or max.
+        
+        Returns:
+            value or Array: The reduced value, or a (dense) array of sums, or None if there is no sparse path.
+        
+        """
+        storage = self._sparse()
+        if axis is not None and len(self._shape) == 1:
+            axis = None
+        
+        if axis is None:
+            if reducer is sum:
+                return sum(storage.values, storage.zero + 0)
+            if reducer in (min, max) and self._size:
+                zeros = (storage.zero,) if len(storage.values) < self._size else ()
+                return reducer(chain(storage.values, zeros))
+            return None
+        
+        if reducer is not sum:
+            return None
+        
+        #The flat index in the result is the flat index without the coordinate along the axis
+        axis = self._normalize_axis(axis)
+        n, step = self._shape[axis], _contiguous_strides(self._shape)[axis]
+        shape = self._shape[:axis] + self._shape[axis + 1:]
+        new_values = [storage.zero + 0] * math.prod(shape)
+        for index, value in zip(storage.indices, storage.values):
+            new_index = index // (step * n) * step + index % step
+            new_values[new_index] += value
+        return Array._from_values(shape, tuple(new_values))
+    
+    
+    def _sparse_dot(self, other, m, p, n):
+        """
+        Returns the matrix product of this sparse (m, p) array with an (p, n) array, by the CSR rows of this array.
+        
+        Every nonzero at (i, k) adds its multiple of row k of other to row i of the result.
+        
+        Args:
+            other (Array): The other array (sparse or dense).
+            m, p, n (int): The dimensions.
+        
+        Returns:
+            list: The (dense) values of the product, in row-major order.
+        
+        """
+        storage = self._sparse()
+        flat = other._flat()
+        zero = storage.zero * _TYPES[other._typecode()]()
+        pointers = storage.row_pointers(m, p)
+        
+        new_values = [zero] * (m * n)
+        for i in range(m):
+            row = new_values[i * n:(i + 1) * n]
+            for position in range(pointers[i], pointers[i + 1]):
+                k = storage.indices[position] - i * p
+                value = storage.values[position]
+                row = list(map(operator.add, row, map(operator.mul, repeat(value), flat[k * n:(k + 1) * n])))
+            new_values[i * n:(i + 1) * n] = row
+        return new_values
+    
+    
+    def is_compact(self):
+        """Returns True if the values are stored packed in a typed buffer.
+
+        Returns:
+            bool: True for compact storage, False if the values are stored as a tuple.
+
+        """
+        return isinstance(self._array, memoryview)
+    
+    
+    def compact(self):
+        """Returns a copy of the array with the values packed in a typed buffer.
+
+        Returns:
+            Array: The compact array (self if it already is compact and owns all of its storage).
+
+        """
+        values = self._flat()
+        if self.is_compact() and values is self._array:
+            return self
+        
+        return Array._from_values(self._shape, _pack(values, self._typecode()))
+    
+    
+    @property
+    def data(self):
+        """The values of the array as a memoryview with the shape of the array.
+
+        The memoryview supports the buffer protocol, so e.g. `bytes(a.data)` or 
+        `numpy.asarray(a.data)` reads the values. For compact, contiguous arrays
+        no values are copied and writes through the memoryview changes the array.
+        Other arrays are packed first.
+
+        Returns:
+            memoryview: The values of the array.
+
+        """
+        values = self._flat()
+        if not isinstance(values, memoryview):
+            values = _pack(values, self._typecode())
+        if self._size == 0:
+            #memoryview can not cast to a shape containing zeros
+            return values
+        return values.cast("B").cast(values.format, self._shape)
+    
+    
+    def __buffer__(self, flags):
+        """Exports the values through the buffer protocol (Python 3.12+), see `data`."""
+        return self.data
+    
+    
+    def _typecode(self):
+        """
+        Returns the struct typecode for the values of the array.
+        
+        Returns:
+            str: 'q' for int, 'd' for float and '?' for bool arrays.
+        
+        """
+        if self.is_compact():
+            return self._array.format
+        if self._size == 0:
+            return "d"
+        return _TYPECODES[type(self._array[self._offset])]
+    
+    
+    def _new_storage(self, values, other=None):
+        """
+        Returns the storage for values computed from this array (and other). 
+        
+        The values are packed if any of the arrays they were computed from are compact.
+        
+        Args:
+            values (tuple): The computed values.
+            other (Array, float, int): The other operand, if any.
+        
+        Returns:
+            tuple or memoryview: The storage.
+        
+        """
+        if values and (self.is_compact() or (type(other) == Array and other.is_compact())):
+            return _pack(values, _TYPECODES[type(values[0])])
+        return values
+    
+    
+    def reshape(self, *shape):
+        """Returns the array with a new shape, with the same values in row-major order.
+
+        For contiguous arrays (and views) the result is a view sharing the storage. 
+        Other views (e.g. transposed or sliced with a step) are copied first, like in numpy.
+
+        Args:
+            *shape (int or tuple): The new shape, as a tuple or as ints. One dimension can be -1, 
+                                   and is then found from the size of the array.
+
+        Returns:
+            Array: The reshaped array.
+
+        Raises:
+            ValueError: If the new shape does not fit with the number of values.
+
+        """
+        if len(shape) == 1 and isinstance(shape[0], tuple):
+            shape = shape[0]
+        
+        if shape.count(-1) == 1:
+            known = -math.prod(shape)
+            if known == 0 or self._size % known:
+                raise ValueError("Can not reshape array of size " + str(self._size) + " into shape " + str(shape))
+            shape = tuple(self._size // known if n == -1 else n for n in shape)
+        
+        if len(shape) == 0 or math.prod(shape) != self._size:
+            raise ValueError("Can not reshape array of size " + str(self._size) + " into shape " + str(shape))
+        
+        array = self if self._is_contiguous() else self.copy()
+        return array._view(tuple(shape), _contiguous_strides(shape), array._offset)
+    
+    
+    def transpose(self, *axes):
+        """Returns a view of the array with the dimensions permuted. No values are copied.
+
+        Args:
+            *axes (int or tuple): optional, the new order of the dimensions, as a tuple or as ints.
+                                  By default the order of the dimensions is reversed.
+
+        Returns:
+            Array: The transposed view.
+
+        Raises:
+            ValueError: If axes is not a permutation of the dimensions.
+
+        """
+        if len(axes) == 1 and isinstance(axes[0], tuple):
+            axes = axes[0]
+        if not axes:
+            axes = tuple(reversed(range(len(self._shape))))
+        
+        axes = tuple(self._normalize_axis(axis) for axis in axes)
+        if sorted(axes) != list(range(len(self._shape))):
+            raise ValueError("Axes " + str(axes) + " does not match the dimensions of the array.")
+        
+        return self._view(tuple(self._shape[axis] for axis in axes), 
+                          tuple(self._strides[axis] for axis in axes), self._offset)
+    
+    
+    @property
+    def T(self):
+        """The transposed array (a view), see `transpose`."""
+        return self.transpose()
+    
+    
+    @property
+    def shape(self):
+        """The shape of the array."""
+        return self._shape
+    
+    
+    def copy(self):
+        """Returns a copy of the array, which owns contiguous storage. 
+        
+        Views are materialised by copying them.
+
+        Returns:
+            Array: The copy, with the same kind of storage (compact, sparse or a tuple).
+
+        """
+        if self.is_sparse():
+            #Sparse storage is never written to, so it can be shared
+            return self.to_sparse() if self._sparse() is None else Array._from_values(self._shape, self._array)
+        
+        values = self._flat()
+        if isinstance(values, memoryview):
+            return Array._from_values(self._shape, memoryview(bytearray(values.cast("B"))).cast(values.format))
+        if self.is_compact():
+            return Array._from_values(self._shape, _pack(values, self._typecode()))
+        return Array._from_values(self._shape, tuple(values))
+    
+    
+    def _is_contiguous(self):
+        """
+        Returns True if the values of the array are one after another in the flat storage, in row-major order.
+        
+        Returns:
+            bool: True for contiguous arrays.
+        
+        """
+        return self._strides == _contiguous_strides(self._shape)
+    
+    
+    def _flat(self):
+        """
+        Returns the values of the array as a flat sequence in row-major order.
+        
+        For an array that owns all of its storage this is the storage itself, 
+        for a view only the elements the view can see are returned. 
+        
+        Returns:
+            sequence: The values of the array in row-major order.
+        
+        """
+        if self._is_contiguous():
+            if self._offset == 0 and len(self._array) == self._size:
+                return self._array
+            return self._array[self._offset:self._offset + self._size]
+        
+        return tuple(_iter_strided(self._array, self._offset, self._shape, self._strides))
+    
+    
+    def _view(self, shape, strides, offset):
+        """
+        Returns a new Array sharing the flat storage of this array.
+        
+        Args:
+            shape (tuple): The shape of the view.
+            strides (tuple): The strides of the view, one per dimension.
+            offset (int): Offset of the first element of the view in the flat storage.
+        
+        Returns:
+            Array: The view.
+        
+        """
+        view = Array._from_values(shape, self._array)
+        view._strides = strides
+        view._offset = offset
+        view._size = math.prod(shape)
+        view._base = self if self._base is None else self._base
+        return view
+    
+    
+    def _format(self, offset, dim, summarise):
+        """
+        Returns the string representation of the sub-array from dimension dim at offset, 
+        formatted as str formats nested tuples.
+        
+        Args:
+            offset (int): Offset of the sub-array in the flat storage.
+            dim (int): The first dimension of the sub-array.
+            summarise (bool): If True, long dimensions are shortened to their edge items and "...".
+        
+        Returns:
+            str: The string representation.
+        
+        """
+        n, stride = self._shape[dim], self._strides[dim]
+        edgeitems = _print_options["edgeitems"]
+        
+        if summarise and n > 2 * edgeitems:
+            indices = list(range(edgeitems)) + [None] + list(range(n - edgeitems, n))
+        else:
+            indices = range(n)
+        
+        if dim == len(self._shape) - 1:
+            items = ["..." if i is None else repr(self._array[offset + i * stride]) for i in indices]
+        else:
+            items = ["..." if i is None else self._format(offset + i * stride, dim + 1, summarise) for i in indices]
+        
+        #A tuple with one item is printed with a trailing comma
+        if n == 1:
+            return "(" + items[0] + ",)"
+        return "(" + ", ".join(items) + ")"
+
+
+@lru_cache(maxsize=128)
+def _compile_fused(expression, n_leaves, n_constants):
+    """
+    Compiles an element-wise expression to one function of the leaf values.
+
+    Args:
+        expression (str): the expression, with leaves named a0, a1, ... and constants c0, c1, ...
+        n_leaves (int): number of leaves in the expression.
+        n_constants (int): number of constants in the expression.
+
+    Returns:
+        function: a function taking the constants, which returns the function of the leaf values.
+    """
+    leaves = ", ".join("a" + str(i) for i in range(n_leaves))
+    constants = ", ".join("c" + str(i) for i in range(n_constants))
+    return eval("lambda " + constants + ": lambda " + leaves + ": " + expression)
+
+
+class LazyArray:
+    """
+    An unevaluated element-wise expression of Arrays and numbers, made with `Array.lazy`.
+    
+    The expression is evaluated (once) when the lazy array is indexed, printed or compared,
+    or when `evaluate` is called. All the operators in the expression are fused to one function 
+    which is mapped over the values of the arrays, so only the result is allocated.
+    Other Array methods are evaluated and called on the result.
+    """
+
+    _operators = {"+": operator.add, "-": operator.sub, "*": operator.mul}
+
+    def __init__(self, node, shape):
+        """
+        Initialize a lazy array. 
+        
+        Args:
+            node (tuple): The expression tree. Either ("leaf", Array), ("const", number) 
+                          or (operator symbol, left node, right node).
+            shape (tuple): The shape of the result.
+        """
+        self._node = node
+        self._shape = shape
+        self._result = None
+    
+    
+    def _combine(self, symbol, other, reverse=False):
+        """
+        Returns the expression `self <symbol> other` (or `other <symbol> self` if reverse).
+        
+        Args:
+            symbol (str): The operator, one of "+", "-" or "*".
+            other (LazyArray, Array, float, int): The other operand.
+            reverse (bool): If True, other is the left operand.
+        
+        Returns:
+            LazyArray: The new expression, or NotImplemented if other is not supported.
+        
+        Raises:
+            ValueError: If the shapes can not be broadcast together.
+        """
+        if type(other) in {int, float}:
+            other_node = ("const", other)
+            shape = self._shape
+        elif type(other) == Array:
+            other_node = ("leaf", other)
+            shape = _broadcast_shapes(self._shape, other._shape)
+        elif type(other) == LazyArray:
+            other_node = other._node
+            shape = _broadcast_shapes(self._shape, other._shape)
+        else:
+            return NotImplemented
+        
+        if reverse:
+            return LazyArray((symbol, other_node, self._node), shape)
+        return LazyArray((symbol, self._node, other_node), shape)
+    
+    
+    @staticmethod
+    def _into(result, out):
+        """
+        Returns the lazy result, or evaluates it into out if given (as `out=` in Array arithmetic).
+        
+        Args:
+            result (LazyArray): The expression, or NotImplemented.
+            out (Array): optional, an array to write the evaluated result to, see `Array._assign`.
+        
+        Returns:
+            LazyArray, Array: result, or out with the values of the result.
+        
+        Raises:
+            ValueError: If the result does not fit in `out`.
+        """
+        if out is None or result is NotImplemented:
+            return result
+        if out._shape != result._shape:
+            raise ValueError("Shapes does not match, the result " + str(result._shape) + 
+                             " does not fit in out " + str(out._shape) + ".")
+        out._assign(result.evaluate()._flat())
+        return out
+    
+    
+    def __add__(self, other, out=None):
+        """Element-wise adds a lazy array, Array or number, see Array.__add__."""
+        return self._into(self._combine("+", other), out)
+    
+    def __radd__(self, other):
+        """Element-wise adds a lazy array, Array or number, see Array.__radd__."""
+        return self._combine("+", other, reverse=True)
+    
+    def __sub__(self, other, out=None):
+        """Element-wise subtracts a lazy array, Array or number, see Array.__sub__."""
+        return self._into(self._combine("-", other), out)
+    
+    def __rsub__(self, other):
+        """Element-wise subtracts this lazy array from an Array, see Array.__rsub__.
+        
+        Numbers are handled as in Array.__rsub__ (the number is subtracted), 
+        so that the lazy and the evaluated results are the same.
+        """
+        return self._combine("-", other, reverse=type(other) == Array)
+    
+    def __mul__(self, other, out=None):
+        """Element-wise multiplies with a lazy array, Array or number, see Array.__mul__."""
+        return self._into(self._combine("*", other), out)
+    
+    def __rmul__(self, other):
+        """Element-wise multiplies with a lazy array, Array or number, see Array.__rmul__."""
+        return self._combine("*", other, reverse=True)
+    
+    
+    def evaluate(self):
+        """Evaluates the expression in one fused pass.
+
+        Returns:
+            Array: The result (evaluated only the first time).
+
+        """
+        if self._result is not None:
+            return self._result
+        
+        leaves = {}
+        constants = []
+        expression = self._expression(self._node, leaves, constants)
+        function = _compile_fused(expression, len(leaves), len(constants))(*constants)
+        
+        arrays = [array for _, array in leaves.values()]
+        values = tuple(map(function, *[array._flat() if array._shape == self._shape 
+                                       else array._broadcast(self._shape) for array in arrays]))
+        
+        if values and any(array.is_compact() for array in arrays):
+            values = _pack(values, _TYPECODES[type(values[0])])
+        result = Array._from_values(self._shape, values)
+        
+        #The expression is not needed anymore
+        self._result = result
+        self._node = ("leaf", result)
+        
+        return result
+    
+    
+    def _expression(self, node, leaves, constants):
+        """
+        Returns the source code of the expression in node, and collects its leaves and constants.
+        
+        Args:
+            node (tuple): The expression tree.
+            leaves (dict): The (index, array) found so far, by id of the array. 
+                           The same array is only read once.
+            constants (list): The numbers found so far.
+        
+        Returns:
+            str: The source code of the expression.
+        """
+        if node[0] == "leaf":
+            index, _ = leaves.setdefault(id(node[1]), (len(leaves), node[1]))
+            return "a" + str(index)
+        
+        if node[0] == "const":
+            constants.append(node[1])
+            return "c" + str(len(constants) - 1)
+        
+        symbol, left, right = node
+        return "(" + self._expression(left, leaves, constants) + " " + symbol + " " + \
+               self._expression(right, leaves, constants) + ")"
+    
+    
+    def __str__(self):
+        """Returns a nicely printable string representation of the evaluated array."""
+        return str(self.evaluate())
+    
+    def __getitem__(self, item):
+        """Returns value of item in the evaluated array, see Array.__getitem__."""
+        return self.evaluate()[item]
+    
+    def __eq__(self, other):
+        """Compares the evaluated array with another Array or lazy array, see Array.__eq__."""
+        if type(other) == LazyArray:
+            other = other.evaluate()
+        return self.evaluate() == other
+    
+    def __getattr__(self, name):
+        """Looks up other Array attributes and methods on the evaluated array."""
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.evaluate(), name)
+
+
+class ChunkedArray:
+    """
+    An array split along the first axis into blocks of a fixed number of rows, 
+    stored in memory or in files on disk (see `save`), made with `Array.chunked`.
+    
+    Element-wise operations and reductions along other axes are not computed at once, 
+    they build a task graph for every block. The graph is run block by block when the 
+    result is needed (`store`, `compute`, reductions, indexing and comparing), so only 
+    the blocks used for one block of the result are in memory at the same time, and 
+    blocks on disk are memory-mapped. Inside a block, the operations are Array operations 
+    with the same semantics (types, broadcasting, numpy and parallel computing).
+    """
+
+    def __init__(self, shape, chunk_size, blocks):
+        """
+        Initialize a chunked array.
+        
+        Args:
+            shape (tuple): The shape of the (whole) array.
+            chunk_size (int): The number of rows (along the first axis) in a block, the last block may be smaller.
+            blocks (list): A task for every block. Either ("array", Array), ("file", filename), 
+                           ("const", value) or ("call", function, tasks of the arguments).
+        """
+        self._shape = tuple(shape)
+        self._chunk_size = chunk_size
+        self._blocks = blocks
+    
+    
+    @classmethod
+    def from_array(cls, array, chunk_size, directory=None):
+        """
+        Splits an Array into blocks.
+        
+        Args:
+            array (Array): The array, with at least one dimension.
+            chunk_size (int): The number of rows in a block.
+            directory (str): optional, a directory to save the blocks in. By default the blocks are kept in memory.
+        
+        Returns:
+            ChunkedArray: The chunked array.
+        
+        Raises:
+            ValueError: If the array has no dimensions, or chunk_size is not a positive int.
+        """
+        if len(array._shape) == 0:
+            raise ValueError("Can not chunk an array without dimensions")
+        cls._check_chunk_size(chunk_size)
+        
+        blocks = [array[start:start + chunk_size] for start in range(0, array._shape[0], chunk_size)]
+        return cls._from_blocks(array._shape, chunk_size, blocks, directory)
+    
+    
+    @classmethod
+    def from_iterable(cls, iterable, shape, chunk_size, directory=None, compact=False):
+        """
+        Makes a chunked array of the values from an iterable (e.g. a generator reading a large file),
+        one block at a time, so the whole array is never in memory.
+        
+        Args:
+            iterable (iterable): The values, in row-major order.
+            shape (tuple): The shape of the array, with at least one dimension.
+            chunk_size (int): The number of rows in a block.
+            directory (str): optional, a directory to save the blocks in. By default the blocks are kept in memory.
+            compact (bool): optional, if True the blocks are compact arrays.
+        
+        Returns:
+            ChunkedArray: The chunked array.
+        
         Raises:
-            ValueError: If the values are not all of the same type.
-            ValueError: If the number of values does not fit with the shape.
+            ValueError: If the number of values does not fit with the shape, or chunk_size is not valid.
         """
-        #Define the shape and the array as a flat array
-        self._shape = shape
-        self._array = values
+        shape = tuple(shape)
+        if len(shape) == 0:
+            raise ValueError("Can not chunk an array without dimensions")
+        cls._check_chunk_size(chunk_size)
         
-        #Sets with vaild types of values 
-        self._valid_types = {int, float, bool}
-        self._valid_numerical_types = {int, float}
-        
-        #Check if number of items fits the given shape (works for nD arrays)
-        sum_of_items = reduce(lambda x, y: x*y, self._shape)
-        if sum_of_items != len(self._array):
-            raise ValueError("Number of values (" + str(len(self._array)) + 
-                             ") does not fit with the shape (" + str(self._shape) + ").")
-                  
-        # Check if the values are of valid type
-        my_types = set()
-        
-        for item in self._array: 
-            if type(item) in self._valid_types:
-                my_types.add(type(item))
-                
-                if len(my_types) > 1:
-                    raise ValueError("Values are not all of the same type")       
-            else:
-                raise ValueError("Array contains unvalid type of value")       
+        iterator = iter(iterable)
+        row_size = math.prod(shape[1:])
+        blocks = []
+        for start in range(0, shape[0], chunk_size):
+            block_shape = (min(chunk_size, shape[0] - start),) + shape[1:]
+            values = tuple(islice(iterator, block_shape[0] * row_size))
+            if len(values) != block_shape[0] * row_size:
+                raise ValueError("Too few values for the shape " + str(shape) + ".")
+            block = Array(block_shape, *values, compact=compact)
+            blocks.append(cls._save_block(block, len(blocks), directory))
         
-        # Optional: If not all values are of same type, all are converted to floats.
-            
+        if next(iterator, None) is not None:
+            raise ValueError("Too many values for the shape " + str(shape) + ".")
         
-    def __str__(self):
-                        
-        """Returns a nicely printable string representation of the array.
-
-        Returns:
-            str: A string representation of the array.
-
-        """ 
-        #Save time if the array is 1D, nD arrays needs to show correct shape
-        if len(self._shape) == 1:
-            shaped_array = self._array
-        else:
-            shaped_array = self._build_array(self._shape, list(self._array))
-            
-        return str(shaped_array)
+        return cls(shape, chunk_size, blocks)
     
     
-    def __getitem__(self, item):
+    @staticmethod
+    def _check_chunk_size(chunk_size):
+        """Raises ValueError if chunk_size is not a positive int."""
+        if type(chunk_size) != int or chunk_size < 1:
+            raise ValueError("chunk_size must be a positive int, not " + str(chunk_size))
+    
+    
+    @staticmethod
+    def _save_block(block, index, directory):
         """
-        Returns value of item in array.
-         Args:
-            item (int): Index of value to return.
-         Returns: 
-            value: Value of the given item.
-            
-        """ 
-        #Save time if the array is 1D, nD arrays needs to show correct shape
-        if len(self._shape) == 1:
-            shaped_array = self._array
-        else:
-            shaped_array = self._build_array(self._shape, list(self._array))
+        Returns the task for a block, saving the block to directory if it is given.
         
-        return shaped_array[item]
-             
-    
-    def __add__(self, other):
-        """Element-wise adds Array with another Array or number.
-
-        If the method does not support the operation with the supplied arguments
-        (specific data type or shape), it should return NotImplemented.
-
         Args:
-            other (Array, float, int): The array or number to add element-wise to this array.
-
-        Returns:
-            Array: the sum as a new array.
-
-        """
+            block (Array): The block.
+            index (int): The number of the block.
+            directory (str): The directory, or None to keep the block in memory.
         
-        # check that the method supports the given arguments (check for data type and shape of array)  
-         
-        new_array = Array((0,))
+        Returns:
+            tuple: The task.
         
-        if type(other) in self._valid_numerical_types:
-            new_values = tuple(map(lambda x: x + other, self._array))
-
-        elif type(other) == Array:
-            if self._shape == other._shape: 
-                new_values = tuple(map(lambda x, y: x + y, self._array, other._array))
-
-            else:
-                raise ValueError("Shapes does not match, ", self._shape, other._shape, ".")
-        else: 
-            return NotImplemented
-            
-        new_array._shape = self._shape
-        new_array._array = new_values
-               
-        return new_array
+        Raises:
+            ValueError: If the file of the block already exists (it may be a block of another chunked array).
+        """
+        if directory is None:
+            return ("array", block)
+        filename = os.path.join(directory, "block" + str(index) + ".arr")
+        if os.path.exists(filename):
+            raise ValueError(filename + " already exists")
+        block.save(filename)
+        return ("file", filename)
     
-    def __radd__(self, other):
-        """Element-wise adds Array with another Array or number.
-
-        If the method does not support the operation with the supplied arguments
-        (specific data type or shape), it should return NotImplemented.
+    
+    @classmethod
+    def _from_blocks(cls, shape, chunk_size, blocks, directory):
+        """Returns a chunked array of computed blocks, kept in memory or saved to directory."""
+        return cls(shape, chunk_size, [cls._save_block(block, i, directory) for i, block in enumerate(blocks)])
+    
+    
+    @property
+    def shape(self):
+        """tuple: The shape of the array."""
+        return self._shape
+    
+    
+    @property
+    def chunk_size(self):
+        """int: The number of rows in a block."""
+        return self._chunk_size
+    
+    
+    @property
+    def n_blocks(self):
+        """int: The number of blocks."""
+        return len(self._blocks)
+    
+    
+    def block(self, index):
+        """Computes one block.
 
         Args:
-            other (Array, float, int): The array or number to add element-wise to this array.
+            index (int): The number of the block.
 
         Returns:
-            Array: the sum as a new array.
+            Array: The block, with shape (rows in the block,) + shape[1:].
 
-        """                
-        return self.__add__(other)
+        """
+        return self._run(self._blocks[index], {})
     
     
-    def __sub__(self, other):
-        """Element-wise subtracts an Array or number from this Array.
-
-        If the method does not support the operation with the supplied arguments
-        (specific data type or shape), it should return NotImplemented.
-
-        Args:
-            other (Array, float, int): The array or number to subtract element-wise from this array.
+    def iter_blocks(self):
+        """Computes the blocks one at a time.
 
         Returns:
-            Array: the difference as a new array.
+            generator: The blocks (Arrays), in order.
 
         """
+        for task in self._blocks:
+            yield self._run(task, {})
+    
+    
+    def _run(self, task, results):
+        """
+        Runs the task graph of a block.
         
-        new_array = Array((0,))
+        Args:
+            task (tuple): The task.
+            results (dict): The results of the tasks run so far for this block, by id of the task, 
+                            so a block used several times in the graph is only computed (or loaded) once.
         
-        if type(other) in self._valid_numerical_types:
-            new_values = n4 = tuple(map(lambda x: x - other, self._array))
-            
-        elif type(other) == Array:
-            if self._shape == other._shape:
-                new_values = tuple(map(lambda x, y: x - y, self._array, other._array))
-                
-            else:
-                raise ValueError("Shapes does not match, ", self._shape, other._shape, ".")
-        else: 
-            return NotImplemented 
+        Returns:
+            The result of the task.
+        """
+        if id(task) in results:
+            return results[id(task)][1]
         
-        new_array._shape = self._shape
-        new_array._array = new_values
-               
-        return new_array
+        if task[0] in ("array", "const"):
+            result = task[1]
+        elif task[0] == "file":
+            result = Array.open_memmap(task[1], "r")
+        else:
+            _, function, arguments = task
+            result = function(*[self._run(argument, results) for argument in arguments])
+        
+        #The task is kept with the result, so its id is not reused while the block is run
+        results[id(task)] = (task, result)
+        return result
     
     
-    def __rsub__(self, other):
-        """Element-wise subtracts this Array from a number or Array.
-
-        If the method does not support the operation with the supplied arguments
-        (specific data type or shape), it should return NotImplemented.
+    def store(self, directory=None):
+        """Computes the blocks one at a time, and keeps them in memory or saves them to a directory.
 
         Args:
-            other (Array, float, int): The array or number being subtracted from.
+            directory (str): optional, a directory to save the blocks in. By default the blocks are kept in memory.
 
         Returns:
-            Array: the difference as a new array.
+            ChunkedArray: A chunked array of the computed blocks.
 
         """
-        return self.__sub__(other)
+        blocks = [self._save_block(block, i, directory) for i, block in enumerate(self.iter_blocks())]
+        return ChunkedArray(self._shape, self._chunk_size, blocks)
     
     
-    def __mul__(self, other):
-        """Element-wise multiplies this Array with a number or array.
+    def compute(self):
+        """Computes the whole array, which must fit in memory.
 
-        If the method does not support the operation with the supplied arguments
-        (specific data type or shape), it should return NotImplemented.
+        Returns:
+            Array: The array.
 
+        """
+        blocks = list(self.iter_blocks())
+        values = tuple(chain.from_iterable(block._flat() for block in blocks))
+        if values and all(block.is_compact() for block in blocks):
+            values = _pack(values, _TYPECODES[type(values[0])])
+        return Array._from_values(self._shape, values)
+    
+    
+    def _rows(self, index):
+        """Returns the slice of rows (along the first axis) in block index."""
+        return slice(index * self._chunk_size, min((index + 1) * self._chunk_size, self._shape[0]))
+    
+    
+    def _operand_blocks(self, other, shape):
+        """
+        Returns the task of other for every block of a result with the given shape.
+        
         Args:
-            other (Array, float, int): The array or number to multiply element-wise to this array.
-
+            other (ChunkedArray, Array, float, int): The other operand.
+            shape (tuple): The broadcast shape of the result.
+        
         Returns:
-            Array: a new array with every element multiplied with `other`.
-
+            list: The tasks, or None if other is not supported.
+        
+        Raises:
+            ValueError: If other is not chunked as this array, or is broadcast along the first axis.
         """
-         
-        new_array = Array((0,))
+        if type(other) in {int, float}:
+            return [("const", other)] * len(self._blocks)
         
-        if type(other) in self._valid_numerical_types:
-            new_values = tuple(map(lambda x: x * other, self._array))
-        elif type(other) == Array:
-            if self._shape == other._shape: 
-                new_values = tuple(map(lambda x, y: x * y, self._array, other._array))
-
-            else:
-                raise ValueError("Shapes does not match, ", self._shape, other._shape, ".")
-        else: 
+        if type(other) == Array:
+            #Arrays without the first axis (or of length 1) are broadcast against every block
+            if len(other._shape) < len(shape) or other._shape[0] == 1:
+                return [("array", other)] * len(self._blocks)
+            return [("array", other[self._rows(i)]) for i in range(len(self._blocks))]
+        
+        if type(other) == ChunkedArray:
+            if (len(other._shape) != len(shape) or other._chunk_size != self._chunk_size or 
+                    other._shape[0] != self._shape[0] or len(other._blocks) != len(self._blocks)):
+                raise ValueError("Chunks does not match, " + str(other._shape) + " in blocks of " + 
+                                 str(other._chunk_size) + " rows and " + str(self._shape) + 
+                                 " in blocks of " + str(self._chunk_size) + " rows.")
+            return other._blocks
+        
+        return None
+    
+    
+    def _elementwise(self, other, function):
+        """
+        Applies a function of two Arrays (or an Array and a number) to every block of this array and other.
+        
+        Args:
+            other (ChunkedArray, Array, float, int): The other operand, broadcast as for Arrays, 
+                                                     except along the first axis.
+            function (callable): Function of two operands, e.g. operator.add.
+        
+        Returns:
+            ChunkedArray: The (not computed) result, or NotImplemented if other is not supported.
+        
+        Raises:
+            ValueError: If the shapes can not be broadcast together, or the result would be 
+                        broadcast along the first axis.
+        """
+        shape = self._shape
+        if type(other) in (Array, ChunkedArray):
+            shape = _broadcast_shapes(self._shape, other._shape)
+            if len(shape) != len(self._shape) or shape[0] != self._shape[0]:
+                raise ValueError("Shapes does not match, a chunked array " + str(self._shape) + 
+                                 " can not be broadcast to " + str(shape) + ".")
+        
+        other_blocks = self._operand_blocks(other, shape)
+        if other_blocks is None:
             return NotImplemented
-            
-        new_array._shape = self._shape
-        new_array._array = new_values
-               
-        return new_array
+        
+        blocks = [("call", function, (block, other_block)) for block, other_block in zip(self._blocks, other_blocks)]
+        return ChunkedArray(shape, self._chunk_size, blocks)
     
     
+    def __add__(self, other):
+        """Element-wise adds a chunked array, Array or number, see Array.__add__."""
+        return self._elementwise(other, operator.add)
+    
+    def __radd__(self, other):
+        """Element-wise adds an Array or number, see Array.__radd__."""
+        return self._elementwise(other, lambda block, other_block: other_block + block)
+    
+    def __sub__(self, other):
+        """Element-wise subtracts a chunked array, Array or number, see Array.__sub__."""
+        return self._elementwise(other, operator.sub)
+    
+    def __rsub__(self, other):
+        """Element-wise subtracts from an Array or number, see Array.__rsub__."""
+        return self._elementwise(other, lambda block, other_block: other_block - block)
+    
+    def __mul__(self, other):
+        """Element-wise multiplies with a chunked array, Array or number, see Array.__mul__."""
+        return self._elementwise(other, operator.mul)
+    
     def __rmul__(self, other):
-        """Element-wise multiplies this Array with a number or array.
-
-        If the method does not support the operation with the supplied arguments
-        (specific data type or shape), it should return NotImplemented.
-
-        Args:
-            other (Array, float, int): The array or number to multiply element-wise to this array.
+        """Element-wise multiplies with an Array or number, see Array.__rmul__."""
+        return self._elementwise(other, lambda block, other_block: other_block * block)
+    
+    def __lt__(self, other):
+        """Element-wise less than, see Array.__lt__."""
+        return self._elementwise(other, operator.lt)
+    
+    def __le__(self, other):
+        """Element-wise less than or equal, see Array.__le__."""
+        return self._elementwise(other, operator.le)
+    
+    def __gt__(self, other):
+        """Element-wise greater than, see Array.__gt__."""
+        return self._elementwise(other, operator.gt)
+    
+    def __ge__(self, other):
+        """Element-wise greater than or equal, see Array.__ge__."""
+        return self._elementwise(other, operator.ge)
+    
+    
+    def is_equal(self, other):
+        """Compares element-wise with a chunked array, Array or number, see Array.is_equal.
 
         Returns:
-            Array: a new array with every element multiplied with `other`.
+            ChunkedArray: The (not computed) booleans.
+
+        Raises:
+            TypeError: If other is not a chunked array, Array or number.
+            ValueError: If the shapes are not equal.
 
         """
- 
-        # Hint: this solution/logic applies for all r-methods
-        return self.__mul__(other)
+        if type(other) not in {int, float, Array, ChunkedArray}:
+            raise TypeError("Type is not supported")
+        if type(other) in (Array, ChunkedArray) and self._shape != other._shape:
+            raise ValueError("Shapes does not match, ", self._shape, other._shape, ".")
+        return self._elementwise(other, Array.is_equal)
     
     
     def __eq__(self, other):
-        """Compares an Array with another Array.
-
-        If the two array shapes do not match, it should return False.
-        If `other` is an unexpected type, return False.
-
-        Args:
-            other (Array): The array to compare with this array.
+        """Compares with a chunked array or Array block by block, see Array.__eq__.
 
         Returns:
-            bool: True if the two arrays are equal (identical). False otherwise.
+            bool: True if the shapes and all the values are equal.
 
         """
-        
-        if (type(other) == Array) and (self._shape == other._shape) and (self._array == other._array): 
-            return True 
-        else:
-            return False 
-
-        
-
-    def is_equal(self, other):
-        """Compares an Array element-wise with another Array or number.
-
-        If `other` is an array and the two array shapes do not match, this method should raise ValueError.
-        If `other` is not an array or a number, it should return TypeError.
+        if type(other) not in (Array, ChunkedArray) or self._shape != other._shape:
+            return False
+        try:
+            other_blocks = self._operand_blocks(other, self._shape)
+        except ValueError:
+            return self.compute() == other.compute()
+        return all(self._run(block, {}) == self._run(other_block, {}) 
+                   for block, other_block in zip(self._blocks, other_blocks))
+    
+    
+    def __getitem__(self, item):
+        """Returns a row (or a value) from the block it is in, see Array.__getitem__.
 
         Args:
-            other (Array, float, int): The array or number to compare with this array.
+            item (int, tuple): The index of the row, or a tuple of indices starting with the row.
 
         Returns:
-            Array: An array of booleans with True where the two arrays match and False where they do not.
-                   Or if `other` is a number, it returns True where the array is equal to the number and False
-                   where it is not.
+            Array, float, int or bool: The row or value.
 
         Raises:
-            ValueError: if the shape of self and other are not equal.
+            IndexError: If the row is out of range, or item does not start with an int.
 
         """
-        if not (type(other) in self._valid_numerical_types or type(other) == Array):
-            raise TypeError("Type is not supported")
-            
-        if type(other) == Array and self._shape != other._shape:
-            raise ValueError("Shapes does not match, ", self._shape, other._shape, ".")
-                    
-        new_array = Array((0,))
-        
-        if type(other) in self._valid_numerical_types:
-            new_values = tuple(map(lambda x: x == other, self._array))
-                    
-        elif type(other) == Array:
-            new_values = tuple(map(lambda x, y: x == y, self._array, other._array))
-      
+        row, rest = (item[0], item[1:]) if type(item) == tuple else (item, ())
+        if type(row) != int:
+            raise IndexError("Chunked arrays can only be indexed with an int along the first axis")
+        if row < 0:
+            row += self._shape[0]
+        if not 0 <= row < self._shape[0]:
+            raise IndexError("Index " + str(item) + " is out of range.")
         
-        new_array._shape = self._shape
-        new_array._array = new_values
-        
-        return new_array
+        block = self.block(row // self._chunk_size)
+        return block[(row % self._chunk_size,) + rest] if rest else block[row % self._chunk_size]
     
+    
+    def sum(self, axis=None):
+        """Returns the sum of the values, or the sums along an axis, see Array.sum.
 
-    def min_element(self):
-        """Returns the smallest value of the array.
+        Returns:
+            int, float, Array or ChunkedArray: The sum, the sums (an Array) along the first axis, 
+                                               or the (not computed) sums along another axis.
 
-        Only needs to work for type int and float (not boolean).
+        """
+        return self._reduce(axis, Array.sum, sum, operator.add)
+    
+    
+    def min(self, axis=None):
+        """Returns the smallest value, or the smallest values along an axis, see Array.min.
 
-        Returns:
-            float: The value of the smallest element in the array.
+        Raises:
+            ValueError: If the array is empty.
 
         """
-        if self._shape[0] == 0:
-            raise ValueError("() is an empty Array")
-        elif not (type(self._array[0]) in self._valid_numerical_types):
-            raise ValueError("Array does not contain numerical values")
-        else:
-            return float(min(self._array))
+        return self._reduce(axis, Array.min, min, lambda a, b: Array.where(b < a, b, a))
+    
+    
+    def max(self, axis=None):
+        """Returns the largest value, or the largest values along an axis, see Array.max.
+
+        Raises:
+            ValueError: If the array is empty.
 
+        """
+        return self._reduce(axis, Array.max, max, lambda a, b: Array.where(b > a, b, a))
     
-        
-    def _build_array(self, shape_array, flat_list):
+    
+    def mean(self, axis=None):
+        """Returns the mean of the values, or the means along an axis, see Array.mean.
+
+        Raises:
+            ValueError: If the array (or the axis) is empty.
+
         """
-        Returns flat_list as a nested tuple with shape described by shape_array
-        shape_array must match number of items in flat list. 
-        
-        (We can assume that the input is correct because this method should only be called inside the class Array) 
+        axis = None if axis is None else Array._normalize_axis(self, axis)
+        if axis is None or axis == 0:
+            n = math.prod(self._shape) if axis is None else self._shape[0]
+            if n == 0:
+                raise ValueError("() is an empty Array")
+            total = self.sum(axis)
+            if type(total) == Array:
+                return Array._from_values(total._shape, tuple(value / n for value in total._flat()))
+            return total / n
+        return self._reduce(axis, Array.mean, None, None)
+    
+    
+    def _reduce(self, axis, block_reducer, reducer, combine):
+        """
+        Reduces the array, block by block.
         
         Args:
-            shape_array (tulpe): The shape the funcion shuld return 
-            flat_list (list): The array in list-form
-            
-        Returns (tulple): A tulpe with the elements in flat_list shaped in the dimentions of shape_array. 
-       
+            axis (int): The axis to reduce, or None to reduce all values.
+            block_reducer (callable): The Array method reducing a block, e.g. Array.sum.
+            reducer (callable): Function reducing the results of the blocks (for all values), e.g. sum.
+            combine (callable): Function combining the results of two blocks along the first axis.
+        
+        Returns:
+            The result. Along the first axis an Array (or a value for 1D arrays), 
+            along other axes a (not computed) ChunkedArray.
+        
+        Raises:
+            ValueError: If the axis is not valid, or the array is empty (except for sums).
         """
-
-        shaped = []
-        for _ in range(shape_array[0]):
-            if len(shape_array) == 1: 
-                shaped.append(flat_list.pop(0))
-            else:
-                shaped.append(self._build_array(shape_array[1:], flat_list))
-        return tuple(shaped)
\ No newline at end of file
+        if axis is not None:
+            axis = Array._normalize_axis(self, axis)
+        if axis == 0 and len(self._shape) == 1:
+            axis = None
+        
+        if axis is not None and axis > 0:
+            blocks = [("call", block_reducer, (block, ("const", axis))) for block in self._blocks]
+            return ChunkedArray(self._shape[:axis] + self._shape[axis + 1:], self._chunk_size, blocks)
+        
+        results = [block_reducer(block, axis) for block in self.iter_blocks() if block._size]
+        if not results:
+            if block_reducer is not Array.sum:
+                raise ValueError("() is an empty Array")
+            return Array.zeros(self._shape[1:], int) if axis == 0 else 0
+        
+        if axis is None:
+            return reducer(results)
+        result = results[0]
+        for other in results[1:]:
+            result = combine(result, other)
+        return result
+    
+    
+    def __str__(self):
+        """Returns a short description of the chunked array (the values are not computed)."""
+        return "ChunkedArray(shape=" + str(self._shape) + ", blocks of " + str(self._chunk_size) + \
+               " rows, " + str(len(self._blocks)) + " blocks)"
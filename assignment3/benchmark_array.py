@@ -0,0 +1,292 @@
+"""
+Benchmarks for the class Array.
+
+Run from this directory with:
+
+    python benchmark_array.py ops --sizes 10 1000 100000 --output ops.json
+    python benchmark_array.py matmul --sizes 64 256 1024 --output matmul.json
+
+`ops` times the basic operations of Array for 1D and nD (2D) arrays, and the same
+operations on (nested) lists and numpy arrays (if numpy is installed) as baselines.
+`matmul` times matrix multiplication against a naive triple loop.
+The results are written as JSON, so runs on different versions and machines can be compared.
+
+Note that the slow cases (e.g. pure python matrix multiplication of 1024x1024 matrices)
+takes minutes. In `ops`, a case is skipped for the larger sizes once it takes longer than --budget.
+"""
+import argparse
+import datetime
+import json
+import platform
+import random
+import time
+
+import array
+
+
+def best_time(function, repeat):
+    """
+    Returns the best runtime of function over a number of runs.
+
+    Args:
+        function (callable): function without arguments to time.
+        repeat (int): number of runs.
+
+    Returns:
+        float: the fastest runtime in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def naive_matmul(a, b, n):
+    """
+    Multiplies two n x n matrices, given as flat lists in row-major order, with a naive triple loop.
+
+    Args:
+        a (list): the first matrix.
+        b (list): the second matrix.
+        n (int): the size of the matrices.
+
+    Returns:
+        list: the product as a flat list.
+    """
+    result = [0.0] * (n * n)
+    for i in range(n):
+        for j in range(n):
+            value = 0.0
+            for k in range(n):
+                value += a[i * n + k] * b[k * n + j]
+            result[i * n + j] = value
+    return result
+
+
+def benchmark_matmul(sizes, repeat):
+    """
+    Times matrix multiplication of random n x n matrices for every n in sizes.
+
+    Compares a naive triple loop with Array.dot (blocked, pure python) and,
+    if numpy is installed, Array.dot on compact arrays (numpy on the buffers).
+
+    Args:
+        sizes (list): the sizes of the matrices.
+        repeat (int): number of runs, the best runtime is reported.
+
+    Returns:
+        list: one dict for each size and implementation, with the runtime in seconds.
+    """
+    results = []
+    for n in sizes:
+        values_a = [random.random() for _ in range(n * n)]
+        values_b = [random.random() for _ in range(n * n)]
+        a = array.Array.from_iterable(values_a, (n, n))
+        b = array.Array.from_iterable(values_b, (n, n))
+
+        cases = {"naive": lambda: naive_matmul(values_a, values_b, n), "Array": lambda: a @ b}
+        if array._numpy() is not None:
+            a_compact, b_compact = a.compact(), b.compact()
+            cases["Array (buffer)"] = lambda: a_compact @ b_compact
+
+        for implementation, function in cases.items():
+            results.append({"operation": "matmul", "shape": [n, n], "size": n * n,
+                            "implementation": implementation, "seconds": best_time(function, repeat)})
+    return results
+
+
+def nd_shape(size):
+    """
+    Returns the 2D shape used for the nD benchmarks of an array with size values.
+
+    Args:
+        size (int): the number of values, a power of 10.
+
+    Returns:
+        tuple: the shape (rows, columns), as square as possible.
+    """
+    rows = 10 ** (len(str(size)) // 2)
+    return (rows, size // rows)
+
+
+def iterate(values):
+    """
+    Iterates over every value of an array, list or numpy array (also nested ones), as a user would.
+
+    Args:
+        values (Array, list, numpy.ndarray): the values.
+    """
+    for value in values:
+        if not isinstance(value, (int, float, bool)) and type(value).__module__ != "numpy":
+            iterate(value)
+
+
+def make_cases(shape, values, indices, repeat_index=1000):
+    """
+    Returns the benchmark cases for one shape, for Array, lists and numpy (if installed).
+
+    Args:
+        shape (tuple): the shape of the arrays.
+        values (list): the values, in row-major order.
+        indices (list): random indices (one tuple per lookup) for the indexing case.
+        repeat_index (int): number of lookups in the indexing case.
+
+    Returns:
+        dict: {implementation: {operation: function without arguments}}
+    """
+    a = array.Array(shape, *values)
+    b = array.Array(shape, *values)
+
+    if len(shape) == 1:
+        lst = list(values)
+        other = list(values)
+        get = lambda index: lst[index[0]]
+    else:
+        lst = [values[i * shape[1]:(i + 1) * shape[1]] for i in range(shape[0])]
+        other = [list(row) for row in lst]
+        get = lambda index: lst[index[0]][index[1]]
+
+    flat = lambda nested: nested if len(shape) == 1 else [value for row in nested for value in row]
+
+    cases = {
+        "Array": {
+            "construction": lambda: array.Array(shape, *values),
+            "indexing": lambda: [a[index] for index in indices],
+            "iteration": lambda: iterate(a),
+            "add": lambda: a + b,
+            "mul": lambda: a * 2,
+            "is_equal": lambda: a.is_equal(b),
+            "eq": lambda: a == b,
+            "str": lambda: str(a),
+            "min_element": lambda: a.min_element(),
+        },
+        "list": {
+            "construction": lambda: list(values),
+            "indexing": lambda: [get(index) for index in indices],
+            "iteration": lambda: iterate(lst),
+            "add": lambda: [x + y for x, y in zip(flat(lst), flat(other))],
+            "mul": lambda: [x * 2 for x in flat(lst)],
+            "is_equal": lambda: [x == y for x, y in zip(flat(lst), flat(other))],
+            "eq": lambda: lst == other,
+            "str": lambda: str(lst),
+            "min_element": lambda: float(min(flat(lst))),
+        },
+    }
+
+    np = array._numpy()
+    if np is not None:
+        a_np = np.array(values).reshape(shape)
+        b_np = np.array(values).reshape(shape)
+        cases["numpy"] = {
+            "construction": lambda: np.array(values).reshape(shape),
+            "indexing": lambda: [a_np[index] for index in indices],
+            "iteration": lambda: iterate(a_np),
+            "add": lambda: a_np + b_np,
+            "mul": lambda: a_np * 2,
+            "is_equal": lambda: a_np == b_np,
+            "eq": lambda: np.array_equal(a_np, b_np),
+            "str": lambda: str(a_np),
+            "min_element": lambda: float(a_np.min()),
+        }
+    return cases
+
+
+def benchmark_ops(sizes, repeat, budget):
+    """
+    Times the basic operations of Array, lists and numpy for 1D and nD arrays of every size.
+
+    A case (implementation, operation and dimensions) is skipped for the larger sizes
+    once its runtime is longer than budget, as the slow cases would take hours for 10^7 values.
+
+    Args:
+        sizes (list): the number of values in the arrays.
+        repeat (int): number of runs, the best runtime is reported.
+        budget (float): runtime in seconds after which a case is skipped for larger sizes.
+
+    Returns:
+        list: one dict for each case and size, with the runtime in seconds (None if skipped).
+    """
+    results = []
+    too_slow = set()
+
+    for size in sizes:
+        values = [random.random() for _ in range(size)]
+        for dimensions, shape in (("1D", (size,)), ("nD", nd_shape(size))):
+            indices = [tuple(random.randrange(n) for n in shape) for _ in range(1000)]
+            cases = make_cases(shape, values, indices)
+
+            for implementation, operations in cases.items():
+                for operation, function in operations.items():
+                    case = (implementation, operation, dimensions)
+                    seconds = None
+                    if case not in too_slow:
+                        seconds = best_time(function, repeat)
+                        if seconds > budget:
+                            too_slow.add(case)
+
+                    results.append({"operation": operation, "dimensions": dimensions, "shape": list(shape),
+                                    "size": size, "implementation": implementation, "seconds": seconds})
+    return results
+
+
+def write_results(results, benchmark, filename):
+    """
+    Writes benchmark results to a JSON file, with information about the machine.
+
+    Args:
+        results (list): the results.
+        benchmark (str): name of the benchmark.
+        filename (str): filename or path of the JSON file.
+    """
+    np = array._numpy()
+    report = {
+        "benchmark": benchmark,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__ if np is not None else None,
+        "machine": platform.platform(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+    with open(filename, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def print_results(results):
+    """
+    Prints a table of benchmark results.
+
+    Args:
+        results (list): the results.
+    """
+    for result in results:
+        seconds = "skipped" if result["seconds"] is None else "{:.6f} s".format(result["seconds"])
+        print("{:<14}{:<4}{:>10}  {:<16}{}".format(result["operation"], result.get("dimensions", ""),
+                                                  result["size"], result["implementation"], seconds))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmarks for the class Array")
+    parser.add_argument("benchmark", choices=("ops", "matmul"),
+                        help="ops: basic operations against lists and numpy, matmul: matrix multiplication")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None,
+                        help="Number of values (ops, default: 10 100 ... 10^7) or "
+                             "size of the square matrices (matmul, default: 64 256 1024)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of runs, the best runtime is reported (default: 3)")
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="ops: skip a case for larger sizes once it takes longer (seconds, default: 10)")
+    parser.add_argument("--output", type=str, default=None,
+                        help="The JSON file to write the results to (default: benchmark_<benchmark>.json)")
+    args = parser.parse_args()
+
+    if args.benchmark == "ops":
+        results = benchmark_ops(args.sizes or [10 ** d for d in range(1, 8)], args.repeat, args.budget)
+    else:
+        results = benchmark_matmul(args.sizes or [64, 256, 1024], args.repeat)
+
+    print_results(results)
+    write_results(results, args.benchmark, args.output or "benchmark_" + args.benchmark + ".json")
@@ -1,5 +1,11 @@
+import math
+import os
+import random
+
 import array
 
+import pytest
+
 
 A1 = array.Array((4,), 1, -2, 3, -4)
 A2 = array.Array((4,), 4.5, 3.5, 2.5, 1.5)
@@ -93,10 +99,677 @@ def test_min_element():
 def test_get_item():
     #Test get_item 
     assert A1[0] == 1
-    assert B[1] == (3, -4)
+    assert B[1] == array.Array((2,), 3, -4)
     assert B[1][0] == 3
-    assert B2[1] == (-4, 5, -6)
+    assert B2[1] == array.Array((3,), -4, 5, -6)
     assert B2[1][0] == -4
-    assert C[1][2][1] == 12 
+    assert C[1][2][1] == 12
+    
+    #Test indexing with one index per dimension and negative indices
+    assert B[1, 0] == 3
+    assert B[-1, -1] == -6
+    assert A1[-1] == -4
+    assert C[1, 2, 1] == 12
+    assert C[-1, 0] == array.Array((2,), 7, 8)
+    assert C[1][-1] == array.Array((2,), 11, 12)
+    assert str(C[0]) == "((1, 2), (3, 4), (5, 6))"
+    
+    
+def test_get_item_errors():
+    #Test that invalid indices raises IndexError 
+    with pytest.raises(IndexError):
+        A1[4]
+    with pytest.raises(IndexError):
+        B[0, -3]
+    with pytest.raises(IndexError):
+        B[0, 0, 0] 
+
+    
 
+
+def test_compact():
+    #Test that compact arrays behaves like arrays stored as tuples
+    B_compact = array.Array((3, 2), 1, -2, 3, -4, 5, -6, compact=True)
+    assert B_compact.is_compact() and not B.is_compact()
+    assert B_compact == B
+    assert B_compact[1] == array.Array((2,), 3, -4)
+    assert str(B_compact) == str(B)
+    assert B_compact + 10 == B + 10
+    assert A2.compact() == A2
+    
+    #Test the typecodes and the exported buffer
+    assert A1.compact().data.format == "q"
+    assert A2.compact().data.format == "d"
+    assert array.Array((2,), True, False, compact=True).data.format == "?"
+    assert B_compact.data.shape == (3, 2)
+    assert B_compact.data.tolist() == [[1, -2], [3, -4], [5, -6]]
+    assert B_compact[2].data.tolist() == [5, -6]
+    
+    #Writes through the buffer of a compact array changes the array
+    B_compact.data[0, 0] = 7
+    assert B_compact[0, 0] == 7
+    
+    with pytest.raises(ValueError):
+        array.Array((1,), 2**70, compact=True)
+
+
+def test_broadcasting():
+    #Test broadcasting a row, a column and a single value to a matrix
+    row = array.Array((2,), 10, 20)
+    column = array.Array((3, 1), 1, 2, 3)
+    assert B + row == array.Array((3, 2), 11, 18, 13, 16, 15, 14)
+    assert row + B == array.Array((3, 2), 11, 18, 13, 16, 15, 14)
+    assert B - column == array.Array((3, 2), 0, -3, 1, -6, 2, -9)
+    assert B * column == array.Array((3, 2), 1, -2, 6, -8, 15, -18)
+    assert B * array.Array((1,), 2) == B * 2
+    
+    #Test broadcasting both operands and a 3D array
+    assert column + row == array.Array((3, 2), 11, 21, 12, 22, 13, 23)
+    assert C + array.Array((3, 1), 0, 10, 20) == array.Array((2, 3, 2), 1, 2, 13, 14, 25, 26, 7, 8, 19, 20, 31, 32)
+    
+    #Test broadcasting with views
+    assert B[0] + B == array.Array((3, 2), 2, -4, 4, -6, 6, -8)
+    
+    with pytest.raises(ValueError):
+        B + array.Array((3,), 1, 2, 3)
+    with pytest.raises(ValueError):
+        B.is_equal(row)
+
+
+def test_lazy():
+    #Test that lazy expressions gives the same results as evaluating each operator
+    row = array.Array((2,), 10, 20)
+    lazy_B = B.lazy() * 2 + row - B
+    assert type(lazy_B) == array.LazyArray
+    assert lazy_B == B * 2 + row - B
+    assert lazy_B[1] == array.Array((2,), 13, 16)
+    assert lazy_B[2, 1] == 14
+    assert str(lazy_B) == str(B * 2 + row - B)
+    assert lazy_B.min_element() == 11
+    assert type(lazy_B.evaluate()) == array.Array
+    
+    #Test the reflected operators and numbers
+    assert 10 + A1.lazy() == 10 + A1
+    assert 10 - A1.lazy() == 10 - A1
+    assert A2 - A1.lazy() == A2 - A1
+    assert 2 * (A1.lazy() * A1) == 2 * (A1 * A1)
+    assert A1.lazy().is_equal(-2) == A1.is_equal(-2)
+    
+    #In-place operators on lazy arrays extends the expression
+    lazy_A1 = A1.lazy()
+    lazy_A1 += A1
+    assert type(lazy_A1) == array.LazyArray
+    assert lazy_A1 == A1 * 2
+    
+    #out= evaluates the expression into an existing array
+    buffer = array.Array.zeros(B.shape, dtype=int, compact=True)
+    storage = buffer._array
+    assert (B.lazy() * 2).__add__(row, out=buffer) is buffer
+    assert buffer == B * 2 + row
+    assert buffer._array is storage
+    with pytest.raises(ValueError):
+        B.lazy().__mul__(2, out=array.Array.zeros((2,), dtype=int))
+    
+    with pytest.raises(ValueError):
+        B.lazy() + A1
+
+
+def test_in_place():
+    #Test that in-place operators writes into the storage of compact arrays
+    D = array.Array((3, 2), 1, -2, 3, -4, 5, -6, compact=True)
+    storage = D._array
+    row = D[1]
+    D += 10
+    D -= array.Array((2,), 1, 1)
+    D *= 2
+    assert D == (B + 10 - 1) * 2
+    assert D._array is storage
+    assert row == array.Array((2,), 24, 10)
+    
+    #Writing floats to an int array gives the array new storage
+    D += 0.5
+    assert D[0, 0] == 20.5
+    assert D.data.format == "d"
+    
+    #Test in-place operators on arrays stored as tuples
+    E = array.Array((4,), 1, -2, 3, -4)
+    E += A1
+    assert E == A1 * 2
+    
+    with pytest.raises(ValueError):
+        E += B
+    
+    #Views writes through to the array, or raise if the storage is a tuple
+    F = array.Array((4,), 4, 3, 2, 1, compact=True)
+    view = F[1:]
+    view += 1
+    F[2:].sort()
+    assert F == array.Array((4,), 4, 4, 2, 3)
+    view = E[1:]
+    with pytest.raises(ValueError):
+        view += 1
+    with pytest.raises(ValueError):
+        E[1:].sort()
+    assert E == A1 * 2
+    
+    #Values which does not fit in the compact storage leaves the array unchanged
+    G = array.Array((3,), 1, 2**62, 3, compact=True)
+    with pytest.raises(ValueError):
+        G *= 4
+    assert G == array.Array((3,), 1, 2**62, 3)
+    view = G[::2]
+    with pytest.raises(ValueError):
+        view += 2**63
+    assert G == array.Array((3,), 1, 2**62, 3)
+        
+
+def test_out():
+    #Test writing the result of an operation to another array
+    out = array.Array((3, 2), 0, 0, 0, 0, 0, 0, compact=True)
+    storage = out._array
+    assert B.__add__(B, out=out) is out
+    assert out == B + B
+    B.__mul__(array.Array((3, 1), 1, 2, 3), out=out)
+    assert out == array.Array((3, 2), 1, -2, 6, -8, 15, -18)
+    assert out._array is storage
+    
+    with pytest.raises(ValueError):
+        A1.__sub__(1, out=out)
+
+
+def test_reductions():
+    #Test reducing all the values
+    assert B.sum() == -3
+    assert A2.mean() == 3.0
+    assert B.min() == -6
+    assert C.max() == 12
+    assert A1.argmin() == 3
+    assert B2.argmax() == 4
+    
+    #Test reducing along an axis
+    assert B.sum(axis=0) == array.Array((2,), 9, -12)
+    assert B.sum(axis=1) == array.Array((3,), -1, -1, -1)
+    assert B.mean(axis=-1) == array.Array((3,), -0.5, -0.5, -0.5)
+    assert B2.min(axis=0) == array.Array((3,), -4, -2, -6)
+    assert B2.argmax(axis=1) == array.Array((2,), 2, 1)
+    assert C.max(axis=1) == array.Array((2, 2), 5, 6, 11, 12)
+    assert C.argmin(axis=0) == array.Array((3, 2), 0, 0, 0, 0, 0, 0)
+    assert A1.sum(axis=0) == -2
+    
+    #Test reducing views
+    assert B[1].max() == 3
+    assert C[1].sum(axis=0) == array.Array((2,), 27, 30)
+    
+    with pytest.raises(ValueError):
+        B.sum(axis=2)
+    with pytest.raises(ValueError):
+        array.Array((0,)).max()
+
+
+def test_constructors():
+    #Test the fast constructors
+    assert array.Array.zeros((2, 2)) == array.Array((2, 2), 0.0, 0.0, 0.0, 0.0)
+    assert array.Array.zeros((3,), int, compact=True) == array.Array((3,), 0, 0, 0)
+    assert array.Array.ones((2,), bool) == array.Array((2,), True, True)
+    assert array.Array.full((3, 2), 7) == array.Array((3, 2), 7, 7, 7, 7, 7, 7)
+    assert array.Array.arange(4) == array.Array((4,), 0, 1, 2, 3)
+    assert array.Array.arange(5, 0, -2, compact=True) == array.Array((3,), 5, 3, 1)
+    assert array.Array.arange(0, 1, 0.25) == array.Array((4,), 0.0, 0.25, 0.5, 0.75)
+    assert array.Array.from_iterable(range(1, 13), (2, 3, 2)) == C
+    
+    #Test wrapping an existing buffer
+    buffer = bytearray(B.data)
+    B_buffer = array.Array.frombuffer(buffer, (3, 2), int)
+    assert B_buffer == B
+    B_buffer += 1
+    assert array.Array.frombuffer(buffer, dtype=int) == array.Array((6,), 2, -1, 4, -3, 6, -5)
+    with pytest.raises(ValueError):
+        B_buffer += 0.5
+    assert array.Array.frombuffer(buffer, dtype=int) == array.Array((6,), 2, -1, 4, -3, 6, -5)
+    assert array.Array.frombuffer(A2.data) == A2
+    
+    with pytest.raises(ValueError):
+        array.Array.full((2,), "a")
+    with pytest.raises(ValueError):
+        array.Array.from_iterable([1, 2.0])
+    with pytest.raises(ValueError):
+        array.Array.frombuffer(bytearray(16), (3,), int)
+    with pytest.raises(ValueError):
+        array.Array.frombuffer(bytearray(12), dtype=int)
+    assert array.Array.frombuffer(bytearray(32), [2, 2], int).shape == (2, 2)
+    with pytest.raises(ValueError):
+        array.Array.frombuffer(b"abc")
+
+
+def test_matmul():
+    #Test the matrix product of 2D arrays
+    assert B @ B2 == array.Array((3, 3), 9, -12, 15, 19, -26, 33, 29, -40, 51)
+    assert B2.dot(B) == array.Array((2, 2), 10, -12, -19, 24)
+    
+    #Test products with 1D arrays
+    assert A1 @ A2 == -1.0
+    assert B @ array.Array((2,), 1, 1) == array.Array((3,), -1, -1, -1)
+    assert array.Array((3,), 1, 0, 1) @ B == array.Array((2,), 6, -8)
+    
+    #Test a product larger than one tile
+    n = 70
+    D = array.Array.from_iterable(range(n * n), (n, n))
+    I = array.Array.from_iterable([int(i == j) for i in range(n) for j in range(n)], (n, n))
+    assert D @ I == D
+    
+    #Int products which overflows 64 bits are computed in python, and does not fit in compact storage
+    E = array.Array((1, 2), 2**62, 2**62)
+    F = array.Array((2, 1), 2, 2)
+    assert (E @ F)[0, 0] == 2**64
+    with pytest.raises(ValueError):
+        E.compact() @ F.compact()
+    assert E.compact() @ (F * 0).compact() == array.Array((1, 1), 0)
+    
+    with pytest.raises(ValueError):
+        B @ B
+    with pytest.raises(ValueError):
+        C @ C
+    with pytest.raises(TypeError):
+        B.dot(2)
+
+
+def test_parallel():
+    #Test that parallel execution gives the same results as serial execution
+    D = array.Array.arange(1000)
+    E = array.Array.arange(0.5, 1000.5).compact()
+    serial = (D + E, D * 3, D - 1, D.is_equal(7), D.sum(), E.min(), E.max(), E.mean())
+    
+    array.set_parallel(2, threshold=100)
+    try:
+        parallel = (D + E, D * 3, D - 1, D.is_equal(7), D.sum(), E.min(), E.max(), E.mean())
+        assert (D * 3).is_compact()
+        
+        #Arrays smaller than the threshold, and broadcasting, are computed serially
+        assert not (A1 * 3).is_compact()
+        assert array.Array.ones((10, 100)) + array.Array.ones((100,)) == array.Array.full((10, 100), 2.0)
+        
+        #Values and results which does not fit in 64 bits are computed serially
+        array.set_numpy(None)
+        F = array.Array.full((1000,), 2**62)
+        assert (F * 4)[0] == 2**64 and (F * 4 - F * 4).sum() == 0
+        assert (F * 4).sum() == 1000 * 2**64
+        assert (F * 4 + 1)[999] == 2**64 + 1
+    finally:
+        array.set_parallel(0)
+        array.set_numpy()
+    
+    assert parallel == serial
+
+
+def test_save_and_open_memmap(tmp_path):
+    #Test saving arrays and opening them memory-mapped
+    filename = str(tmp_path / "B.arr")
+    B.save(filename)
+    B_mapped = array.Array.open_memmap(filename)
+    assert B_mapped == B
+    assert B_mapped[2, 1] == -6
+    assert B_mapped.is_compact()
+    
+    #Changes to the mapped array are written to the file
+    B_mapped += 1
+    B_mapped.flush()
+    assert array.Array.open_memmap(filename, "r") == B + 1
+    
+    #Changes in copy-on-write mode are not written to the file
+    B_copy = array.Array.open_memmap(filename, "c")
+    B_copy *= 0
+    assert array.Array.open_memmap(filename, "r") == B + 1
+    
+    #Writes which the file can not store raises instead of detaching the array from the file
+    with pytest.raises(ValueError):
+        B_mapped += 0.5
+    B_read = array.Array.open_memmap(filename, "r")
+    with pytest.raises(ValueError):
+        B_read += 1
+    assert array.Array.open_memmap(filename, "r") == B + 1
+    
+    #Copy-on-write only needs read permission
+    os.chmod(filename, 0o444)
+    B_copy = array.Array.open_memmap(filename, "c")
+    B_copy *= 0
+    assert B_copy == B * 0
+    os.chmod(filename, 0o644)
+    
+    for D in (A2, C[1], array.Array((2,), True, False)):
+        D.save(filename)
+        assert array.Array.open_memmap(filename, "r") == D
+    
+    #A failed save leaves the file unchanged
+    with pytest.raises(ValueError):
+        array.Array((2,), 2**70, 1).save(filename)
+    assert array.Array.open_memmap(filename, "r") == array.Array((2,), True, False)
+    
+    with open(filename, "wb") as file:
+        file.write(b"not an array")
+    with pytest.raises(ValueError):
+        array.Array.open_memmap(filename)
+    with pytest.raises(ValueError):
+        array.Array.open_memmap(filename, "w")
+
+
+def test_str_summarised():
+    #Test that large arrays are summarised, and small arrays are not
+    assert str(array.Array.arange(1001)) == "(0, 1, 2, ..., 998, 999, 1000)"
+    assert str(array.Array.arange(1000)) == str(tuple(range(1000)))
+    assert str(array.Array((1, 2), 1, 2)) == "((1, 2),)"
+    assert str(array.Array((2, 1), 1.5, 2.0)) == "((1.5,), (2.0,))"
+    
+    array.set_printoptions(threshold=5, edgeitems=1)
+    try:
+        assert str(C) == "(((1, 2), ..., (5, 6)), ((7, 8), ..., (11, 12)))"
+        assert str(A1) == "(1, -2, 3, -4)"
+        assert str(C[1]) == "((7, 8), ..., (11, 12))"
+    finally:
+        array.set_printoptions(threshold=1000, edgeitems=3)
+
+
+def test_views():
+    #Test slicing
+    assert B[1:] == array.Array((2, 2), 3, -4, 5, -6)
+    assert B[::2, 1] == array.Array((2,), -2, -6)
+    assert A1[::-1] == array.Array((4,), -4, 3, -2, 1)
+    assert C[:, 1:, 0] == array.Array((2, 2), 3, 5, 9, 11)
+    assert A1[2:2] == array.Array((0,))
+    
+    #Test transpose and reshape
+    assert B.T == array.Array((2, 3), 1, 3, 5, -2, -4, -6)
+    assert B.T.T == B
+    assert C.transpose(2, 0, 1)[1] == array.Array((2, 3), 2, 4, 6, 8, 10, 12)
+    assert B.reshape(2, 3) == B2
+    assert B.reshape((-1,)) == array.Array((6,), 1, -2, 3, -4, 5, -6)
+    assert B.T.reshape(6) == array.Array((6,), 1, 3, 5, -2, -4, -6)
+    assert B.T.shape == (2, 3)
+    
+    #Views shares the storage, copies does not
+    D = array.Array((3, 2), 1, -2, 3, -4, 5, -6, compact=True)
+    assert D.T._array is D._array
+    assert D.reshape(6)._array is D._array
+    D_copy = D.T.copy()
+    column = D[:, 1]
+    column *= 0
+    assert D == array.Array((3, 2), 1, 0, 3, 0, 5, 0)
+    assert D_copy == B.T
+    
+    #Operations on views
+    assert B.T @ B == array.Array((2, 2), 35, -44, -44, 56)
+    assert B.T.sum(axis=1) == array.Array((2,), 9, -12)
+    assert B[::2] + B[1] == array.Array((2, 2), 4, -6, 8, -10)
+    
+    with pytest.raises(ValueError):
+        B.reshape(4, 2)
+    with pytest.raises(ValueError):
+        C.transpose(0, 0, 1)
+
+
+def test_masks():
+    #Test comparison operators
+    assert (B > 0) == array.Array((3, 2), True, False, True, False, True, False)
+    assert (0 < B) == (B > 0)
+    assert (A1 <= A2) == array.Array((4,), True, True, False, True)
+    assert (B >= array.Array((2,), 3, -4)) == array.Array((3, 2), False, True, True, True, True, False)
+    
+    #Test indexing with masks
+    assert B[B > 0] == array.Array((3,), 1, 3, 5)
+    assert C[C.is_equal(4)] == array.Array((1,), 4)
+    assert A2[A2 < 0] == array.Array((0,))
+    assert B.T[B.T < 0] == array.Array((3,), -2, -4, -6)
+    
+    #Test where
+    assert array.Array.where(B > 0, B, 0) == array.Array((3, 2), 1, 0, 3, 0, 5, 0)
+    assert array.Array.where(A1 > 0, A2, A1) == array.Array((4,), 4.5, -2.0, 2.5, -4.0)
+    assert array.Array.where(B < 0, 10, array.Array((3, 1), 7, 8, 9)) == array.Array((3, 2), 7, 10, 8, 10, 9, 10)
+    
+    with pytest.raises(IndexError):
+        B[B]
+    with pytest.raises(IndexError):
+        B[A1 > 0]
+    with pytest.raises(TypeError):
+        array.Array.where(B, B, 0)
+    with pytest.raises(ValueError):
+        array.Array.where(B > 0, B, True)
+
+
+def test_numpy():
+    np = pytest.importorskip("numpy")
+    
+    #Test conversion and numpy functions on Arrays
+    assert np.array_equal(np.asarray(B), [[1, -2], [3, -4], [5, -6]])
+    assert np.add(A1, 1) == array.Array((4,), 2, -1, 4, -3)
+    assert np.ones((3, 2)) * B == B * 1.0
+    assert np.sum(B, axis=0) == array.Array((2,), 9, -12)
+    assert np.max(C) == 12
+    assert type(np.max(C)) == int
+    
+    #Test wrapping numpy arrays, with native formats (e.g. 'l' for int64)
+    values = np.arange(6)
+    D = array.Array.frombuffer(values, (3, 2))
+    assert D == array.Array((3, 2), 0, 1, 2, 3, 4, 5)
+    D += 1
+    assert values[0] == 1
+    assert array.Array.frombuffer(np.linspace(0, 1, 3), dtype=float) == array.Array((3,), 0.0, 0.5, 1.0)
+    assert array.Array.frombuffer(np.array([True, False])) == array.Array((2,), True, False)
+    with pytest.raises(ValueError):
+        array.Array.frombuffer(np.arange(4, dtype=np.int32), dtype=int)
+    with pytest.raises(ValueError):
+        array.Array.frombuffer(np.arange(4, dtype=np.uint64))
+    with pytest.raises(ValueError):
+        array.Array.frombuffer(np.arange(4), dtype=float)
+    with pytest.raises(ValueError):
+        array.Array.frombuffer(np.arange(4)[::2])
+    
+    #Test delegation of large arrays to numpy
+    array.set_numpy(threshold=1)
+    try:
+        assert B + B == array.Array((3, 2), 2, -4, 6, -8, 10, -12)
+        assert not (B + B).is_compact() and (B.compact() + B).is_compact()
+        assert B.T * A1[:3] == array.Array((2, 3), 1, -6, 15, -2, 8, -18)
+        assert (B > 0) == array.Array((3, 2), True, False, True, False, True, False)
+        assert B.sum() == -3 and type(B.sum()) == int
+        assert B.mean(axis=1) == array.Array((3,), -0.5, -0.5, -0.5)
+        assert B.argmax(axis=0) == array.Array((2,), 2, 0)
+        
+        D = B.compact()
+        D += 1
+        assert D == array.Array((3, 2), 2, -1, 4, -3, 6, -5)
+        D *= 0.5
+        assert D == array.Array((3, 2), 1.0, -0.5, 2.0, -1.5, 3.0, -2.5)
+        
+        #Ints too large for numpy are computed in python
+        E = array.Array((2,), 2**70, 1)
+        assert (E + 1)[0] == 2**70 + 1
+        assert E.sum() == 2**70 + 1
+        
+        with pytest.raises(ValueError):
+            B + A1
+        with pytest.raises(ValueError):
+            B.min(axis=2)
+    finally:
+        array.set_numpy()
+    
+    #Test that delegated results are the same as in python, also for int overflow and bools
+    F = array.Array.full((10**4,), 2**62)
+    G = array.Array.full((10**4,), True)
+    H = array.Array.arange(10**4, compact=True)
+    rng = random.Random(1)
+    K = array.Array.from_iterable([rng.random() for i in range(10**4)]).compact()
+    def results():
+        return ((F * 4)[0], F.sum(), (F + F)[1], (F - F * -1)[2], (F * 1.0)[3], (F < 2.0**62)[4], 
+                G + G, G - G, G * G, G + 1, (G + G).is_compact(), (H * H).sum(), H.mean(), 
+                (array.Array.arange(10**4).reshape(100, 100) * 2**55).mean(axis=1), 
+                (H + 2**62).sum(), (H > 5000.5).sum(), K.sum(), K.mean(), K.reshape(100, 100).mean(axis=1))
+    array.set_numpy(None)
+    try:
+        python_results = results()
+    finally:
+        array.set_numpy()
+    assert results() == python_results
+    assert python_results[0] == 2**64 and python_results[5] is False
+    assert python_results[6] == array.Array.full((10**4,), 2)
+
+
+def test_chunked(tmp_path):
+    D = array.Array.arange(24).reshape(6, 4)
+    E = D.chunked(4)
+    assert E.shape == (6, 4) and E.n_blocks == 2
+    assert E.block(1) == D[4:]
+    
+    #Test element-wise operations and broadcasting
+    assert (E + 1).compute() == D + 1
+    assert (E * E - D).compute() == D * D - D
+    assert (2 * E).compute() == D * 2
+    assert (E + array.Array((4,), 1, 2, 3, 4)).compute() == D + array.Array((4,), 1, 2, 3, 4)
+    assert (D < E + 1).compute() == D.is_equal(D) 
+    assert E.is_equal(D).compute() == D.is_equal(D)
+    assert E + 1 == D + 1
+    assert E[5] == array.Array((4,), 20, 21, 22, 23)
+    assert E[-1, 0] == 20
+    
+    #Test reductions
+    assert E.sum() == D.sum()
+    assert E.sum(axis=0) == D.sum(axis=0)
+    assert E.sum(axis=1).compute() == D.sum(axis=1)
+    assert E.min(axis=0) == D.min(axis=0)
+    assert E.max() == 23
+    assert E.mean(axis=0) == D.mean(axis=0)
+    assert array.Array.arange(10).chunked(3).mean(axis=0) == 4.5
+    
+    #Test blocks on disk
+    F = array.ChunkedArray.from_iterable(range(24), (6, 4), 4, directory=str(tmp_path), compact=True)
+    assert F == D
+    (tmp_path / "result").mkdir()
+    G = (F * 2).store(str(tmp_path / "result"))
+    assert G == D * 2
+    assert G.block(0).is_compact()
+    
+    with pytest.raises(ValueError):
+        (F + 1).store(str(tmp_path))
+    with pytest.raises(ValueError):
+        array.ChunkedArray.from_iterable(range(23), (6, 4), 4)
+    with pytest.raises(ValueError):
+        E + array.Array((6, 1, 4), *range(24))
+    with pytest.raises(ValueError):
+        E + D.chunked(3)
+    with pytest.raises(ValueError):
+        E + array.Array((1, 4), 100, 200, 300, 400).chunked(4)
+    with pytest.raises(ValueError):
+        array.Array.arange(20).reshape(10, 2).chunked(4) + array.Array((1, 2), 100, 200).chunked(4)
+    with pytest.raises(IndexError):
+        E[6]
+
+
+def test_sort_and_scans():
+    D = array.Array((3, 2), 5, -2, 3, -4, 1, -6)
+    
+    #Test sorting
+    assert D.sorted() == array.Array((3, 2), -2, 5, -4, 3, -6, 1)
+    assert D.sorted(axis=0) == array.Array((3, 2), 1, -6, 3, -4, 5, -2)
+    assert D.sorted(axis=None) == array.Array((6,), -6, -4, -2, 1, 3, 5)
+    assert D.T.sorted() == array.Array((2, 3), 1, 3, 5, -6, -4, -2)
+    assert D.argsort(axis=0) == array.Array((3, 2), 2, 2, 1, 1, 0, 0)
+    assert D.argsort(axis=None) == array.Array((6,), 5, 3, 1, 4, 2, 0)
+    
+    E = D.compact()
+    E[1:].sort(axis=0)
+    assert E == array.Array((3, 2), 5, -2, 1, -6, 3, -4)
+    assert E.is_compact()
+    
+    #Test unique
+    assert A1.unique() == array.Array((4,), -4, -2, 1, 3)
+    values, counts = array.Array((5,), 2.0, 1.0, 2.0, 2.0, 1.0).unique(return_counts=True)
+    assert values == array.Array((2,), 1.0, 2.0)
+    assert counts == array.Array((2,), 2, 3)
+    
+    #Test cumulative sums and products
+    assert D.cumsum() == array.Array((6,), 5, 3, 6, 2, 3, -3)
+    assert D.cumsum(axis=0) == array.Array((3, 2), 5, -2, 8, -6, 9, -12)
+    assert D.cumprod(axis=1) == array.Array((3, 2), 5, -10, 3, -12, 1, -6)
+    assert (D > 0).cumsum(axis=0) == array.Array((3, 2), 1, 0, 2, 0, 3, 0)
+    
+    with pytest.raises(ValueError):
+        D.sort(axis=2)
+
+
+def test_sparse():
+    D = array.Array((3, 4), 0, 2, 0, 0, 0, 0, 0, 0, 5, 0, 0, -1)
+    S = D.to_sparse()
+    assert S.is_sparse() and not D.is_sparse()
+    assert S == D and S.to_dense() == D
+    assert S[2, 0] == 5 and S[1, 1] == 0
+    assert S[2] == array.Array((4,), 5, 0, 0, -1)
+    assert array.Array.from_coo((3, 4), [(0, 1), (2, 3), (2, 0)], [2, -1, 5]) == S
+    assert array.Array.from_coo((2,), [(1,), (1,)], [1.5, 2.0]) == array.Array((2,), 0.0, 3.5)
+    
+    #Test operations which keep the array sparse
+    for result, expected in ((S * 2, D * 2), (S * 0.5, D * 0.5), (S > 0, D > 0), (S + S, D + D), 
+                             (S * D, D * D), (D * S, D * D), (S - S, D - D)):
+        assert result.is_sparse()
+        assert result == expected
+    
+    #Test operations which makes dense results
+    assert not (S + 1).is_sparse()
+    assert S + 1 == D + 1
+    assert S.is_equal(0) == D.is_equal(0)
+    assert S + D == D + D
+    
+    #Test reductions and matrix products
+    assert S.sum() == 6 and S.min() == -1 and S.max() == 5
+    assert S.sum(axis=0) == D.sum(axis=0)
+    assert S.sum(axis=1) == D.sum(axis=1)
+    assert (S > 0).sum() == 2
+    assert S @ D.T == D @ D.T
+    assert S @ S.T.to_sparse() == D @ D.T
+    assert S[0].to_sparse().dot(D[2]) == 0
+    
+    E = S.copy()
+    E *= 3
+    assert E.is_sparse() and E == D * 3 and S == D
+    
+    #Test that zeros times inf and nan are nan, and that -0.0 is kept
+    F = array.Array((3,), 0.0, 1.0, -0.0).to_sparse()
+    G = array.Array((3,), math.inf, 1.0, 2.0)
+    for result in (F * G, G * F, F * array.Array((3,), math.nan, 1.0, 2.0)):
+        assert math.isnan(result[0]) and result[1] == 1.0
+    assert (F * array.Array((3,), 2, 3, 4)).is_sparse()
+    assert math.copysign(1, F.to_dense()[2]) == -1
+    
+    with pytest.raises(IndexError):
+        array.Array.from_coo((2, 2), [(2, 0)], [1])
+    with pytest.raises(ValueError):
+        array.Array.from_coo((2, 2), [(0, 0)], [1, 2])
+
+
+def test_pickle_and_bytes():
+    import pickle
+    
+    #Test that the storage kind is kept for every protocol
+    for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+        for D in (B, B.compact(), B.T, B.to_sparse(), array.Array((2,), 2**70, 1), array.Array((0, 3))):
+            E = pickle.loads(pickle.dumps(D, protocol=protocol))
+            assert E == D
+            assert E.is_compact() == D.is_compact() and E.is_sparse() == D.is_sparse()
+    
+    #Test out-of-band buffers
+    D = array.Array.arange(1000, compact=True)
+    buffers = []
+    data = pickle.dumps(D, protocol=5, buffer_callback=buffers.append)
+    assert len(data) < 200
+    assert pickle.loads(data, buffers=buffers) == D
+    
+    #Test bytes
+    assert array.Array.from_bytes(B.to_bytes()) == B
+    assert array.Array.from_bytes(A1.to_bytes()).is_compact()
+    with pytest.raises(ValueError):
+        array.Array.from_bytes(b"not an array")
+    with pytest.raises(ValueError):
+        array.Array.from_bytes(B.to_bytes()[:12])
+    with pytest.raises(ValueError):
+        array.Array.from_bytes(B.to_bytes()[:-8])
     
+    #Test that arrays have no dict
+    with pytest.raises(AttributeError):
+        B.attribute = 1
@@ -1,4 +1,5 @@
 from .filter_image import grayscale_image, sepia_image
+from .filters import gray, sepia
 
 grayscale_image = grayscale_image
 sepia_image = sepia_image
\ No newline at end of file
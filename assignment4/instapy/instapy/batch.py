@@ -0,0 +1,318 @@
+"""
+Batch mode of instapy, filters many images with a pool of worker processes:
+
+    instapy batch photos/ "more/**/*.jpg" --files-from list.txt -g -o filtered/ --jobs 8
+
+The inputs can be directories (searched recursively), glob patterns and image
+files, and a file with one path per line ("-" for stdin). The files are streamed
+through the workers, each of which imports its backend and runs the filter once
+on a tiny image when it starts, so numba compiles once per worker and not once
+per file. The output mirrors the input tree under the output directory, and a
+throughput summary is printed at the end.
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from . import filters
+
+
+#The extensions of the images searched for in directories and globs
+image_extensions = ('.jpg', '.jpeg', '.png', '.pic')
+
+#The filter settings of a worker process, set by _init_worker
+_worker = {}
+
+
+def _is_image(filename):
+
+    """
+    Returns True if the filename has one of the image extensions.
+    """
+    return filename.lower().endswith(image_extensions)
+
+
+def _glob_base(pattern):
+
+    """
+    Returns the directory of a glob pattern before the first wildcard, e.g. photos for photos/**/*.jpg.
+    """
+    parts = []
+    for part in pattern.split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or os.curdir
+
+
+def collect_files(inputs, files_from=None):
+
+    """
+    Finds the images to filter, lazily so large trees are streamed.
+    -----------------------------------------
+    Arguments:
+        inputs : list
+            directories (searched recursively), glob patterns or image files
+
+        files_from : file, optional, default=None
+            an open file with one path to an image per line
+
+    Returns:
+        files : generator
+            (path, relative path) for every image, where the relative path is
+            the path below the directory (or glob base) it was found in, after
+            the name of that directory if several directories or globs are given.
+            Files given by name, in inputs or files_from, keep their own relative
+            path (or their name, if absolute or outside the current directory).
+
+    -----------------------------------------
+    """
+    #With several roots, e.g. in1/a.png and in2/a.png, the name of the root keeps the outputs apart
+    n_roots = sum(1 for source in inputs if os.path.isdir(source) or glob.has_magic(source))
+
+    def root_name(root):
+        return os.path.basename(os.path.normpath(root)) if n_roots > 1 else ""
+
+    for source in inputs:
+        if os.path.isdir(source):
+            for directory, subdirectories, filenames in os.walk(source):
+                subdirectories.sort()
+                for filename in sorted(filenames):
+                    if _is_image(filename):
+                        path = os.path.join(directory, filename)
+                        yield path, os.path.join(root_name(source), os.path.relpath(path, source))
+
+        elif glob.has_magic(source):
+            base = _glob_base(source)
+            for path in sorted(glob.iglob(source, recursive=True)):
+                if os.path.isfile(path) and _is_image(path):
+                    yield path, os.path.join(root_name(base), os.path.relpath(path, base))
+
+        else:
+            yield source, _relative_name(source)
+
+    if files_from is not None:
+        for line in files_from:
+            path = line.strip()
+            if path:
+                yield path, _relative_name(path)
+
+
+def _relative_name(path):
+
+    """
+    Returns the path an image given by name is written to, below the output directory.
+    """
+    if os.path.isabs(path) or os.path.normpath(path).startswith(os.pardir):
+        return os.path.basename(path)
+    return os.path.normpath(path)
+
+
+def _tasks(files, output_dir, duplicates):
+
+    """
+    Returns the (input filename, output filename) of every image, skipping images whose
+    output filename is the same as for an earlier image (e.g. a.png given twice by name).
+    The skipped images are added to duplicates as (filename, error).
+    """
+    outputs = {}
+    for path, relative_path in files:
+        output_filename = os.path.normpath(os.path.join(output_dir, relative_path))
+        if output_filename in outputs:
+            duplicates.append((path, "The output " + output_filename + " is also the output of " +
+                               outputs[output_filename]))
+        else:
+            outputs[output_filename] = path
+            yield path, output_filename
+
+
+def _init_worker(filter_name, backend, level, scale):
+
+    """
+    Initializes a worker process: stores the filter settings, and imports and
+    warms up the backend (for numba this is the JIT compilation).
+    """
+    _worker.update(filter_name=filter_name, backend=backend, level=level, scale=scale)
+    _apply(np.zeros((2, 2, 3), dtype=np.uint8))
+
+
+def _apply(image):
+
+    """
+    Applies the filter of the worker to an RGB image, sepia in place.
+    """
+    if _worker["filter_name"] == "gray":
+        return filters.gray(image, backend=_worker["backend"])
+    return filters.sepia(image, _worker["level"], backend=_worker["backend"], out=image)
+
+
+def _filter_file(task):
+
+    """
+    Filters one image in a worker process.
+    -----------------------------------------
+    Arguments:
+        task : tuple
+            (input filename, output filename)
+
+    Returns:
+        result : tuple
+            (input filename, number of pixels, error message or None)
+
+    -----------------------------------------
+    """
+    input_filename, output_filename = task
+    try:
+        if os.path.abspath(input_filename) == os.path.abspath(output_filename):
+            raise ValueError("The output would overwrite the input")
+
+        image = filters.read_image(input_filename, _worker["scale"])
+        filtered_image = _apply(image)
+
+        os.makedirs(os.path.dirname(output_filename) or os.curdir, exist_ok=True)
+        if not filters.write_image(output_filename, filtered_image):
+            raise ValueError("Could not write " + output_filename)
+
+    except Exception as error:
+        return input_filename, 0, str(error)
+
+    return input_filename, image.shape[0] * image.shape[1], None
+
+
+def run_batch(files, output_dir, filter_name, backend="numpy", level=1.0, scale=None, jobs=None, chunksize=4):
+
+    """
+    Filters images with a pool of worker processes.
+    -----------------------------------------
+    Arguments:
+        files : iterable
+            (path, relative path) of the images, see collect_files
+
+        output_dir : str
+            the directory the filtered images are written to, at their relative path
+
+        filter_name : str
+            the filter, {"gray", "sepia"}
+
+        backend : str, optional, default="numpy"
+            Choose the implementation method, {"python", "numpy", "numba", "lut"}
+
+        level : float, optional, default=1.0
+            Ammount of sepia-effect added to image. Must be a float between 0 and 1, where 1 is 100%, 0 is 0%.
+
+        scale : float, optional, default=None
+            Scale factor to resize image. (e.g. 0.5 halves image dimentions)
+
+        jobs : int, optional, default=None
+            number of worker processes, by default the number of CPUs
+
+        chunksize : int, optional, default=4
+            number of files sent to a worker at a time
+
+    Returns:
+        summary : dict
+            The number of images filtered and failed, the failures as (filename, error)
+            (images with the same output filename as an earlier image are failures),
+            the number of pixels, the total time and the startup time (until the first
+            image is done, which includes starting and warming up the workers) in seconds.
+
+    -----------------------------------------
+    """
+    if backend not in filters.map_backends:
+        raise ValueError("Not valid implementation method")
+    if filter_name not in ("gray", "sepia"):
+        raise ValueError("The filter must be gray or sepia")
+    if not 0 <= level <= 1:
+        raise ValueError("The level must be between 0 and 1")
+
+    duplicates = []
+    tasks = _tasks(files, output_dir, duplicates)
+
+    summary = {"images": 0, "failed": 0, "failures": [], "pixels": 0, "startup": 0.0}
+    t0 = time.perf_counter()
+
+    with multiprocessing.Pool(jobs, _init_worker, (filter_name, backend, level, scale)) as pool:
+        for input_filename, pixels, error in pool.imap_unordered(_filter_file, tasks, chunksize):
+            if not summary["startup"]:
+                summary["startup"] = time.perf_counter() - t0
+            if error is None:
+                summary["images"] += 1
+                summary["pixels"] += pixels
+            else:
+                summary["failed"] += 1
+                summary["failures"].append((input_filename, error))
+
+    summary["failed"] += len(duplicates)
+    summary["failures"].extend(duplicates)
+    summary["time"] = time.perf_counter() - t0
+    return summary
+
+
+def print_summary(summary, jobs):
+
+    """
+    Prints the failures and the throughput of a batch.
+    """
+    for filename, error in summary["failures"]:
+        print("Failed: {}: {}".format(filename, error), file=sys.stderr)
+
+    seconds = max(summary["time"], 1e-9)
+    print("Filtered {} images ({} failed) with {} workers in {:.2f} s (startup {:.2f} s): "
+          "{:.1f} images/s, {:.1f} megapixels/s".format(
+              summary["images"], summary["failed"], jobs, summary["time"], summary["startup"],
+              summary["images"] / seconds, summary["pixels"] / seconds / 1e6))
+
+
+def main(argv=None):
+
+    """
+    The `instapy batch` command.
+    -----------------------------------------
+    Arguments:
+        argv : list, optional, default=None
+            the command line arguments (after "batch"), by default sys.argv
+
+    Returns:
+        status : int
+            The exit status, 1 if any image failed.
+
+    -----------------------------------------
+    """
+    parser = argparse.ArgumentParser(prog="instapy batch", description="Filter many images with a pool of workers")
+
+    parser.add_argument("inputs", nargs="*", metavar="INPUT",
+                        help="Directories, glob patterns (quoted) or image files")
+    parser.add_argument("--files-from", type=argparse.FileType("r"), metavar="FILE",
+                        help="A file with one image per line, - for stdin")
+    parser.add_argument("-o", "--output-dir", required=True, metavar="DIR",
+                        help="The directory to write the filtered images to, mirroring the input tree")
+
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("-se", "--sepia", action="store_true", help="Select sepia filter")
+    group.add_argument("-g", "--gray", action="store_true", help="Select gray filter")
+
+    parser.add_argument("-sc", "--scale", type=float, default=None,
+                        help="Scale factor to resize images (default: no resize)")
+    parser.add_argument("-l", "--level", type=float, default=1.0,
+                        help="Level of sepia, float between 0 and 1 (default=1.0)")
+    parser.add_argument("-i", "--implementation", default="numpy", choices=list(filters.map_backends),
+                        help="Choose the implementation (default=numpy)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="Number of worker processes (default: number of CPUs)")
+
+    args = parser.parse_args(argv)
+    if not args.inputs and args.files_from is None:
+        parser.error("Give at least one INPUT or --files-from")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    summary = run_batch(collect_files(args.inputs, args.files_from), args.output_dir,
+                        "gray" if args.gray else "sepia", args.implementation,
+                        args.level, args.scale, args.jobs)
+    print_summary(summary, args.jobs)
+    return 1 if summary["failed"] else 0
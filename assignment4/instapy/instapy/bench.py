@@ -0,0 +1,277 @@
+"""
+Benchmarks for the instapy backends, run with:
+
+    instapy bench --sizes 400x600 1000x1500 --backends numpy numba --output bench.json
+
+Every backend and filter is timed over a matrix of image sizes. Each run is split
+into decoding the (jpeg) image, filtering it and encoding the result, and the
+compile time of the backend (numba's JIT) is measured separately, before the
+warm-up runs. The min, median and 95th percentile of the runs are reported,
+and written as JSON so runs on different versions and machines can be compared.
+"""
+import argparse
+import datetime
+import json
+import math
+import os.path
+import platform
+import statistics
+import time
+
+import cv2
+import numpy as np
+
+from . import filters
+
+
+#The image the benchmark images are resized from
+default_image = os.path.join(os.path.dirname(__file__), "rain.jpeg")
+
+
+def percentile(times, q):
+
+    """
+    Returns the q-th percentile of the times (nearest-rank).
+    -----------------------------------------
+    Arguments:
+        times : list
+            the runtimes
+        q : float
+            the percentile, between 0 and 100
+
+    Returns:
+        time : float
+            The percentile.
+
+    -----------------------------------------
+    """
+    times = sorted(times)
+    return times[max(0, math.ceil(q / 100 * len(times)) - 1)]
+
+
+def summary(times):
+
+    """
+    Returns the min, median and 95th percentile of runtimes (in seconds), as a dict.
+    """
+    return {"min": min(times), "median": statistics.median(times), "p95": percentile(times, 95)}
+
+
+def timed(function, *args):
+
+    """
+    Calls a function and returns the result and the runtime in seconds.
+    """
+    t0 = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - t0
+
+
+def apply_filter(name, image, backend, level):
+
+    """
+    Applies the filter (gray or sepia) to an RGB image with a backend.
+    """
+    if name == "gray":
+        return filters.gray(image, backend=backend)
+    return filters.sepia(image, level, backend=backend)
+
+
+def compile_time(name, backend, level):
+
+    """
+    Returns the time of the first call of a filter with a backend, on a tiny image.
+    For numba this is the JIT compile time, for the other backends (almost) nothing.
+    """
+    tiny_image = np.zeros((2, 2, 3), dtype=np.uint8)
+    return timed(apply_filter, name, tiny_image, backend, level)[1]
+
+
+def benchmark_case(name, backend, encoded_image, level, warmup, repeat):
+
+    """
+    Times decoding, filtering and encoding of one image with a backend.
+    -----------------------------------------
+    Arguments:
+        name : str
+            the filter, {"gray", "sepia"}
+        backend : str
+            the backend, {"python", "numpy", "numba", "lut"}
+        encoded_image : bytes
+            the image, as a jpeg file
+        level : float
+            the level of sepia
+        warmup : int
+            number of runs which are not timed
+        repeat : int
+            number of timed runs
+
+    Returns:
+        times : dict
+            The summary of the runtimes of each phase {"decode", "filter", "encode"}.
+
+    -----------------------------------------
+    """
+    times = {"decode": [], "filter": [], "encode": []}
+    for run in range(warmup + repeat):
+        image, decode_time = timed(filters.read_image, encoded_image)
+        filtered_image, filter_time = timed(apply_filter, name, image, backend, level)
+        _, encode_time = timed(cv2.imencode, ".jpeg", filtered_image)
+
+        if run >= warmup:
+            times["decode"].append(decode_time)
+            times["filter"].append(filter_time)
+            times["encode"].append(encode_time)
+
+    return {phase: summary(phase_times) for phase, phase_times in times.items()}
+
+
+def run_benchmarks(sizes, backends, filter_names, level=1.0, warmup=1, repeat=5, budget=10.0, image=default_image):
+
+    """
+    Benchmarks every backend and filter for every image size.
+    A case (backend and filter) is skipped for the larger sizes once a filter run
+    takes longer than budget, as the python backend would take hours on large images.
+    -----------------------------------------
+    Arguments:
+        sizes : list
+            the image sizes, as (height, width)
+        backends : list
+            the backends
+        filter_names : list
+            the filters, "gray" and/or "sepia"
+        level, warmup, repeat :
+            see benchmark_case
+        budget : float, optional, default=10.0
+            runtime in seconds after which a case is skipped for larger sizes
+        image : str, optional
+            filename or path of the image which is resized to each size
+
+    Returns:
+        results : list
+            One dict for every case and size, with the compile time and the summary
+            of the runtimes of each phase (None if skipped).
+
+    -----------------------------------------
+    """
+    source_image = cv2.imread(image)
+    if source_image is None:
+        raise ValueError("Could not read the image " + image)
+
+    results = []
+    too_slow = set()
+    compile_times = {}
+
+    for height, width in sizes:
+        resized_image = cv2.resize(source_image, (width, height))
+        encoded_image = cv2.imencode(".jpeg", resized_image)[1].tobytes()
+
+        for backend in backends:
+            for name in filter_names:
+                case = (backend, name)
+                if case not in compile_times:
+                    compile_times[case] = compile_time(name, backend, level)
+
+                times = None
+                if case not in too_slow:
+                    times = benchmark_case(name, backend, encoded_image, level, warmup, repeat)
+                    if times["filter"]["median"] > budget:
+                        too_slow.add(case)
+
+                results.append({"backend": backend, "filter": name, "size": [height, width],
+                                "pixels": height * width, "compile": compile_times[case], "times": times})
+    return results
+
+
+def write_results(results, filename):
+
+    """
+    Writes benchmark results to a JSON file, with information about the machine.
+    """
+    report = {
+        "benchmark": "instapy",
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "machine": platform.platform(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+    with open(filename, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def print_results(results):
+
+    """
+    Prints a table of benchmark results (times in milliseconds).
+    """
+    print("{:<8}{:<7}{:>11}{:>10}  {:>28}{:>28}{:>28}".format(
+        "backend", "filter", "size", "compile", "decode min/median/p95",
+        "filter min/median/p95", "encode min/median/p95"))
+
+    for result in results:
+        size = "{}x{}".format(*result["size"])
+        if result["times"] is None:
+            phases = ["{:>28}".format("skipped")] * 3
+        else:
+            phases = ["{:>28}".format("{min:.2f}/{median:.2f}/{p95:.2f}".format(
+                      **{k: 1000 * v for k, v in result["times"][phase].items()}))
+                      for phase in ("decode", "filter", "encode")]
+        print("{:<8}{:<7}{:>11}{:>10.2f}  ".format(result["backend"], result["filter"], size,
+                                                  1000 * result["compile"]) + "".join(phases))
+
+
+def parse_size(size):
+
+    """
+    Parses an image size given as HEIGHTxWIDTH, e.g. 400x600.
+    """
+    try:
+        height, width = map(int, size.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("Size must be given as HEIGHTxWIDTH, e.g. 400x600")
+    return height, width
+
+
+def main(argv=None):
+
+    """
+    The `instapy bench` command.
+    -----------------------------------------
+    Arguments:
+        argv : list, optional, default=None
+            the command line arguments (after "bench"), by default sys.argv
+
+    -----------------------------------------
+    """
+    parser = argparse.ArgumentParser(prog="instapy bench", description="Benchmarks for the instapy backends")
+
+    parser.add_argument("--sizes", type=parse_size, nargs="+",
+                        default=[(200, 300), (400, 600), (1000, 1500), (2000, 3000)],
+                        help="Image sizes as HEIGHTxWIDTH (default: 200x300 400x600 1000x1500 2000x3000)")
+    parser.add_argument("--backends", nargs="+", default=list(filters.map_backends),
+                        choices=list(filters.map_backends),
+                        help="The backends to benchmark (default: all)")
+    parser.add_argument("--filters", nargs="+", default=["gray", "sepia"], choices=["gray", "sepia"],
+                        help="The filters to benchmark (default: gray sepia)")
+    parser.add_argument("-l", "--level", type=float, default=1.0,
+                        help="Level of sepia, float between 0 and 1 (default=1.0)")
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="Number of runs before the timed runs (default=1)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Number of timed runs (default=5)")
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="Skip a case for larger sizes once a filter run takes longer (seconds, default=10)")
+    parser.add_argument("--image", type=str, default=default_image,
+                        help="The image which is resized to each size (default: rain.jpeg)")
+    parser.add_argument("-o", "--output", type=str, default="instapy_bench.json",
+                        help="The JSON file to write the results to (default: instapy_bench.json)")
+
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.backends, args.filters, args.level,
+                             args.warmup, args.repeat, args.budget, args.image)
+    print_results(results)
+    write_results(results, args.output)
@@ -1,6 +1,7 @@
 from .python_filters import python_color2gray, python_color2sepia
 from .numpy_filters import numpy_color2gray, numpy_color2sepia
 from .numba_filters import numba_color2gray, numba_color2sepia
+from .lut_filters import lut_color2gray, lut_color2sepia
 #from.cython_filters import cython_color2gray, cython_color2sepia
 import time
 import numpy as np
@@ -11,7 +12,8 @@ def grayscale_image(input_filename,
                     output_filename=None, 
                     scale=None, 
                     implementation="numpy",
-                    timing_on=False):
+                    timing_on=False,
+                    write=True):
     
     """
     Grayscale image filter.
@@ -30,10 +32,13 @@ def grayscale_image(input_filename,
             Scale factor to resize image. (e.g. 0.5 halves image dimentions)
         
         implementation : str, optional, default="numpy"
-            Choose the implementation method, {"python", "numpy", "numba", "cython"}
+            Choose the implementation method, {"python", "numpy", "numba", "lut", "cython"}
         
         timing_on : bool, optional, default=False
             If True, the mean time of 3 runs will be printed. 
+        
+        write : bool, optional, default=True
+            If False, the transformed image is only returned (not written to file). 
     
     Returns: 
         grayscale_image : numpy ndarray
@@ -47,20 +52,21 @@ def grayscale_image(input_filename,
     map_implementations = {"python": python_color2gray, 
                            "numpy": numpy_color2gray, 
                            "numba":numba_color2gray, 
+                           "lut": lut_color2gray, 
                            "cython":'cython_color2gray'}
     
     
     if implementation not in map_implementations.keys():
         raise ValueError("Not valid implementation method")
     
-    grayscale_image = map_implementations[implementation](input_filename, output_filename, scale)
+    grayscale_image = map_implementations[implementation](input_filename, output_filename, scale, write=write)
     
     
     if timing_on:
         tot_t = 0
         for i in range(3):
             t0 = time.perf_counter()
-            map_implementations[implementation](input_filename, output_filename, scale)
+            map_implementations[implementation](input_filename, output_filename, scale, write=write)
             t1 = time.perf_counter()
             
             tot_t += (t1-t0)
@@ -77,7 +83,8 @@ def sepia_image(input_filename,
                 scale=None, 
                 level=1.0,
                 implementation="numpy",
-                timing_on=False):
+                timing_on=False,
+                write=True):
     
     
     
@@ -101,10 +108,13 @@ def sepia_image(input_filename,
             Ammount of sepia-effect added to image. Must be a float between 0 and 1, where 1 is 100%, 0 is 0%.
             
         implementation : str, optional, default="numpy"
-            Choose the implementation method, {"python", "numpy", "numba", "cython"}
+            Choose the implementation method, {"python", "numpy", "numba", "lut", "cython"}
         
         timing_on : bool, optional, default=False
             If True, the mean time of 3 runs will be printed. 
+        
+        write : bool, optional, default=True
+            If False, the transformed image is only returned (not written to file). 
     
     Returns: 
         grayscale_image : numpy ndarray
@@ -128,20 +138,21 @@ def sepia_image(input_filename,
     map_implementations = {"python": python_color2sepia, 
                            "numpy": numpy_color2sepia, 
                            "numba":numba_color2sepia, 
+                           "lut": lut_color2sepia, 
                            "cython":'cython_color2sepia'}
     
     
     if implementation not in map_implementations.keys():
         raise ValueError("Not valid implementation method")
     
-    sepia_image = map_implementations[implementation](input_filename, output_filename, scale, level)
+    sepia_image = map_implementations[implementation](input_filename, output_filename, scale, level, write=write)
     
     
     if timing_on:
         tot_t = 0
         for i in range(3):
             t0 = time.perf_counter()
-            map_implementations[implementation](input_filename, output_filename, scale, level)
+            map_implementations[implementation](input_filename, output_filename, scale, level, write=write)
             t1 = time.perf_counter()
             
             tot_t += (t1-t0)
@@ -0,0 +1,286 @@
+from functools import lru_cache
+import importlib
+import os.path
+
+import cv2
+import numpy as np
+
+
+#Fixed-point weights of the grayscale filter: 0.21, 0.72 and 0.07 scaled by 2**16, rounded so 
+#they sum to 2**16 (white stays 255). The gray value is (weights . RGB + 2**15) >> 16, rounded to nearest.
+gray_weights = (13763, 47186, 4587)
+gray_shift = 16
+
+#The sepia weights are scaled by 2**16 too, see sepia_weights
+sepia_shift = 16
+
+#The modules with the filter kernels of each backend, imported the first time they are used
+map_backends = {"python": "python_filters",
+                "numpy": "numpy_filters",
+                "numba": "numba_filters",
+                "lut": "lut_filters"}
+
+
+def _backend(backend):
+
+    """
+    Returns the module with the filter kernels (_grayscale and _sepia) of a backend.
+    -----------------------------------------
+    Arguments:
+        backend : str
+            The implementation method, {"python", "numpy", "numba", "lut"}
+
+    Returns:
+        module : module
+            The module of the backend.
+
+    -----------------------------------------
+    """
+    if backend not in map_backends:
+        raise ValueError("Not valid implementation method")
+
+    return importlib.import_module("." + map_backends[backend], __package__)
+
+
+@lru_cache(maxsize=None)
+def sepia_weights(level):
+
+    """
+    Returns the fixed-point sepia matrix for a level of sepia.
+    The matrix is level * sepia matrix + (1 - level) * identity, scaled by 2**16 and rounded.
+    The sepia value of a channel is (row . RGB + 2**15) >> 16, saturated at 255.
+    -----------------------------------------
+    Arguments:
+        level : float
+            Ammount of sepia-effect, between 0 and 1.
+
+    Returns:
+        sepia_weights : tuple
+            The rows of the matrix (red, green and blue), as tuples of ints.
+
+    -----------------------------------------
+    """
+    k = 1 - level
+    sepia_matrix = [[ 0.393 + (0.607*k) , 0.769 - (0.769*k) , 0.189 - (0.189*k)] ,
+                    [ 0.349 - (0.349*k) , 0.686 + (0.314*k) , 0.168 - (0.168*k)] ,
+                    [ 0.272 - (0.272*k) , 0.534 - (0.534*k) , 0.131 + (0.869*k)]]
+
+    return tuple(tuple(round(weight * (1 << sepia_shift)) for weight in row) for row in sepia_matrix)
+
+
+def _check_image(image):
+
+    """
+    Checks that an image is an RGB image, a uint8 numpy array with shape (H, W, 3).
+    Gives a ValueError if it is not.
+    """
+    if not isinstance(image, np.ndarray) or image.ndim != 3 or image.shape[2] != 3:
+        raise ValueError("The image must be a numpy array with shape (H, W, 3)")
+    if image.dtype != np.uint8:
+        raise ValueError("The image must be of type uint8")
+
+
+def gray(image, backend="numpy"):
+
+    """
+    Grayscale image filter.
+    Turn an image, given as a numpy array, to a grayscale image.
+    Nothing is read from or written to disk.
+    -----------------------------------------
+    Arguments:
+        image : numpy ndarray
+            the orginal image, in RGB, as a uint8 array with shape (H, W, 3)
+
+        backend : str, optional, default="numpy"
+            Choose the implementation method, {"python", "numpy", "numba", "lut"}
+
+    Returns:
+        grayscale_image : numpy ndarray
+            The transformed image, as a uint8 numpy array with shape (H, W).
+
+    -----------------------------------------
+    """
+    _check_image(image)
+    return _backend(backend)._grayscale(image)
+
+
+def sepia(image, level=1.0, backend="numpy", out=None):
+
+    """
+    Adds sepia filter to an image, given as a numpy array.
+    Nothing is read from or written to disk.
+    -----------------------------------------
+    Arguments:
+        image : numpy ndarray
+            the orginal image, in RGB, as a uint8 array with shape (H, W, 3)
+
+        level : float, optional, default=1.0
+            Ammount of sepia-effect added to image. Must be a float between 0 and 1, where 1 is 100%, 0 is 0%.
+
+        backend : str, optional, default="numpy"
+            Choose the implementation method, {"python", "numpy", "numba", "lut"}
+
+        out : numpy ndarray, optional, default=None
+            A uint8 array with the same shape as image to write the result to, 
+            e.g. one buffer reused for many images, or the image itself.
+
+    Returns:
+        sepia_image : numpy ndarray
+            The transformed image, in RGB, as a uint8 numpy array (out if given).
+
+    -----------------------------------------
+    """
+    _check_image(image)
+    if not 0 <= level <= 1:
+        raise ValueError("The level must be between 0 and 1")
+    if out is None:
+        out = np.empty_like(image)
+    elif not isinstance(out, np.ndarray) or out.shape != image.shape or out.dtype != np.uint8:
+        raise ValueError("out must be a uint8 numpy array with the same shape as the image")
+
+    return _backend(backend)._sepia(image, level, out)
+
+
+def read_image(source, scale=None):
+
+    """
+    Reads an image from a file, or decodes it from bytes, and resizes it.
+    -----------------------------------------
+    Arguments:
+        source : str or bytes
+            filename or path to the image, or the encoded image (e.g. the bytes of a jpeg file)
+
+        scale : float, optional, default=None
+            Scale factor to resize image. (e.g. 0.5 halves image dimentions)
+
+    Returns:
+        image : numpy ndarray
+            The image, in RGB, with shape (H, W, 3)
+
+    -----------------------------------------
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        image = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
+    else:
+        image = cv2.imread(source)
+
+    if image is None:
+        raise ValueError("Could not read the image")
+
+    #if resize is given
+    if scale is not None:
+        image = cv2.resize(image, (0,0), fx = scale , fy = scale)
+
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def write_image(filename, image):
+
+    """
+    Writes an image (RGB or grayscale) to a file, the format is given by the extension.
+    -----------------------------------------
+    Arguments:
+        filename : str
+            filename or path to the image
+
+        image : numpy ndarray
+            The image, in RGB with shape (H, W, 3), or grayscale with shape (H, W)
+
+    Returns:
+        written : bool
+            False if cv2 could not write the image.
+
+    -----------------------------------------
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    return cv2.imwrite(filename, image)
+
+
+def output_filename_for(input_filename, filter_name):
+
+    """
+    Returns the default filename of a filtered image, e.g. rain_sepia.jpeg for rain.jpeg.
+    """
+    filename, ext = os.path.splitext(input_filename)
+    return filename + "_" + filter_name + ext
+
+
+def color2gray(input_filename, output_filename=None, scale=None, backend="numpy", write=True):
+
+    """
+    Grayscale image filter.
+    Turn a image of choice given by filename to a grayscale image.
+    Savnes (if write) and returns the transformed image.
+    -----------------------------------------
+    Arguments:
+        input_filename : str
+            filename or path to the image
+
+        output_filename: str, optinal, default=None
+            filename or path to the transformed image, by default <input>_grayscale.<ext>
+
+        scale : float, optional, default=None
+            Scale factor to resize image. (e.g. 0.5 halves image dimentions)
+
+        backend : str, optional, default="numpy"
+            Choose the implementation method, {"python", "numpy", "numba", "lut"}
+
+        write : bool, optional, default=True
+            If False, the transformed image is only returned.
+
+    Returns:
+        grayscale_image : numpy ndarray
+            The transformed image, as a uint8 numpy array with shape (H, W).
+
+    -----------------------------------------
+    """
+    grayscale_image = gray(read_image(input_filename, scale), backend)
+
+    if write:
+        write_image(output_filename or output_filename_for(input_filename, "grayscale"), grayscale_image)
+
+    return grayscale_image
+
+
+def color2sepia(input_filename, output_filename=None, scale=None, level=1.0, backend="numpy", write=True):
+
+    """
+    Adds sepia filter to the image.
+    Turn a image of choice given by filename to a sepia image.
+    Savnes (if write) and returns the transformed image.
+    -----------------------------------------
+    Arguments:
+        input_filename : str
+            filename or path to the image
+
+        output_filename: str, optinal, default=None
+            filename or path to the transformed image, by default <input>_sepia.<ext>
+
+        scale : float, optional, default=None
+            Scale factor to resize image. (e.g. 0.5 halves image dimentions)
+
+        level : float, optional, default=1.0
+            Ammount of sepia-effect added to image. Must be a float between 0 and 1, where 1 is 100%, 0 is 0%.
+
+        backend : str, optional, default="numpy"
+            Choose the implementation method, {"python", "numpy", "numba", "lut"}
+
+        write : bool, optional, default=True
+            If False, the transformed image is only returned.
+
+    Returns:
+        sepia_image : numpy ndarray
+            The transformed image, in BGR (as read and written by cv2), as a numpy array.
+
+    -----------------------------------------
+    """
+    #The image is filtered and changed back to BGR in place, no copies are made
+    sepia_image = read_image(input_filename, scale)
+    sepia(sepia_image, level, backend, out=sepia_image)
+    cv2.cvtColor(sepia_image, cv2.COLOR_RGB2BGR, dst=sepia_image)
+
+    if write:
+        cv2.imwrite(output_filename or output_filename_for(input_filename, "sepia"), sepia_image)
+
+    return sepia_image
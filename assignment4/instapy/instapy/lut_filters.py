@@ -0,0 +1,186 @@
+from functools import lru_cache
+
+import numpy as np
+from numba import jit
+
+from .filters import color2gray, color2sepia, gray_shift, gray_weights, sepia_shift, sepia_weights
+
+
+def lut_color2gray(input_filename, output_filename=None, scale=None, write=True):
+    """
+    Grayscale image filter.
+    Turn a image of choice given by filename to a grayscale image.
+    Implemented with lookup tables.
+    Savnes (if write) and returns the transformed image.
+    -----------------------------------------
+    Arguments:
+        input_filename : str
+            filename or path to the image
+
+        output_filename: str, optinal, default=None
+            filename or path to the transformed image
+
+        scale : float, optional, default=None
+            Scale factor to resize image. (e.g. 0.5 halves image dimentions)
+
+        write : bool, optional, default=True
+            If False, the transformed image is only returned.
+
+    Returns:
+        grayscale_image : numpy ndarray
+            The transformed image with as a numpy array.
+
+    -----------------------------------------
+    """
+    return color2gray(input_filename, output_filename, scale, backend="lut", write=write)
+
+
+def lut_color2sepia(input_filename, output_filename=None, scale=None, level=1.0, write=True):
+    """
+    Adds sepia filter to the image.
+    Turn a image of choice given by filename to a sepia image.
+    Implemented with lookup tables.
+    Savnes (if write) and returns the transformed image.
+    -----------------------------------------
+    Arguments:
+        input_filename : str
+            filename or path to the image
+
+        output_filename: str, optinal, default=None
+            filename or path to the transformed image
+
+        scale : float, optional, default=None
+            Scale factor to resize image. (e.g. 0.5 halves image dimentions)
+
+        level : float, optional, default=1.0
+            Ammount of sepia-effect added to image. Must be a float between 0 and 1, where 1 is 100%, 0 is 0%.
+
+        write : bool, optional, default=True
+            If False, the transformed image is only returned.
+
+    Returns:
+        sepia_image : numpy ndarray
+            The transformed image with as a numpy array.
+
+    -----------------------------------------
+    """
+    return color2sepia(input_filename, output_filename, scale, level, backend="lut", write=write)
+
+
+@lru_cache(maxsize=None)
+def lookup_tables(filter_name, level=None):
+
+    """
+    Returns the lookup tables of a filter, built once for every (filter, level).
+    Both filters are linear in the channel values, so the contribution of each
+    input channel to each output channel is precomputed for the 256 values.
+    -----------------------------------------
+    Arguments:
+        filter_name : str
+            the filter, {"gray", "sepia"}
+
+        level : float, optional, default=None
+            Ammount of sepia-effect, between 0 and 1 (only for sepia).
+
+    Returns:
+        tables : numpy ndarray
+            Read-only int32 array, tables[c, k, v] is the fixed-point contribution of value v
+            of input channel k to output channel c (the rounding is added to k = 0).
+            The output value is (tables[c, 0, R] + tables[c, 1, G] + tables[c, 2, B]) >> 16.
+
+    -----------------------------------------
+    """
+    if filter_name == "gray":
+        weights, shift = (gray_weights,), gray_shift
+    else:
+        weights, shift = sepia_weights(level), sepia_shift
+
+    tables = np.array(weights, dtype=np.int32)[:, :, None] * np.arange(256, dtype=np.int32)
+    tables[:, 0] += 1 << (shift - 1)
+    tables.flags.writeable = False
+    return tables
+
+
+def _grayscale(orginal_image):
+
+    """
+    Grayscales an RGB-image with lookup tables.
+
+    -----------------------------------------
+    Arguments:
+        orginal_image : numpy ndarray
+            the orginal image, in RGB, represented as a uint8 numpy array
+
+    Returns:
+        grayscale_image : numpy ndarray
+            The transformed image, represented as a uint8 numpy array with shape (H, W)
+
+    -----------------------------------------
+    """
+    grayscale_image = np.empty(orginal_image.shape[:2], dtype=np.uint8)
+    return _grayscale_kernel(orginal_image, lookup_tables("gray"), grayscale_image)
+
+
+def _sepia(orginal_image, level, out):
+
+    """
+    Add sepia filter to a RGB-image with lookup tables.
+
+    -----------------------------------------
+    Arguments:
+        orginal_image : numpy ndarray
+            the orginal image, in RGB, represented as a uint8 numpy array
+
+        level : float
+            Ammount of sepia-effect added to image. Must be a float between 0 and 1, where 1 is 100%, 0 is 0%.
+
+        out : numpy ndarray
+            uint8 array with the shape of the image to write the result to (can be the image itself)
+
+    Returns:
+        sepia_image : numpy ndarray
+            The transformed image (out), in RGB
+
+    -----------------------------------------
+    """
+    return _sepia_kernel(orginal_image, lookup_tables("sepia", level), out)
+
+
+@jit(nopython = True)
+def _grayscale_kernel(orginal_image, tables, out):
+
+    """
+    Looks up and adds the contributions of the channels of every pixel.
+    The weights sum to 2**16, so the values never need saturation.
+    """
+    H, W, C = orginal_image.shape
+
+    for i in range(H):
+        for j in range(W):
+            out[i, j] = (tables[0, 0, orginal_image[i, j, 0]]
+                         + tables[0, 1, orginal_image[i, j, 1]]
+                         + tables[0, 2, orginal_image[i, j, 2]]) >> gray_shift
+    return out
+
+
+@jit(nopython = True)
+def _sepia_kernel(orginal_image, tables, out):
+
+    """
+    Looks up and adds the contributions of the channels of every pixel, and saturates at 255.
+    The channels of a pixel are read before they are written, so out can be the image.
+    """
+    H, W, C = orginal_image.shape
+
+    for i in range(H):
+        for j in range(W):
+
+            red = orginal_image[i, j, 0]
+            green = orginal_image[i, j, 1]
+            blue = orginal_image[i, j, 2]
+
+            for channel in range(C):
+                value = (tables[channel, 0, red] + tables[channel, 1, green]
+                         + tables[channel, 2, blue]) >> sepia_shift
+                out[i, j, channel] = min(255, value)
+    return out
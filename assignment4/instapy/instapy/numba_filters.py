@@ -1,15 +1,22 @@
-import cv2
 import numpy as np
 from numba import jit 
 
+from .filters import color2gray, color2sepia, gray_shift, gray_weights, sepia_shift, sepia_weights
 
-def numba_color2gray(input_filename, output_filename=None, scale=None):
+
+#The fixed-point grayscale weights, as globals for the compiled kernel
+R_WEIGHT, G_WEIGHT, B_WEIGHT = gray_weights
+HALF = 1 << (gray_shift - 1)
+SEPIA_HALF = 1 << (sepia_shift - 1)
+
+
+def numba_color2gray(input_filename, output_filename=None, scale=None, write=True):
     
     """
     Grayscale image filter.
     Turn a image of choice given by filename to a grayscale image.
     Implemented with numba. 
-    Savnes and returns the transformed image. 
+    Savnes (if write) and returns the transformed image. 
     -----------------------------------------
     Arguments:
         input_filename : str 
@@ -21,34 +28,16 @@ def numba_color2gray(input_filename, output_filename=None, scale=None):
         scale : float, optional, default=None
             Scale factor to resize image. (e.g. 0.5 halves image dimentions) 
     
+        write : bool, optional, default=True
+            If False, the transformed image is only returned.
+    
     Returns: 
         grayscale_image : numpy ndarray
             The transformed image with as a numpy array. 
             
     -----------------------------------------
     """
-    
-    #Reads image, changes to RGB and grayscales it
-    orginal_image = cv2.imread(input_filename)
-    
-    #resize if scale is given
-    if scale is not None:
-        orginal_image = cv2.resize(orginal_image, (0,0), fx = scale , fy = scale)
-    
-    orginal_image = cv2.cvtColor(orginal_image, cv2.COLOR_BGR2RGB)
-    grayscale_image = _grayscale(orginal_image)
-    grayscale_image = grayscale_image.astype("uint8")
-    
-    
-    #Write the image to file with correct filename 
-    if output_filename is None:
-        filename, ext = input_filename.split(".")
-        full_filename = filename + "_grayscale." + ext
-        cv2.imwrite(full_filename, grayscale_image)
-    else:
-        cv2.imwrite(output_filename, grayscale_image)  
-    
-    return grayscale_image
+    return color2gray(input_filename, output_filename, scale, backend="numba", write=write)
 
 
 @jit(nopython = True)
@@ -56,29 +45,30 @@ def _grayscale(orginal_image):
     
     """
     Grayscales an RGB-image with numba implementation. 
+    Uses integer fixed-point weights (see filters.gray_weights), no floats.
     
     -----------------------------------------
     Arguments:
         orginal_image : numpy ndarray 
-            the orginal image, in RGB, represented as a numpy array
+            the orginal image, in RGB, represented as a uint8 numpy array
     
     Returns: 
         grayscale_image : numpy ndarray
-            The transformed image, in RGB, represented as a numpy array
+            The transformed image, represented as a uint8 numpy array with shape (H, W)
             
     -----------------------------------------
     """
     #height, width, channels
     H, W, C = orginal_image.shape
     
-    grayscale_image = np.zeros((H,W,C))
+    grayscale_image = np.empty((H,W), dtype=np.uint8)
     
     for i in range(H):
         for j in range(W): 
  
-            grayscale_image[i, j] += orginal_image[i, j, 0] * 0.21 \
-                                   + orginal_image[i, j, 1] * 0.72 \
-                                   + orginal_image[i, j, 2] * 0.07 \
+            grayscale_image[i, j] = (orginal_image[i, j, 0] * R_WEIGHT \
+                                   + orginal_image[i, j, 1] * G_WEIGHT \
+                                   + orginal_image[i, j, 2] * B_WEIGHT + HALF) >> gray_shift
             
     return grayscale_image
     
@@ -86,12 +76,12 @@ def _grayscale(orginal_image):
 
 
 
-def numba_color2sepia(input_filename, output_filename=None, scale=None, level=1.0):
+def numba_color2sepia(input_filename, output_filename=None, scale=None, level=1.0, write=True):
     """
     Adds sepia filter to the image.
     Turn a image of choice given by filename to a sepia image.
     Implemented with numba. 
-    Savnes and returns the transformed image. 
+    Savnes (if write) and returns the transformed image. 
     -----------------------------------------
     Arguments:
         input_filename : str 
@@ -106,89 +96,66 @@ def numba_color2sepia(input_filename, output_filename=None, scale=None, level=1.
         level : float, optional, default=1.0
             Ammount of sepia-effect added to image. Must be a float between 0 and 1, where 1 is 100%, 0 is 0%.
     
+        write : bool, optional, default=True
+            If False, the transformed image is only returned.
+    
     Returns: 
         grayscale_image : numpy ndarray
             The transformed image with as a numpy array. 
             
     -----------------------------------------
     """
-    #Reads image, changes to RGB and add sepia filter 
-    orginal_image = cv2.imread(input_filename)
-    
-    #resize if scale is given
-    if scale is not None:
-        orginal_image = cv2.resize(orginal_image, (0,0), fx = scale , fy = scale)
-        
-    orginal_image = cv2.cvtColor(orginal_image, cv2.COLOR_BGR2RGB)
-    sepia_image = _sepia(orginal_image, level)
-    sepia_image = sepia_image.astype("uint8")
-    #Changes Back to BGR
-    sepia_image = cv2.cvtColor(sepia_image, cv2.COLOR_BGR2RGB)
-    
-    #Write the image to file with correct filename 
-    if output_filename is None:
-        filename, ext = input_filename.split(".")
-        full_filename = filename + "_sepia." + ext
-        cv2.imwrite(full_filename, sepia_image)
-    else:
-        cv2.imwrite(output_filename, sepia_image) 
-          
-    
-    return sepia_image
+    return color2sepia(input_filename, output_filename, scale, level, backend="numba", write=write)
 
 
-@jit(nopython = True)
-def _sepia(orginal_image, level):
+def _sepia(orginal_image, level, out):
     
-
     """
     Add sepia filter to a RGB-image with numba implementation. 
+    Uses integer fixed-point weights (see filters.sepia_weights), no floats.
     
     -----------------------------------------
     Arguments:
         orginal_image : numpy ndarray 
-            the orginal image, in RGB, represented as a numpy array
+            the orginal image, in RGB, represented as a uint8 numpy array
         
-        level : float, optional, default=1.0
+        level : float
             Ammount of sepia-effect added to image. Must be a float between 0 and 1, where 1 is 100%, 0 is 0%.
+        
+        out : numpy ndarray
+            uint8 array with the shape of the image to write the result to (can be the image itself)
     
     Returns: 
-        grayscale_image : numpy ndarray
-            The transformed image, in RGB, represented as a numpy array
+        sepia_image : numpy ndarray
+            The transformed image (out), in RGB
             
     -----------------------------------------
     """
+    _sepia_kernel(orginal_image, np.array(sepia_weights(level), dtype=np.int64), out)
+    return out
+
+
+@jit(nopython = True)
+def _sepia_kernel(orginal_image, weights, out):
+    
+    """
+    Computes, saturates and stores the sepia values of every pixel in one pass. 
+    The channels of a pixel are read before they are written, so out can be the image.
+    """
     
     #height, width, channels
     H, W, C = orginal_image.shape    
     
-    sepia_image = np.empty_like(orginal_image)
-    
-    #sepia_matrix = [[ 0.393 , 0.769 , 0.189] ,
-    #                [ 0.349 , 0.686 , 0.168] ,
-    #                [ 0.272 , 0.534 , 0.131]]
-    
     for i in range(H):
         for j in range(W): 
             
-            red = orginal_image[i,j,0]
-            green = orginal_image[i,j,1]
-            blue = orginal_image[i,j,2]
-            
-            k = 1-level
+            red = np.int64(orginal_image[i,j,0])
+            green = np.int64(orginal_image[i,j,1])
+            blue = np.int64(orginal_image[i,j,2])
             
-            #red
-            val_R = red * (0.393 + (0.607*k)) + green * (0.769 - (0.769*k))  + blue * (0.189 - (0.189*k))
-            
-            #green
-            val_G = red * (0.349 - (0.349*k)) + green * (0.686 + (0.314*k)) + blue * (0.168 - (0.168*k))
-            
-            #blue
-            val_B = red * (0.272 - (0.272*k)) + green * (0.534 - (0.534*k)) + blue * (0.131 + (0.869*k))
-            
-            sepia_image[i, j, 0] = min(255, val_R)
-            sepia_image[i, j, 1] = min(255, val_G)
-            sepia_image[i, j, 2] = min(255, val_B)
-    
+            for channel in range(C):
+                value = (red * weights[channel, 0] + green * weights[channel, 1] 
+                         + blue * weights[channel, 2] + SEPIA_HALF) >> sepia_shift
+                out[i, j, channel] = min(255, value)
          
-    return sepia_image
\ No newline at end of file
+    return out
@@ -1,13 +1,18 @@
-import cv2
 import numpy as np
 
-def numpy_color2gray(input_filename, output_filename=None, scale=None):
+from .filters import color2gray, color2sepia, gray_shift, gray_weights, sepia_shift, sepia_weights
+
+
+#Number of rows filtered at a time, so the integer temporaries stay small (and in cache)
+block_rows = 64
+
+def numpy_color2gray(input_filename, output_filename=None, scale=None, write=True):
     
     """
     Grayscale image filter.
     Turn a image of choice given by filename to a grayscale image.
     Implemented with numpy. 
-    Savnes and returns the transformed image. 
+    Savnes (if write) and returns the transformed image. 
     -----------------------------------------
     Arguments:
         input_filename : str 
@@ -19,35 +24,16 @@ def numpy_color2gray(input_filename, output_filename=None, scale=None):
         scale : float, optional, default=None
             Scale factor to resize image. (e.g. 0.5 halves image dimentions) 
     
+        write : bool, optional, default=True
+            If False, the transformed image is only returned.
+    
     Returns: 
         grayscale_image : numpy ndarray
             The transformed image with as a numpy array. 
             
     -----------------------------------------
     """
-    
-    #Reads image, changes to RGB and grayscales it
-    orginal_image = cv2.imread(input_filename)
-    
-    #if resize is given 
-    if scale is not None:
-        orginal_image = cv2.resize(orginal_image, (0,0), fx = scale , fy = scale)
-    
-    orginal_image = cv2.cvtColor(orginal_image, cv2.COLOR_BGR2RGB)
-    grayscale_image = _grayscale(orginal_image)
-    grayscale_image = grayscale_image.astype("uint8")
-    
-    
-    #Write the image to file with correct filename
-    if output_filename is None:
-        filename, ext = input_filename.split(".")
-        full_filename = filename + "_grayscale." + ext
-        cv2.imwrite(full_filename, grayscale_image)
-    else:
-        cv2.imwrite(output_filename, grayscale_image)
-  
-    
-    return grayscale_image
+    return color2gray(input_filename, output_filename, scale, backend="numpy", write=write)
 
 
 
@@ -55,34 +41,50 @@ def _grayscale(orginal_image):
     
     """
     Grayscales an RGB-image with numpy implementation. 
+    Uses integer fixed-point weights (see filters.gray_weights), a block of rows 
+    at a time, so no float arrays or full-size temporaries are made.
     
     -----------------------------------------
     Arguments:
         orginal_image : numpy ndarray 
-            the orginal image, in RGB, represented as a numpy array
+            the orginal image, in RGB, represented as a uint8 numpy array
     
     Returns: 
         grayscale_image : numpy ndarray
-            The transformed image, in RGB, represented as a numpy array
+            The transformed image, represented as a uint8 numpy array with shape (H, W)
             
     -----------------------------------------
     """
-    R_value = orginal_image[:,:,0] * 0.21
-    G_value = orginal_image[:,:,1] * 0.72
-    B_value = orginal_image[:,:,2] * 0.07
+    #height, width, channels
+    H, W, C = orginal_image.shape
+    
+    grayscale_image = np.empty((H, W), dtype=np.uint8)
+    value = np.empty((min(H, block_rows), W), dtype=np.uint32)
+    product = np.empty_like(value)
     
-    grayscale_image = R_value + G_value + B_value
+    for start in range(0, H, block_rows):
+        block = orginal_image[start:start + block_rows]
+        rows = block.shape[0]
+        
+        np.multiply(block[:,:,0], gray_weights[0], out=value[:rows], dtype=np.uint32)
+        for channel in (1, 2):
+            np.multiply(block[:,:,channel], gray_weights[channel], out=product[:rows], dtype=np.uint32)
+            value[:rows] += product[:rows]
+        
+        #Rounds to nearest 
+        value[:rows] += 1 << (gray_shift - 1)
+        np.right_shift(value[:rows], gray_shift, out=grayscale_image[start:start + rows], casting="unsafe")
        
     return grayscale_image
 
 
 
-def numpy_color2sepia(input_filename, output_filename=None, scale=None, level=1.0):
+def numpy_color2sepia(input_filename, output_filename=None, scale=None, level=1.0, write=True):
     """
     Adds sepia filter to the image.
     Turn a image of choice given by filename to a sepia image.
     Implemented with numpy. 
-    Savnes and returns the transformed image. 
+    Savnes (if write) and returns the transformed image. 
     -----------------------------------------
     Arguments:
         input_filename : str 
@@ -97,57 +99,39 @@ def numpy_color2sepia(input_filename, output_filename=None, scale=None, level=1.
         level : float, optional, default=1.0
             Ammount of sepia-effect added to image. Must be a float between 0 and 1, where 1 is 100%, 0 is 0%.
     
+        write : bool, optional, default=True
+            If False, the transformed image is only returned.
+    
     Returns: 
         grayscale_image : numpy ndarray
             The transformed image with as a numpy array. 
             
     -----------------------------------------
     """
-    
-    #Reads image, changes to RGB and add sepia filter 
-    orginal_image = cv2.imread(input_filename)
-    
-    #if resize is given
-    if not scale is None:
-        orginal_image = cv2.resize(orginal_image, (0,0), fx = scale , fy = scale)
-    
-    orginal_image = cv2.cvtColor(orginal_image, cv2.COLOR_BGR2RGB)
-        
-    sepia_image = _sepia(orginal_image, level)
-    sepia_image = sepia_image.astype("uint8")
-    
-    #Changes back to BGR
-    sepia_image = cv2.cvtColor(sepia_image, cv2.COLOR_BGR2RGB)
-    
-    
-    #Write the image to file with correct filename
-    if output_filename is None:
-        filename, ext = input_filename.split(".")
-        full_filename = filename + "_sepia." + ext
-        cv2.imwrite(full_filename, sepia_image)
-    else:
-        cv2.imwrite(output_filename, sepia_image)    
-        
-    
-    return sepia_image
+    return color2sepia(input_filename, output_filename, scale, level, backend="numpy", write=write)
 
 
-def _sepia(orginal_image, level):
+def _sepia(orginal_image, level, out):
     
     """
     Add sepia filter to a RGB-image with numpy implementation. 
+    Uses integer fixed-point weights (see filters.sepia_weights), a block of rows at a time, 
+    and computes, saturates and stores the values with small reused temporaries.
     
     -----------------------------------------
     Arguments:
         orginal_image : numpy ndarray 
-            the orginal image, in RGB, represented as a numpy array
+            the orginal image, in RGB, represented as a uint8 numpy array
         
-        level : float, optional, default=1.0
+        level : float
             Ammount of sepia-effect added to image. Must be a float between 0 and 1, where 1 is 100%, 0 is 0%.
+        
+        out : numpy ndarray
+            uint8 array with the shape of the image to write the result to (can be the image itself)
     
     Returns: 
-        grayscale_image : numpy ndarray
-            The transformed image, in RGB, represented as a numpy array
+        sepia_image : numpy ndarray
+            The transformed image (out), in RGB
             
     -----------------------------------------
     """
@@ -155,16 +139,24 @@ def _sepia(orginal_image, level):
     #height, width, channels
     H, W, C = orginal_image.shape    
     
-    sepia_image = np.empty_like(orginal_image)
-    
-    k = 1 - level
+    weights = sepia_weights(level)
+    value = np.empty((min(H, block_rows), W, C), dtype=np.uint32)
+    product = np.empty((min(H, block_rows), W), dtype=np.uint32)
     
-    sepia_matrix = np.array([[ 0.393 + (0.607*k) , 0.769 - (0.769*k) , 0.189 - (0.189*k)] ,
-                             [ 0.349 - (0.349*k) , 0.686 + (0.314*k) , 0.168 - (0.168*k)] ,
-                             [ 0.272 - (0.272*k) , 0.534 - (0.534*k) , 0.131 + (0.869*k)]])
-    
-    sepia_image = orginal_image @ sepia_matrix.T
-    sepia_image[np.where(sepia_image > 255)] = 255
+    for start in range(0, H, block_rows):
+        block = orginal_image[start:start + block_rows]
+        rows = block.shape[0]
+        
+        for channel in range(C):
+            np.multiply(block[:,:,0], weights[channel][0], out=value[:rows,:,channel], dtype=np.uint32)
+            for other in (1, 2):
+                np.multiply(block[:,:,other], weights[channel][other], out=product[:rows], dtype=np.uint32)
+                value[:rows,:,channel] += product[:rows]
+        
+        #Rounds to nearest and saturates, the whole block is read before it is written (out can be the image)
+        value[:rows] += 1 << (sepia_shift - 1)
+        value[:rows] >>= sepia_shift
+        np.minimum(value[:rows], 255, out=value[:rows])
+        np.copyto(out[start:start + rows], value[:rows], casting="unsafe")
     
-            
-    return sepia_image
\ No newline at end of file
+    return out
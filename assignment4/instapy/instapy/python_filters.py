@@ -1,13 +1,14 @@
-import cv2
 import numpy as np
 
+from .filters import color2gray, color2sepia, gray_shift, gray_weights, sepia_shift, sepia_weights
 
-def python_color2gray(input_filename, output_filename=None, scale=None):
+
+def python_color2gray(input_filename, output_filename=None, scale=None, write=True):
     """
     Grayscale image filter.
     Turn a image of choice given by filename to a grayscale image.
     Implemented with python. 
-    Savnes and returns the transformed image. 
+    Savnes (if write) and returns the transformed image. 
     -----------------------------------------
     Arguments:
         input_filename : str 
@@ -19,73 +20,54 @@ def python_color2gray(input_filename, output_filename=None, scale=None):
         scale : float, optional, default=None
             Scale factor to resize image. (e.g. 0.5 halves image dimentions) 
     
+        write : bool, optional, default=True
+            If False, the transformed image is only returned.
+    
     Returns: 
         grayscale_image : numpy ndarray
             The transformed image with as a numpy array. 
             
     -----------------------------------------
     """
-    
-    #Reads image, changes to RGB and grayscales it
-    orginal_image = cv2.imread(input_filename)
-    
-    #if resize is given 
-    if scale is not None:
-        orginal_image = cv2.resize(orginal_image, (0,0), fx = scale , fy = scale)
-        
-    orginal_image = cv2.cvtColor(orginal_image, cv2.COLOR_BGR2RGB)
-    grayscale_image = _grayscale(orginal_image)   
-    grayscale_image = grayscale_image.astype("uint8")
-    
-    #Write the image to file with correct filename 
-    if output_filename is None:
-        filename, ext = input_filename.split(".")
-        full_filename = filename + "_grayscale." + ext
-        cv2.imwrite(full_filename, grayscale_image)
-    else:
-        cv2.imwrite(output_filename, grayscale_image)
-        
-       
-    return grayscale_image
+    return color2gray(input_filename, output_filename, scale, backend="python", write=write)
 
 
 def _grayscale(orginal_image):
     
     """
-    Grayscales an RGB-image with XXX implementation. 
+    Grayscales an RGB-image with python implementation. 
+    Uses integer fixed-point weights (see filters.gray_weights), no floats.
     
     -----------------------------------------
     Arguments:
         orginal_image : numpy ndarray 
-            the orginal image, in RGB, represented as a numpy array
+            the orginal image, in RGB, represented as a uint8 numpy array
     
     Returns: 
         grayscale_image : numpy ndarray
-            The transformed image, in RGB, represented as a numpy array
+            The transformed image, represented as a uint8 numpy array with shape (H, W)
             
     -----------------------------------------
     
     """
+    R_weight, G_weight, B_weight = gray_weights
+    half = 1 << (gray_shift - 1)
     
+    #The pixels as python ints, indexing the numpy array pixel by pixel is much slower
+    grayscale_image = [[(red * R_weight + green * G_weight + blue * B_weight + half) >> gray_shift 
+                        for red, green, blue in row] 
+                       for row in orginal_image.tolist()]
     
-    H, W, C = orginal_image.shape
-    grayscale_image = np.zeros((H,W,C))
-    
-    for i in range(H):
-        for j in range(W): 
-            grayscale_image[i, j] += orginal_image[i, j, 0] * 0.21 \
-                                   + orginal_image[i, j, 1] * 0.72 \
-                                   + orginal_image[i, j, 2] * 0.07        
-    return grayscale_image
+    return np.array(grayscale_image, dtype=np.uint8).reshape(orginal_image.shape[:2])
 
 
 
-def python_color2sepia(input_filename, output_filename=None, scale=None, level=1.0):
+def python_color2sepia(input_filename, output_filename=None, scale=None, level=1.0, write=True):
     """
     Adds sepia filter to the image.
     Turn a image of choice given by filename to a sepia image.
     Implemented with python. 
-    Savnes and returns the transformed image. 
+    Savnes (if write) and returns the transformed image. 
     -----------------------------------------
     Arguments:
         input_filename : str 
@@ -99,88 +81,51 @@ def python_color2sepia(input_filename, output_filename=None, scale=None, level=1
         level : float, optional, default=1.0
             Ammount of sepia-effect added to image. Must be a float between 0 and 1, where 1 is 100%, 0 is 0%.
     
+        write : bool, optional, default=True
+            If False, the transformed image is only returned.
+    
     Returns: 
         grayscale_image : numpy ndarray
             The transformed image with as a numpy array. 
             
     -----------------------------------------
     """
-    
-    #Reads image, changes to RGB and add sepia filter 
-    orginal_image = cv2.imread(input_filename)
-    
-    #if resize is given
-    if not scale is None:
-        orginal_image = cv2.resize(orginal_image, (0,0), fx = scale , fy = scale)
-    
-    orginal_image = cv2.cvtColor(orginal_image, cv2.COLOR_BGR2RGB)
-    sepia_image = _sepia(orginal_image, level)
-    sepia_image = sepia_image.astype("uint8")
-    #Changes Back to BGR
-    sepia_image = cv2.cvtColor(sepia_image, cv2.COLOR_BGR2RGB)
-    
-    #Write the image to file with correct filename
-    if output_filename is None:
-        filename, ext = input_filename.split(".")
-        full_filename = filename + "_sepia." + ext
-        cv2.imwrite(full_filename, sepia_image)
-    else:
-        cv2.imwrite(output_filename, sepia_image)
-        
-    
-    return sepia_image
+    return color2sepia(input_filename, output_filename, scale, level, backend="python", write=write)
 
 
-def _sepia(orginal_image, level):
+def _sepia(orginal_image, level, out):
     
     """
-    Add sepia filter to a RGB-image with XXX implementation. 
+    Add sepia filter to a RGB-image with python implementation. 
+    Uses integer fixed-point weights (see filters.sepia_weights), no floats.
     
     -----------------------------------------
     Arguments:
         orginal_image : numpy ndarray 
-            the orginal image, in RGB, represented as a numpy array
+            the orginal image, in RGB, represented as a uint8 numpy array
         
-        level : float, optional, default=1.0
+        level : float
             Ammount of sepia-effect added to image. Must be a float between 0 and 1, where 1 is 100%, 0 is 0%.
+        
+        out : numpy ndarray
+            uint8 array with the shape of the image to write the result to (can be the image itself)
     
     Returns: 
-        grayscale_image : numpy ndarray
-            The transformed image, in RGB, represented as a numpy array
+        sepia_image : numpy ndarray
+            The transformed image (out), in RGB
             
     -----------------------------------------
     """
     
-    #height, width, channels
-    H, W, C = orginal_image.shape    
-    
-    sepia_image = np.empty_like(orginal_image)
+    (R_red, R_green, R_blue), (G_red, G_green, G_blue), (B_red, B_green, B_blue) = sepia_weights(level)
+    half = 1 << (sepia_shift - 1)
     
-    #sepia_matrix = [[ 0.393 , 0.769 , 0.189] ,
-    #                [ 0.349 , 0.686 , 0.168] ,
-    #                [ 0.272 , 0.534 , 0.131]]
+    #The pixels as python ints, indexing the numpy array pixel by pixel is much slower
+    sepia_image = [[(min(255, (red * R_red + green * R_green + blue * R_blue + half) >> sepia_shift), 
+                     min(255, (red * G_red + green * G_green + blue * G_blue + half) >> sepia_shift), 
+                     min(255, (red * B_red + green * B_green + blue * B_blue + half) >> sepia_shift)) 
+                    for red, green, blue in row] 
+                   for row in orginal_image.tolist()]
     
-    for i in range(H):
-        for j in range(W): 
-            
-            k = 1-level
-            
-            red = orginal_image[i,j,0]
-            green = orginal_image[i,j,1]
-            blue = orginal_image[i,j,2]
-
-            #red
-            val_R = red * (0.393 + (0.607*k)) + green * (0.769 - (0.769*k))  + blue * (0.189 - (0.189*k))
-            
-            #green
-            val_G = red * (0.349 - (0.349*k)) + green * (0.686 + (0.314*k)) + blue * (0.168 - (0.168*k))
-            
-            #blue
-            val_B = red * (0.272 - (0.272*k)) + green * (0.534 - (0.534*k)) + blue * (0.131 + (0.869*k))
-            
-            sepia_image[i, j, 0] = min(255, val_R)
-            sepia_image[i, j, 1] = min(255, val_G)
-            sepia_image[i, j, 2] = min(255, val_B)
-    
-            
-    return sepia_image
\ No newline at end of file
+    out[...] = np.array(sepia_image, dtype=np.uint8).reshape(out.shape)
+    return out
@@ -1,3 +1,6 @@
+import json
+import os
+
 import cv2
 import matplotlib.pyplot as plt
 import numpy as np
@@ -5,9 +8,10 @@ import pytest
 
 
 from instapy import grayscale_image, sepia_image
+from instapy import batch, bench, filters
 
 
-@pytest.mark.parametrize("implementation", ("python", "numpy", "numba"))
+@pytest.mark.parametrize("implementation", ("python", "numpy", "numba", "lut"))
 def test_grayscale(implementation):
     """
     
@@ -42,24 +46,19 @@ def test_grayscale(implementation):
     test_gray_image = grayscale_image("test_image.jpg", implementation=implementation)
 
 
-    if implementation == "numpy":
-        #the numpy implementation should return a 2D array with shape NxN
-        assert test_image.shape != test_gray_image.shape
-        assert len(test_gray_image.shape) == 2
-        assert test_gray_image[i, j] == int(expected_value)
-    else:
-        #The other implementations returns a 3D array with shape NxNx3.
-        assert test_image.shape == test_gray_image.shape
-        assert len(test_gray_image.shape) == 3
-        assert test_gray_image.shape[2] == 3
-        assert test_gray_image[i,j,0] == int(expected_value)
-        assert test_gray_image[i,j,1] == int(expected_value)
-        assert test_gray_image[i,j,2] == int(expected_value)
+    #All implementations should return a 2D uint8 array with shape NxN
+    assert test_gray_image.shape == test_image.shape[:2]
+    assert test_gray_image.dtype == np.uint8
+    
+    #The values are rounded to nearest (the fixed-point weights are off by less than 0.01)
+    assert abs(int(test_gray_image[i, j]) - expected_value) < 0.51
+    exact_image = test_image @ np.array([0.07, 0.72, 0.21])
+    assert np.abs(test_gray_image - exact_image).max() < 0.51
 
 
 
 
-@pytest.mark.parametrize("implementation", ("python", "numpy", "numba"))
+@pytest.mark.parametrize("implementation", ("python", "numpy", "numba", "lut"))
 def test_sepia(implementation):
     """
     Tests that all implementations of sepia_scale works as expected. 
@@ -89,18 +88,131 @@ def test_sepia(implementation):
                              [0.168, 0.686, 0.349],
                              [0.189, 0.769, 0.393]])
     
-    expected = (test_image[i, j, :] @ sepia_matrix.T).astype("uint8")
-    expected[np.where(expected > 255)] = 255
+    #The values are rounded to nearest and saturated at 255
+    expected = np.minimum(test_image[i, j, :] @ sepia_matrix.T, 255)
 
     test_sepia_image = sepia_image("test_image.jpg", implementation=implementation)
 
     # Test shape 
     assert test_sepia_image.shape == test_image.shape
     assert test_sepia_image.shape[2] == 3
+    assert test_sepia_image.dtype == np.uint8
     
     #test random value(s)
-    assert np.array_equal(test_sepia_image[i, j, :], expected)
+    assert np.abs(test_sepia_image[i, j, :] - expected).max() < 0.51
+    
+    exact_image = np.minimum(test_image @ sepia_matrix.T, 255)
+    assert np.abs(test_sepia_image - exact_image).max() < 0.51
+
+
+
+
+@pytest.mark.parametrize("implementation", ("python", "numpy", "numba", "lut"))
+def test_in_memory_filters(implementation, tmp_path):
+    """
+    Tests that the in-memory filters works on arrays without any files
+    - tests that they give the same images as the file based filters
+    - tests that nothing is written with write=False
+    """
     
-    assert test_sepia_image[i,j,0] == expected[0]
-    assert test_sepia_image[i,j,1] == expected[1]
-    assert test_sepia_image[i,j,2] == expected[2]
+    np.random.seed(4110)
+    rgb_image = np.random.randint(0, 256, size=(20, 30, 3)).astype("uint8")
+    
+    filename = str(tmp_path / "image.png")
+    cv2.imwrite(filename, cv2.cvtColor(rgb_image, cv2.COLOR_RGB2BGR))
+    
+    gray_image = filters.gray(rgb_image, backend=implementation)
+    assert np.array_equal(gray_image, grayscale_image(filename, implementation=implementation))
+    
+    sepia_rgb_image = filters.sepia(rgb_image, 0.5, backend=implementation)
+    sepia_bgr_image = sepia_image(filename, level=0.5, implementation=implementation, write=False)
+    assert np.array_equal(sepia_rgb_image, cv2.cvtColor(sepia_bgr_image, cv2.COLOR_BGR2RGB))
+    
+    #Test sepia into a reused buffer, and in place
+    out = np.zeros_like(rgb_image)
+    assert filters.sepia(rgb_image, 0.5, backend=implementation, out=out) is out
+    assert np.array_equal(out, sepia_rgb_image)
+    in_place_image = rgb_image.copy()
+    filters.sepia(in_place_image, 0.5, backend=implementation, out=in_place_image)
+    assert np.array_equal(in_place_image, sepia_rgb_image)
+    
+    #Only the grayscale image is written
+    assert sorted(os.listdir(tmp_path)) == ["image.png", "image_grayscale.png"]
+    
+    with pytest.raises(ValueError):
+        filters.gray(rgb_image[:, :, 0], backend=implementation)
+    with pytest.raises(ValueError):
+        filters.sepia(rgb_image, 2, backend=implementation)
+    with pytest.raises(ValueError):
+        filters.sepia(rgb_image, backend=implementation, out=np.zeros((20, 30, 3)))
+
+
+
+def test_bench(tmp_path):
+    """
+    Tests the benchmark harness on small images
+    - tests that every phase is timed for every case
+    - tests that the results are written as JSON
+    """
+    
+    results = bench.run_benchmarks([(10, 20), (20, 40)], ["numpy"], ["gray", "sepia"], repeat=3)
+    assert len(results) == 4
+    for result in results:
+        assert result["compile"] >= 0
+        assert set(result["times"]) == {"decode", "filter", "encode"}
+        times = result["times"]["filter"]
+        assert times["min"] <= times["median"] <= times["p95"]
+    
+    filename = str(tmp_path / "bench.json")
+    bench.write_results(results, filename)
+    with open(filename) as file:
+        assert json.load(file)["results"] == results
+    
+    assert bench.percentile([4, 1, 3, 2], 50) == 2
+    assert bench.percentile([4, 1, 3, 2], 95) == 4
+
+
+def test_batch(tmp_path):
+    """
+    Tests the batch mode on a small tree of images
+    - tests that the output mirrors the input tree
+    - tests that the images are filtered
+    - tests that a failing image is reported and the others still filtered
+    """
+    
+    image = np.random.randint(0, 256, size=(10, 20, 3), dtype=np.uint8)
+    for relative_path in ("a.png", os.path.join("sub", "b.png"), os.path.join("sub", "deeper", "c.jpg")):
+        os.makedirs(os.path.dirname(str(tmp_path / "in" / relative_path)), exist_ok=True)
+        cv2.imwrite(str(tmp_path / "in" / relative_path), image)
+    (tmp_path / "in" / "broken.png").write_bytes(b"not an image")
+    (tmp_path / "in" / "notes.txt").write_text("skipped")
+    
+    files = list(batch.collect_files([str(tmp_path / "in")]))
+    assert sorted(relative_path for path, relative_path in files) == sorted(
+        ["a.png", "broken.png", os.path.join("sub", "b.png"), os.path.join("sub", "deeper", "c.jpg")])
+    
+    summary = batch.run_batch(files, str(tmp_path / "out"), "gray", backend="numpy", jobs=2)
+    assert summary["images"] == 3
+    assert summary["failed"] == 1 and summary["failures"][0][0].endswith("broken.png")
+    assert summary["pixels"] == 3 * 10 * 20
+    
+    gray_image = cv2.imread(str(tmp_path / "out" / "sub" / "b.png"), cv2.IMREAD_UNCHANGED)
+    assert gray_image.shape == (10, 20)
+    assert np.array_equal(gray_image, filters.gray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+    assert os.path.isfile(str(tmp_path / "out" / "sub" / "deeper" / "c.jpg"))
+    
+    pattern = os.path.join(str(tmp_path / "in"), "**", "*.png")
+    assert sorted(relative_path for path, relative_path in batch.collect_files([pattern])) == sorted(
+        ["a.png", "broken.png", os.path.join("sub", "b.png")])
+
+    #Several roots are kept apart by their names, and outputs which would collide are failures
+    os.makedirs(str(tmp_path / "in2"))
+    cv2.imwrite(str(tmp_path / "in2" / "a.png"), image)
+    files = list(batch.collect_files([str(tmp_path / "in"), str(tmp_path / "in2")]))
+    assert os.path.join("in", "a.png") in [relative_path for path, relative_path in files]
+    assert os.path.join("in2", "a.png") in [relative_path for path, relative_path in files]
+
+    files = [(str(tmp_path / "in" / "a.png"), "a.png"), (str(tmp_path / "in2" / "a.png"), "a.png")]
+    summary = batch.run_batch(files, str(tmp_path / "out2"), "gray", jobs=1)
+    assert summary["images"] == 1 and summary["failed"] == 1
+    assert summary["failures"][0][0] == str(tmp_path / "in2" / "a.png")